@@ -0,0 +1,84 @@
+"""
+Compares the HTML backends in `ready.document` on a corpus of pages.
+
+    python benchmarks/html_backends.py [<url or file or directory> ...] [--repeat=<n>]
+
+Pages are fetched (URLs) or read (files, and every .html file in a directory). Without arguments a
+handful of large, real-world pages are fetched. Each backend parses every page `repeat` times, and
+documents that differ from the standard library backend are reported.
+"""
+
+import os
+import sys
+import time
+from urllib.error import URLError
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from ready.document import available_backends, parse_html  # noqa: E402
+from ready.thttp import request  # noqa: E402
+
+DEFAULT_CORPUS = [
+    "https://en.wikipedia.org/wiki/HTML",
+    "https://developer.mozilla.org/en-US/docs/Web/HTML",
+    "https://github.com/python/cpython",
+    "https://www.bbc.com/news",
+    "https://html.spec.whatwg.org/multipage/parsing.html",
+]
+
+
+def load_corpus(sources):
+    pages = []
+
+    for source in sources:
+        if source.startswith(("http://", "https://")):
+            try:
+                response = request(source, timeout=10)
+            except URLError as e:
+                print(f"Skipping {source} ({e.reason})")
+                continue
+            pages.append((source, response.content.decode(errors="ignore")))
+        elif os.path.isdir(source):
+            for name in sorted(os.listdir(source)):
+                if name.endswith((".html", ".htm")):
+                    pages.extend(load_corpus([os.path.join(source, name)]))
+        else:
+            with open(source, "rb") as f:
+                pages.append((source, f.read().decode(errors="ignore")))
+
+    return pages
+
+
+def view(document):
+    return {k: v for k, v in document.__dict__.items() if k != "backend"}
+
+
+def main(args):
+    repeat = int(next((a.split("=")[1] for a in args if a.startswith("--repeat=")), 5))
+    pages = load_corpus([a for a in args if not a.startswith("--")] or DEFAULT_CORPUS)
+    if not pages:
+        print("No pages to parse")
+        return
+
+    size = sum(len(text.encode()) for _, text in pages)
+
+    print(f"{len(pages)} pages, {size / 1024 / 1024:.2f} MB, {repeat} repeats\n")
+    print(f"{'backend':<12} {'total (ms)':>12} {'per page (ms)':>15} {'MB/s':>8}  mismatches")
+
+    expected = {source: view(parse_html(text, "stdlib")) for source, text in pages}
+
+    for backend in available_backends():
+        started = time.perf_counter()
+        for _ in range(repeat):
+            documents = {source: parse_html(text, backend) for source, text in pages}
+        elapsed = (time.perf_counter() - started) / repeat
+
+        mismatches = [source for source, document in documents.items() if view(document) != expected[source]]
+        print(
+            f"{backend:<12} {elapsed * 1000:>12.1f} {elapsed * 1000 / len(pages):>15.2f} {size / 1024 / 1024 / elapsed:>8.1f}  "
+            f"{', '.join(mismatches) or '-'}"
+        )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
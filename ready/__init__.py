@@ -0,0 +1 @@
+VERSION = "1.7.0"
@@ -0,0 +1,134 @@
+"""
+An asyncio counterpart to `ready.thttp.request` for the GET requests that make up a scan.
+
+Responses use the same `Response` namedtuple as `thttp`, so checks can't tell which transport
+fetched them.
+"""
+
+import asyncio
+import gzip
+import json as json_lib
+from http.client import parse_headers
+from http.cookiejar import CookieJar
+from io import BytesIO
+from urllib.parse import urlencode, urljoin, urlsplit
+from urllib.request import Request
+
+from ready import scheduler
+from ready.thttp import JSON_HEADERS, Response
+from ready.tls import get_context
+
+REDIRECT_CODES = (301, 302, 303, 307, 308)
+MAX_REDIRECTS = 10
+
+
+class _CookieResponse:
+    # http.cookiejar only needs the headers from a response
+    def __init__(self, message):
+        self.message = message
+
+    def info(self):
+        return self.message
+
+
+async def _read_body(reader, message, method, status):
+    if method == "HEAD" or status in (204, 304) or 100 <= status < 200:
+        return b""
+
+    if "chunked" in message.get("transfer-encoding", "").lower():
+        chunks = []
+        while True:
+            size = int((await reader.readline()).split(b";")[0].strip() or b"0", 16)
+            if size == 0:
+                # discard any trailers
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                return b"".join(chunks)
+
+            chunks.append(await reader.readexactly(size))
+            await reader.readline()
+
+    if message.get("content-length", "").isdigit():
+        return await reader.readexactly(int(message["content-length"]))
+
+    return await reader.read()
+
+
+async def _send(req, context):
+    url = urlsplit(req.full_url)
+    is_https = url.scheme == "https"
+    port = url.port or (443 if is_https else 80)
+
+    reader, writer = await asyncio.open_connection(
+        url.hostname,
+        port,
+        ssl=context if is_https else None,
+        server_hostname=url.hostname if is_https else None,
+    )
+
+    try:
+        lines = [f"{req.get_method()} {req.selector or '/'} HTTP/1.1", f"Host: {url.netloc.rsplit('@', 1)[-1]}"]
+        lines.extend(f"{k}: {v}" for k, v in req.header_items())
+        lines.append("Connection: close")
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        await writer.drain()
+
+        head = await reader.readuntil(b"\r\n\r\n")
+        status_line, _, raw_headers = head.partition(b"\r\n")
+        status = int(status_line.split()[1])
+        message = parse_headers(BytesIO(raw_headers))
+
+        return status, message, await _read_body(reader, message, req.get_method(), status)
+    finally:
+        writer.close()
+
+
+async def request(
+    url,
+    params={},
+    headers={},
+    method="GET",
+    verify=True,
+    redirect=True,
+    cookiejar=None,
+    timeout=None,
+    rate_key=None,
+):
+    """
+    Returns the same (named)tuple as `ready.thttp.request`. Connection failures raise `OSError`
+    and timeouts raise `asyncio.TimeoutError`. Each request waits for a `ready.scheduler` slot for
+    its host, or for `rate_key` if it's given.
+    """
+    method = method.upper()
+    headers = {k.lower(): v for k, v in headers.items()}  # lowecase headers
+
+    if params:
+        url += "?" + urlencode(params)  # build URL from params
+    if not timeout:
+        timeout = 60
+    if not cookiejar:
+        cookiejar = CookieJar()
+
+    ctx = get_context(verify)
+
+    for _ in range(MAX_REDIRECTS + 1):
+        req = Request(url, headers=headers, method=method)
+        cookiejar.add_cookie_header(req)
+
+        async with scheduler.slot(rate_key or scheduler.host_key(url)):
+            status, message, content = await asyncio.wait_for(_send(req, ctx), timeout)
+        cookiejar.extract_cookies(_CookieResponse(message), req)
+
+        if not redirect or status not in REDIRECT_CODES or "location" not in message:
+            break
+
+        url = urljoin(url, message["location"])
+
+    headers = {k.lower(): v for k, v in message.items()}
+
+    if "gzip" in headers.get("content-encoding", ""):
+        content = gzip.decompress(content)
+
+    json = json_lib.loads(content) if any([x in headers.get("content-type", "").lower() for x in JSON_HEADERS]) else None
+
+    return Response(req, content, json, status, url, headers, cookiejar)
@@ -0,0 +1,441 @@
+"""
+Every check, as (module, check name, result id, description), for `ready --doc` and `ready()`.
+
+Generated from the "# Check: " comments in ready/checks by `python -m ready.checks`. Don't edit it
+by hand.
+"""
+
+CATALOGUE = [
+    (
+        "bad_response",
+        "check_bad_response_cloudflare",
+        "bad_cloudflare",
+        "Response should not contain hints of a Cloudflare captcha page",
+    ),
+    (
+        "bad_response",
+        "check_bad_response_kasada",
+        "bad_kasada",
+        "Response should not contain hints of a Kasada error page",
+    ),
+    (
+        "content",
+        "check_http_response_should_include_content_type",
+        "http_content_type",
+        "Response should include a Content-Type",
+    ),
+    (
+        "content",
+        "check_http_response_should_be_gzipped",
+        "http_gzipped",
+        "Response should be gzipped",
+    ),
+    (
+        "content",
+        "check_http_content_type_header_contains_charset",
+        "http_charset",
+        "Content-Type header should contain charset",
+    ),
+    (
+        "content",
+        "check_http_expires_header_not_used_without_cache_control",
+        "http_expires",
+        "Expires header should not be used without Cache-Control",
+    ),
+    (
+        "content",
+        "check_http_cache_control_is_included",
+        "http_expires",
+        "Cache-Control header should be included in the response",
+    ),
+    (
+        "content",
+        "check_http_p3p_header_is_not_set",
+        "http_p3p",
+        "P3P header is deprecated and should not be returned",
+    ),
+    (
+        "cookies",
+        "check_cookies_should_be_samesite",
+        "cookies_samesite",
+        "Cookies should set the SameSite flag",
+    ),
+    (
+        "cookies",
+        "check_cookies_should_be_secure",
+        "cookies_secure",
+        "Cookies should set the Secure flag",
+    ),
+    (
+        "cookies",
+        "check_cookies_should_be_httponly",
+        "cookies_httponly",
+        "Cookies should set the HttpOnly flag",
+    ),
+    (
+        "corp_coop_coep",
+        "check_cross_origin_resource_policy_should_be_sameorigin",
+        "http_corp",
+        'Cross-Origin-Resource-Policy should be "same-origin"',
+    ),
+    (
+        "corp_coop_coep",
+        "check_cross_origin_opener_policy_should_be_sameorigin",
+        "http_coop",
+        'cross-origin-opener-policy should be "same-origin"',
+    ),
+    (
+        "corp_coop_coep",
+        "check_cross_origin_embedder_policy_should_be_require_corp",
+        "http_coep",
+        'Cross-Origin-Embedder-Policy should be "require-corp"',
+    ),
+    (
+        "csp",
+        "check_csp_should_exist",
+        "csp",
+        "Content-Security-Policy header should exist",
+    ),
+    (
+        "csp",
+        "check_csp_should_start_with_defaultsrc_none",
+        "csp_defaultsrc_none",
+        "Content-Security-Policy header should start with default-src 'none'",
+    ),
+    (
+        "csp",
+        "check_csp_includes_default_or_script_directive",
+        "csp_required_directives",
+        "Content-Security-Policy must include either default-src or script-src",
+    ),
+    (
+        "csp",
+        "check_csp_must_not_include_unsafe_eval",
+        "csp_no_unsafe_inline",
+        "Content-Security-Policy header must not include unsafe-inline",
+    ),
+    (
+        "csp",
+        "check_csp_must_not_include_unsafe_inline",
+        "csp_no_unsafe_inline",
+        "Content-Security-Policy header must not include unsafe-eval",
+    ),
+    (
+        "csp",
+        "check_csp_must_not_include_report_sample",
+        "csp_no_report_sample",
+        "Content-Security-Policy header must not include report-sample",
+    ),
+    (
+        "csp",
+        "check_csp_must_not_include_reporturi",
+        "csp_report_uri",
+        "Content-Security-Policy header must not include report-uri",
+    ),
+    (
+        "csp",
+        "check_csp_should_not_include_reportto",
+        "csp_report_to",
+        "Content-Security-Policy header should not include report-to",
+    ),
+    (
+        "csp",
+        "check_csp_upgrade_insecure_requests",
+        "csp_upgrade_insecure_requests",
+        "Content-Security-Policy header should include upgrade-insecure-requests",
+    ),
+    (
+        "csp",
+        "check_csp_should_only_include_valid_directives",
+        "csp_valid_directives",
+        "Content-Security-Policy header only includes valid directives",
+    ),
+    (
+        "dns",
+        "check_aaaa_record_exists",
+        "dns_aaaa",
+        "An AAAA DNS record exists (IPv6 Support)",
+    ),
+    (
+        "email",
+        "check_spf_record_should_exist",
+        "email_spf",
+        "SPF TXT record should exist",
+    ),
+    (
+        "email",
+        "check_spf_txt_record_should_disallow_all",
+        "email_spf_disallow_all",
+        'SPF TXT record should contain "-all"',
+    ),
+    (
+        "email",
+        "check_spf_dns_record_does_not_exist",
+        "email_spf_dns",
+        "SPF DNS record is deprecated and should not exist",
+    ),
+    (
+        "email",
+        "check_spf_uses_less_than_10_requests",
+        "email_spf_recursion",
+        "SPF includes use less than 10 DNS requests",
+    ),
+    (
+        "email",
+        "check_dmarc_record_should_exist",
+        "email_dmarc_exists",
+        "DMARC record should exist",
+    ),
+    (
+        "email",
+        "check_dmarc_record_should_reject_failures",
+        "email_dmarc_none",
+        "DMARC record should contain p=reject",
+    ),
+    (
+        "email",
+        "check_spf_dash_all",
+        "email_spf_disallow_all_with_empty_mx",
+        'SPF should be "v=spf1 -all" if there are no MX records or MX record is "."',
+    ),
+    (
+        "hsts",
+        "check_hsts_header_should_be_included_in_response",
+        "ssl_hsts",
+        "HSTS Header should be included in response",
+    ),
+    (
+        "hsts",
+        "check_hsts_header_should_have_a_long_max_age",
+        "ssl_hsts_duration",
+        "HSTS Header should have a long max-age",
+    ),
+    (
+        "hsts",
+        "check_hsts_header_should_have_includesubdomains",
+        "ssl_hsts_subdomains",
+        "HSTS Header should have includeSubdomains",
+    ),
+    (
+        "hsts",
+        "check_hsts_header_should_have_preload",
+        "ssl_hsts_preload",
+        "HSTS Header should have preload",
+    ),
+    (
+        "html",
+        "check_permissions_policy_should_exist",
+        "html_permissions_policy",
+        "Permissions-Policy should exist if the response is HTML",
+    ),
+    (
+        "html",
+        "check_frame_ancestors_should_exist",
+        "html_frame_ancestors",
+        "frame-ancestors should be in CSP or X-Frame-Options should exist if the response is HTML",
+    ),
+    (
+        "html",
+        "check_x_content_type_options_should_be_nosniff",
+        "html_x_content_type_options_nosniff",
+        'X-Content-Type-options should be "nosniff"',
+    ),
+    (
+        "html",
+        "check_referrer_policy_should_be_set",
+        "html_referrer_policy",
+        "Referrer-Policy should be set",
+    ),
+    (
+        "html",
+        "check_x_xss_protection_should_not_exist",
+        "html_x_xss_protection_not_set",
+        "X-XSS-Protection header should not exist",
+    ),
+    (
+        "html",
+        "check_html_starts_with_doctype",
+        "html_doctype",
+        'HTML should start with "<!doctype html>"',
+    ),
+    (
+        "html",
+        "check_html_tag_includes_lang",
+        "html_tag_includes_lang",
+        "`<html>` tag should include lang",
+    ),
+    (
+        "html",
+        "check_html_meta_charset",
+        "html_meta_charset",
+        "HTML should include meta charset tag",
+    ),
+    (
+        "html",
+        "check_html_includes_title",
+        "html_includes_title",
+        "HTML should include `<title>`",
+    ),
+    (
+        "html",
+        "check_html_includes_rel_icon",
+        "html_rel_icon",
+        'HTML should include link with rel="icon"',
+    ),
+    (
+        "html",
+        "check_html_should_not_use_schemeless_urls",
+        "html_schemeless",
+        "HTML should not use schemeless urls for links or hrefs",
+    ),
+    (
+        "html",
+        "check_html_should_not_use_unnecessary_entities",
+        "html_unnecessary_entities",
+        "HTML should not use unnecessary HTML entities",
+    ),
+    (
+        "html",
+        "check_html_script_tags_use_sri",
+        "html_sri_js",
+        "All script tags should use subresource integrity",
+    ),
+    (
+        "html",
+        "check_x_dns_prefetch_control_is_off",
+        "html_x_dns_prefetch",
+        "X-DNS-Prefetch-Control should be set to off",
+    ),
+    (
+        "html",
+        "check_cdns_should_not_be_used",
+        "html_cdn_usage",
+        "CDNs should not be used for Javascript or CSS assets",
+    ),
+    (
+        "html",
+        "check_rss_should_return_cors_header",
+        "feeds_cors_enabled",
+        "RSS and JSON feeds should return Access-Control-Allow-Origin header",
+    ),
+    (
+        "html",
+        "check_html_should_not_be_cached_for_more_than_24_hours",
+        "html_cache_duration",
+        "Cache-Control max-age should be <= 86400 for HTML documents",
+    ),
+    (
+        "leaky_headers",
+        "check_should_not_include_leaky_headers",
+        "leaky_headers",
+        "Headers that leak information should not be in the response",
+    ),
+    (
+        "ns",
+        "check_at_least_two_nameservers_configured",
+        "ns_minimum_count",
+        "At least two nameservers should be configured",
+    ),
+    (
+        "redirect",
+        "check_http_to_https_redirect",
+        "redirect_http",
+        "HTTP -> HTTPS redirection occurs",
+    ),
+    (
+        "report_to",
+        "check_report_to_header_must_not_be_included_in_response",
+        "report_to",
+        "Report-To Header must not be included in response",
+    ),
+    (
+        "ssl",
+        "check_ssl_certificate_should_be_trusted",
+        "ssl_trusted",
+        "SSL certificate should be trusted",
+    ),
+    (
+        "ssl",
+        "check_ssl_expiry_should_be_less_than_one_year",
+        "ssl_expiry_max",
+        "SSL expiry should be less than one year",
+    ),
+    (
+        "ssl",
+        "check_ssl_expiry_should_be_greater_than_five_days",
+        "ssl_expiry_min",
+        "SSL expiry should be greater than five days",
+    ),
+    (
+        "ssl",
+        "check_ssl_connection_fails_with_tls_1_1",
+        "ssl_tls_1_1",
+        "SSL connection fails when using TLS 1.1",
+    ),
+    (
+        "ssl",
+        "check_ssl_connection_fails_with_tls_1_0",
+        "ssl_tls_1_0",
+        "SSL connection fails when using TLS 1.0",
+    ),
+    (
+        "ssl",
+        "check_ssl_connection_succeeds_with_tls_1_3",
+        "ssl_tls_1_3",
+        "SSL connection succeeds when using TLS 1.3",
+    ),
+    (
+        "ssl",
+        "check_dns_caa_record_should_exist",
+        "ssl_dns_caa",
+        "DNS CAA should be enabled",
+    ),
+    (
+        "ssl",
+        "check_dns_caa_record_should_include_accounturi",
+        "ssl_dns_caa_accounturi",
+        "DNS CAA should include accounturi",
+    ),
+    (
+        "ssl",
+        "check_dns_caa_record_should_include_validationmethods",
+        "ssl_dns_caa_validationmethods",
+        "DNS CAA should include validationmethods",
+    ),
+    (
+        "status",
+        "check_http_response_should_be_200",
+        "https_status",
+        "Response should be a 200 (after redirects)",
+    ),
+    (
+        "swagger",
+        "check_swagger_should_not_return_200",
+        "cors_header_exists",
+        "Swagger URLs should not return 200 (requires --fuzz)",
+    ),
+    (
+        "well_known",
+        "check_robots_txt_exists",
+        "wellknown_robots",
+        "Robots.txt exists and is a text file",
+    ),
+    (
+        "well_known",
+        "check_security_txt_exists",
+        "wellknown_security",
+        "Security.txt exists and is a text file that contains required attributes",
+    ),
+    (
+        "well_known",
+        "check_security_txt_not_expired",
+        "wellknown_security_not_expired",
+        "Security.txt has an expiry date in the future",
+    ),
+    (
+        "well_known",
+        "check_favicon_is_served",
+        "wellknown_favicon",
+        "Favicon is served at /favicon.ico",
+    ),
+]
@@ -0,0 +1,108 @@
+"""
+A checkpoint for `--input` scans, so that a long scan that's stopped can be resumed.
+
+The checkpoint is a journal of the lines written to the output, one report per domain. Each line is
+appended with a single write once it has been written to the output, so a scan that's killed leaves
+at most one line cut short, which is dropped when the checkpoint is loaded. The file is synced to disk
+at most once every SYNC_INTERVAL seconds, so checkpointing costs one write per domain.
+
+    ready --input=domains.txt --checkpoint=scan.checkpoint > results.ndjson
+    ready --input=domains.txt --checkpoint=scan.checkpoint --resume >> results.ndjson
+
+A domain whose line was written to the output just before the scan stopped can be written again
+when it's resumed. Domains whose scans failed ({"domain", "error"} lines) aren't finished, so they're
+scanned again too.
+"""
+
+import json
+import os
+import time
+
+# Seconds between syncs of the checkpoint to disk
+SYNC_INTERVAL = 1.0
+
+
+class Checkpoint:
+    """
+    The journal at `path`. With `resume`, `finished` holds the domains it already has reports (not
+    errors) for and new reports are appended, otherwise it starts out empty.
+    """
+
+    def __init__(self, path, resume=False):
+        self.path = path
+        self.finished = self._load() if resume and os.path.exists(path) else set()
+        self.file = open(path, "ab" if resume else "wb", buffering=0)
+        self.synced = time.monotonic()
+
+    def _load(self):
+        finished = set()
+        complete = 0
+
+        with open(self.path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # the line that was being written when the scan stopped
+                    break
+                complete += len(line)
+
+                try:
+                    report = json.loads(line)
+                    if "error" not in report:
+                        finished.add(report["domain"])
+                except (ValueError, KeyError, TypeError):
+                    # a corrupt line, whose domain is scanned again
+                    continue
+
+        # drop the torn line, so new lines start after the last complete one
+        if complete < os.path.getsize(self.path):
+            os.truncate(self.path, complete)
+        return finished
+
+    def pending(self, domains):
+        """
+        Yields the `domains` that aren't finished.
+        """
+        for domain in domains:
+            if domain not in self.finished:
+                yield domain
+
+    def record(self, text):
+        """
+        Appends `text` (complete lines of JSON reports) to the journal.
+        """
+        self.file.write(text.encode())
+
+        if time.monotonic() - self.synced >= SYNC_INTERVAL:
+            os.fsync(self.file.fileno())
+            self.synced = time.monotonic()
+
+    def close(self):
+        os.fsync(self.file.fileno())
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class CheckpointedOutput:
+    """
+    Writes lines to `output`, and records them in the `checkpoint` once they've been flushed.
+    """
+
+    def __init__(self, output, checkpoint):
+        self.output = output
+        self.checkpoint = checkpoint
+
+    def write(self, text):
+        self.output.write(text)
+        self.output.flush()
+        self.checkpoint.record(text)
+
+    def writelines(self, lines):
+        self.write("".join(lines))
+
+    def flush(self):
+        self.output.flush()
@@ -0,0 +1,67 @@
+import ast
+
+
+def requires(*keys, optional=()):
+    """
+    Declares the keys of the responses dict that a check reads. `keys` must be present for the check
+    to run, `optional` keys are used if they were fetched (like the `_fld` responses).
+
+    `ready()` only fetches the responses that the selected checks require, and skips checks whose
+    required responses weren't fetched.
+    """
+
+    def decorator(check):
+        check.requires = tuple(keys)
+        check.optional = tuple(optional)
+        return check
+
+    return decorator
+
+
+def _result_ids(source):
+    # the id that each function reports its results under, the third argument of its result() calls
+    ids = {}
+
+    for function in ast.parse(source).body:
+        if not isinstance(function, ast.FunctionDef):
+            continue
+
+        for node in ast.walk(function):
+            if isinstance(node, ast.Call) and getattr(node.func, "id", None) == "result" and len(node.args) > 2:
+                if isinstance(node.args[2], ast.Constant):
+                    ids[function.name] = node.args[2].value
+                    break
+
+    return ids
+
+
+def build_catalogue():
+    """
+    Returns (module, check name, result id, description) for every check in the package, from the
+    "# Check: " comment above each one and the id it passes to `result()`.
+
+    `ready --doc` prints a copy of this that's kept in `ready/catalogue.py`, so that it doesn't have
+    to read the check modules. Regenerate it with `python -m ready.checks` after adding or changing
+    a check.
+    """
+    from importlib import resources
+
+    catalogue = []
+
+    for f in sorted(resources.files(__name__).iterdir(), key=lambda f: f.name):
+        if not f.name.endswith(".py") or f.name.startswith("__"):
+            continue
+
+        source = f.read_text()
+        ids = _result_ids(source)
+
+        description = None
+        for line in source.splitlines():
+            if line.startswith("# Check: "):
+                description = line.removeprefix("# Check: ").strip()
+            elif line.startswith("def ") and description:
+                name = line[4:].split("(")[0]
+                catalogue.append((f.name.removesuffix(".py"), name, ids.get(name), description))
+                description = None
+
+    return catalogue
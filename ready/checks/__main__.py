@@ -0,0 +1,30 @@
+"""
+Regenerates ready/catalogue.py from the check modules: `python -m ready.checks`
+"""
+
+import json
+from pathlib import Path
+
+from ready.checks import build_catalogue
+
+HEADER = '''"""
+Every check, as (module, check name, result id, description), for `ready --doc` and `ready()`.
+
+Generated from the "# Check: " comments in ready/checks by `python -m ready.checks`. Don't edit it
+by hand.
+"""
+
+'''
+
+
+def literal(value):
+    # the quotes black prefers, so that the generated file passes `black --check`
+    return repr(value) if '"' in value else json.dumps(value, ensure_ascii=False)
+
+
+path = Path(__file__).parent.parent / "catalogue.py"
+entries = "".join(
+    "    (\n" + "".join(f"        {literal(value)},\n" for value in entry) + "    ),\n" for entry in build_catalogue()
+)
+path.write_text(HEADER + "CATALOGUE = [\n" + entries + "]\n")
+print(f"Wrote {path}")
@@ -1,12 +1,15 @@
 import re
 
+from ready.checks import requires
+from ready.context import ScanContext
 from ready.result import result
 
 
 # Check: Response should not contain hints of a Cloudflare captcha page
+@requires("response")
 def check_bad_response_cloudflare(responses, **kwargs):
     return result(
-        'div id="cf-content"' not in responses["response"].content.decode(errors="ignore"),
+        'div id="cf-content"' not in ScanContext.of(responses).text(),
         f"Response should not contain hints of a Cloudflare captcha page",
         "bad_cloudflare",
         warn_on_fail=True,
@@ -15,12 +18,13 @@ def check_bad_response_cloudflare(responses, **kwargs):
 
 
 # Check: Response should not contain hints of a Kasada error page
+@requires("response")
 def check_bad_response_kasada(responses, **kwargs):
     uuid_pattern = r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}"
     failing = False
 
     if responses["response"].status == 429:
-        if re.search(uuid_pattern + r"/" + uuid_pattern, responses["response"].content.decode(errors="ignore")):
+        if re.search(uuid_pattern + r"/" + uuid_pattern, ScanContext.of(responses).text()):
             failing = True
 
     return result(
@@ -1,7 +1,9 @@
+from ready.checks import requires
 from ready.result import result
 
 
 # Check: Response should include a Content-Type
+@requires("response")
 def check_http_response_should_include_content_type(responses, **kwargs):
     return result(
         responses["response"].headers.get("content-type") != None,
@@ -12,6 +14,7 @@ def check_http_response_should_include_content_type(responses, **kwargs):
 
 
 # Check: Response should be gzipped
+@requires("response")
 def check_http_response_should_be_gzipped(responses, **kwargs):
     return result(
         "gzip" in responses["response"].headers.get("content-encoding", ""),
@@ -22,6 +25,7 @@ def check_http_response_should_be_gzipped(responses, **kwargs):
 
 
 # Check: Content-Type header should contain charset
+@requires("response")
 def check_http_content_type_header_contains_charset(responses, **kwargs):
     return result(
         "charset=" in responses["response"].headers.get("content-type", ""),
@@ -32,6 +36,7 @@ def check_http_content_type_header_contains_charset(responses, **kwargs):
 
 
 # Check: Expires header should not be used without Cache-Control
+@requires("response")
 def check_http_expires_header_not_used_without_cache_control(responses, **kwargs):
     # see: https://github.com/sesh/ready/issues/24
     # nginx sets Cache-Control and Expires on documents
@@ -56,6 +61,7 @@ def check_http_expires_header_not_used_without_cache_control(responses, **kwargs
 
 
 # Check: Cache-Control header should be included in the response
+@requires("response")
 def check_http_cache_control_is_included(responses, **kwargs):
     return result(
         "cache-control" in responses["response"].headers,
@@ -66,6 +72,7 @@ def check_http_cache_control_is_included(responses, **kwargs):
 
 
 # Check: P3P header is deprecated and should not be returned
+@requires("response")
 def check_http_p3p_header_is_not_set(responses, **kwargs):
     return result(
         "p3p" not in responses["response"].headers,
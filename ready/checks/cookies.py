@@ -1,7 +1,9 @@
+from ready.checks import requires
 from ready.result import result
 
 
 # Check: Cookies should set the SameSite flag
+@requires("response")
 def check_cookies_should_be_samesite(responses, **kwargs):
     cookies = responses["response"].headers.get("set-cookie", "")
     cookie_note = cookies or "no cookie set"
@@ -15,6 +17,7 @@ def check_cookies_should_be_samesite(responses, **kwargs):
 
 
 # Check: Cookies should set the Secure flag
+@requires("response")
 def check_cookies_should_be_secure(responses, **kwargs):
     cookies = responses["response"].headers.get("set-cookie", "")
     cookie_note = cookies or "no cookie set"
@@ -28,6 +31,7 @@ def check_cookies_should_be_secure(responses, **kwargs):
 
 
 # Check: Cookies should set the HttpOnly flag
+@requires("response")
 def check_cookies_should_be_httponly(responses, **kwargs):
     cookies = responses["response"].headers.get("set-cookie", "")
     cookie_note = cookies or "no cookie set"
@@ -1,7 +1,9 @@
+from ready.checks import requires
 from ready.result import result
 
 
 # Check: Cross-Origin-Resource-Policy should be "same-origin"
+@requires("response")
 def check_cross_origin_resource_policy_should_be_sameorigin(responses, **kwargs):
     return result(
         responses["response"].headers.get("cross-origin-resource-policy", "") == "same-origin",
@@ -13,6 +15,7 @@ def check_cross_origin_resource_policy_should_be_sameorigin(responses, **kwargs)
 
 
 # Check: cross-origin-opener-policy should be "same-origin"
+@requires("response")
 def check_cross_origin_opener_policy_should_be_sameorigin(responses, **kwargs):
     return result(
         responses["response"].headers.get("cross-origin-opener-policy", "") == "same-origin",
@@ -24,6 +27,7 @@ def check_cross_origin_opener_policy_should_be_sameorigin(responses, **kwargs):
 
 
 # Check: Cross-Origin-Embedder-Policy should be "require-corp"
+@requires("response")
 def check_cross_origin_embedder_policy_should_be_require_corp(responses, **kwargs):
     return result(
         responses["response"].headers.get("cross-origin-embedder-policy", "") == "require-corp",
@@ -1,27 +1,72 @@
+from ready.checks import requires
+from ready.context import ScanContext
+from ready.csp import parse_csp
 from ready.result import result
 
-USE_BS4 = True
 
-try:
-    from bs4 import BeautifulSoup
-except ImportError:  # pragma: no cover
-    USE_BS4 = False
+def _meta_policies(document):
+    return [m.get("content", "") for m in document.meta if m.get("http-equiv", "").lower() == "content-security-policy"]
 
 
-def extract_csp(response):
+def extract_csp(response, document=None):
     if "content-security-policy" in response.headers:
         return response.headers["content-security-policy"].lower()
 
-    if USE_BS4:
-        soup = BeautifulSoup(response.content, "html.parser")
-        meta_tags = soup.find_all("meta")
-        for t in meta_tags:
-            if t.attrs.get("http-equiv", "").lower() == "content-security-policy":
-                return t.attrs.get("content", "").lower()
-    else:  # pragma: no cover
-        print("No Content-Security-Policy header, and beautifulsoup4 is not installed to inspect HTML")
+    if document is None:
+        document = ScanContext({"response": response}).document()
 
-    return None
+    meta = _meta_policies(document)
+    return meta[0].lower() if meta else None
+
+
+def get_policy(responses):
+    """
+    Returns the `ready.csp.ContentSecurityPolicy` for the page response, made of the header and
+    any `<meta http-equiv>` policies, which is only parsed once per scan.
+    """
+    context = ScanContext.of(responses)
+
+    def policy(response):
+        header = response.headers.get("content-security-policy")
+        return parse_csp([header] if header is not None else [], _meta_policies(context.document()))
+
+    return context.view("csp_policy", "response", policy)
+
+
+VALID_DIRECTIVES = frozenset(
+    [
+        "base-uri",
+        "block-all-mixed-content",
+        "child-src",
+        "connect-src",
+        "default-src",
+        "font-src",
+        "form-action",
+        "frame-ancestors",
+        "frame-src",
+        "img-src",
+        "manifest-src",
+        "media-src",
+        "navigate-to",
+        "object-src",
+        "plugin-types",
+        "prefetch-src",
+        "report-to",
+        "report-uri",
+        "require-sri-for",
+        "require-trusted-types-for",
+        "sandbox",
+        "script-src-attr",
+        "script-src-elem",
+        "script-src",
+        "style-src-attr",
+        "style-src-elem",
+        "style-src",
+        "trusted-types",
+        "upgrade-insecure-requests",
+        "worker-src",
+    ]
+)
 
 
 def _trunc(s, max_length=200):
@@ -35,36 +80,41 @@ def _trunc(s, max_length=200):
 
 
 # Check: Content-Security-Policy header should exist
+@requires("response")
 def check_csp_should_exist(responses, **kwargs):
-    csp = extract_csp(responses["response"])
+    policy = get_policy(responses)
 
     return result(
-        csp != None and csp != "",
-        f"Content-Security-Policy header should exist ({_trunc(csp)})",
+        bool(policy),
+        f"Content-Security-Policy header should exist ({_trunc(policy.text)})",
         "csp",
         **kwargs,
     )
 
 
 # Check: Content-Security-Policy header should start with default-src 'none'
+@requires("response")
 def check_csp_should_start_with_defaultsrc_none(responses, **kwargs):
-    csp = extract_csp(responses["response"])
+    policy = get_policy(responses)
+    first = policy.policies[0].directives if policy else {}
 
     return result(
-        csp != None and csp.startswith("default-src 'none'"),
-        f"Content-Security-Policy header should start with default-src 'none' ({_trunc(csp)})",
+        next(iter(first), None) == "default-src" and "'none'" in first["default-src"],
+        f"Content-Security-Policy header should start with default-src 'none' ({_trunc(policy.text)})",
         "csp_defaultsrc_none",
         **kwargs,
     )
 
 
 # Check: Content-Security-Policy must include either default-src or script-src
+@requires("response")
 def check_csp_includes_default_or_script_directive(responses, **kwargs):
-    csp = extract_csp(responses["response"])
+    policy = get_policy(responses)
 
     return result(
-        csp != None and ("default-src" in csp or "script-src" in csp),
-        f"Content-Security-Policy must include either default-src or script-src ({_trunc(csp)})",
+        # either kind of script (including a policy with only script-src-elem or script-src-attr)
+        policy.restricts("script-src-elem") or policy.restricts("script-src-attr"),
+        f"Content-Security-Policy must include either default-src or script-src ({_trunc(policy.text)})",
         "csp_required_directives",
         **kwargs,
     )
@@ -72,36 +122,39 @@ def check_csp_includes_default_or_script_directive(responses, **kwargs):
 
 # Check: Content-Security-Policy header must not include unsafe-inline
 # NOTE: this checks everywhere, not just in script-src
+@requires("response")
 def check_csp_must_not_include_unsafe_eval(responses, **kwargs):
-    csp = extract_csp(responses["response"])
+    policy = get_policy(responses)
 
     return result(
-        csp != None and "unsafe-eval" not in csp,
-        f"Content-Security-Policy header must not include unsafe-eval ({_trunc(csp)})",
+        bool(policy) and "unsafe-eval" not in policy.tokens,
+        f"Content-Security-Policy header must not include unsafe-eval ({_trunc(policy.text)})",
         "csp_no_unsafe_inline",
         **kwargs,
     )
 
 
 # Check: Content-Security-Policy header must not include unsafe-eval
+@requires("response")
 def check_csp_must_not_include_unsafe_inline(responses, **kwargs):
-    csp = extract_csp(responses["response"])
+    policy = get_policy(responses)
 
     return result(
-        csp != None and "unsafe-inline" not in csp,
-        f"Content-Security-Policy header must not include unsafe-inline ({_trunc(csp)})",
+        bool(policy) and "unsafe-inline" not in policy.tokens,
+        f"Content-Security-Policy header must not include unsafe-inline ({_trunc(policy.text)})",
         "csp_no_unsafe_inline",
         **kwargs,
     )
 
 
 # Check: Content-Security-Policy header must not include report-sample
+@requires("response")
 def check_csp_must_not_include_report_sample(responses, **kwargs):
-    csp = extract_csp(responses["response"])
+    policy = get_policy(responses)
 
     return result(
-        csp != None and "script-sample" not in csp,
-        f"Content-Security-Policy header must not include report-sample ({_trunc(csp)})",
+        bool(policy) and "script-sample" not in policy.tokens,
+        f"Content-Security-Policy header must not include report-sample ({_trunc(policy.text)})",
         "csp_no_report_sample",
         **kwargs,
     )
@@ -109,12 +162,13 @@ def check_csp_must_not_include_report_sample(responses, **kwargs):
 
 # Check: Content-Security-Policy header must not include report-uri
 # NOTE: report-uri is being replaced by report-to but browser support is spotty so report-uri should still exist
+@requires("response")
 def check_csp_must_not_include_reporturi(responses, **kwargs):
-    csp = extract_csp(responses["response"])
+    policy = get_policy(responses)
 
     return result(
-        csp is None or (("report-uri https://" not in csp)),
-        f"Content-Security-Policy header must not include report-uri ({_trunc(csp)})",
+        not any(uri.startswith("https://") for uri in policy.get("report-uri")),
+        f"Content-Security-Policy header must not include report-uri ({_trunc(policy.text)})",
         "csp_report_uri",
         warn_on_fail=False,
         **kwargs,
@@ -122,12 +176,13 @@ def check_csp_must_not_include_reporturi(responses, **kwargs):
 
 
 # Check: Content-Security-Policy header should not include report-to
+@requires("response")
 def check_csp_should_not_include_reportto(responses, **kwargs):
-    csp = extract_csp(responses["response"])
+    policy = get_policy(responses)
 
     return result(
-        csp is None or "report-to" not in csp,
-        f"Content-Security-Policy header should not include report-to ({_trunc(csp)})",
+        "report-to" not in policy,
+        f"Content-Security-Policy header should not include report-to ({_trunc(policy.text)})",
         "csp_report_to",
         warn_on_fail=True,
         **kwargs,
@@ -135,68 +190,26 @@ def check_csp_should_not_include_reportto(responses, **kwargs):
 
 
 # Check: Content-Security-Policy header should include upgrade-insecure-requests
+@requires("response")
 def check_csp_upgrade_insecure_requests(responses, **kwargs):
-    csp = extract_csp(responses["response"])
+    policy = get_policy(responses)
 
     return result(
-        csp != None and "upgrade-insecure-requests" in csp,
-        f"Content-Security-Policy header should include upgrade-insecure-requests ({_trunc(csp)})",
+        "upgrade-insecure-requests" in policy,
+        f"Content-Security-Policy header should include upgrade-insecure-requests ({_trunc(policy.text)})",
         "csp_upgrade_insecure_requests",
         **kwargs,
     )
 
 
 # Check: Content-Security-Policy header only includes valid directives
+@requires("response")
 def check_csp_should_only_include_valid_directives(responses, **kwargs):
-    csp = extract_csp(responses["response"])
-
-    directives = []
-
-    if csp:
-        for directive in csp.split(";"):
-            directive = directive.strip()
-
-            if " " in directive:
-                directives.append(directive.split()[0])
-            else:
-                directives.append(directive.strip())
-
-    valid_directives = [
-        "base-uri",
-        "block-all-mixed-content",
-        "child-src",
-        "connect-src",
-        "default-src",
-        "font-src",
-        "form-action",
-        "frame-ancestors",
-        "frame-src",
-        "img-src",
-        "manifest-src",
-        "media-src",
-        "navigate-to",
-        "object-src",
-        "plugin-types",
-        "prefetch-src",
-        "report-to",
-        "report-uri",
-        "require-sri-for",
-        "require-trusted-types-for",
-        "sandbox",
-        "script-src-attr",
-        "script-src-elem",
-        "script-src",
-        "style-src-attr",
-        "style-src-elem",
-        "style-src",
-        "trusted-types",
-        "upgrade-insecure-requests",
-        "worker-src",
-    ]
+    policy = get_policy(responses)
 
     return result(
-        csp != None and all([x in valid_directives for x in directives]),
-        f"Content-Security-Policy header only includes valid directives ({directives})",
+        bool(policy) and VALID_DIRECTIVES.issuperset(policy.names),
+        f"Content-Security-Policy header only includes valid directives ({policy.names})",
         "csp_valid_directives",
         warn_on_fail=False,
         **kwargs,
@@ -1,9 +1,11 @@
 import json
 
+from ready.checks import requires
 from ready.result import result
 
 
 # Check: An AAAA DNS record exists (IPv6 Support)
+@requires("dns_aaaa_response")
 def check_aaaa_record_exists(responses, **kwargs):
     records = [x["data"] for x in responses["dns_aaaa_response"].json.get("Answer", [])]
 
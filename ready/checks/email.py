@@ -1,11 +1,23 @@
-import json
 import re
+import time
+from concurrent.futures import wait
 
-from ready import thttp
+from ready.checks import requires
+from ready.resolver import LookupExecutor, get_client
 from ready.result import result
 
+# Maximum number of SPF include lookups in flight at once, the depth of includes that are followed
+# and the number of seconds to spend on the whole tree
+SPF_WORKERS = 8
+SPF_MAX_DEPTH = 13
+SPF_TIMEOUT = 10
+
+# SPF terms that make DNS lookups and count towards the limit of 10 (RFC 7208 §4.6.4)
+SPF_LOOKUP_TERM_RE = re.compile(r"(?:include|a|mx|ptr|exists)(?:$|[:/])|redirect=", re.IGNORECASE)
+
 
 # Check: SPF TXT record should exist
+@requires("dns_txt_response", optional=["dns_txt_response_fld"])
 def check_spf_record_should_exist(responses, **kwargs):
     records = [
         r["data"]
@@ -29,6 +41,7 @@ def check_spf_record_should_exist(responses, **kwargs):
 
 
 # Check: SPF TXT record should contain "-all"
+@requires("dns_txt_response", optional=["dns_txt_response_fld"])
 def check_spf_txt_record_should_disallow_all(responses, **kwargs):
     records = [
         r["data"]
@@ -52,6 +65,7 @@ def check_spf_txt_record_should_disallow_all(responses, **kwargs):
 
 
 # Check: SPF DNS record is deprecated and should not exist
+@requires("dns_spf_response", optional=["dns_spf_response_fld"])
 def check_spf_dns_record_does_not_exist(responses, **kwargs):
     records = [r["data"] for r in responses["dns_spf_response"].json.get("Answer", []) if "data" in r and r["type"] == 99]
 
@@ -66,38 +80,97 @@ def check_spf_dns_record_does_not_exist(responses, **kwargs):
     )
 
 
-def _spf_for_domain(domain, depth=0, lookups=[], dns_resolver=None):
-    if domain in lookups:
-        return []
-
-    response = thttp.request(f"{dns_resolver}?name={domain}&type=TXT")
-    lookups.append(domain)
-
-    j = json.loads(response.content)
+def _spf_records(answer):
+    return [r["data"] for r in answer.get("Answer", []) if "data" in r and r["data"].strip('"').strip("'").startswith("v=spf")]
 
-    spf_records = [(domain, x["data"]) for x in j.get("Answer", []) if x["data"].strip('"').strip("'").startswith("v=spf")]
 
-    results = [x for x in spf_records]
+def _spf_targets(record):
+    return re.findall(r"include\:([^\s]+)", record) + re.findall(r"redirect\=([^\s]+)", record)
 
-    for _, record in spf_records:
-        depth += 1
-        if depth > 13:
-            return results
 
-        matches = re.findall(r"include\:([^\s]+)", record)
+def _spf_lookup_terms(record):
+    terms = (term.strip("\"'").lstrip("+-~?") for term in record.split())
+    return sum(1 for term in terms if SPF_LOOKUP_TERM_RE.match(term))
 
-        for d in matches:
-            results.extend(_spf_for_domain(d, depth, lookups, dns_resolver))
 
-        matches = re.findall(r"redirect\=([^\s]+)", record)
+def _spf_lookup(dns, domain):
+    try:
+        return _spf_records(dns.query(domain, "TXT").json or {})
+    except Exception:
+        # any failure (a timeout, a bad answer, an HTTP error from the resolver) counts as no record
+        return []
 
-        for d in matches:
-            results.extend(_spf_for_domain(d, depth, lookups, dns_resolver))
 
-    return results
+def _spf_lookup_tree(records, dns_resolver=None):
+    """
+    Looks up the domains in the `include:` and `redirect=` terms of the SPF `records`, then the
+    domains included by those, and so on. Returns {domain: {"depth", "records", "includes"}} with an
+    entry for every domain that was looked up.
+
+    Each level of the tree is looked up concurrently and includes that are shared (like
+    _spf.google.com) are only looked up once. Lookups that haven't finished after SPF_TIMEOUT
+    seconds are treated as having no SPF record.
+    """
+    dns = get_client(dns_resolver)
+    deadline = time.monotonic() + SPF_TIMEOUT
+    tree = {}
+
+    level = list(dict.fromkeys(d for r in records for d in _spf_targets(r)))
+    executor = LookupExecutor(max_workers=SPF_WORKERS)
+    submitted = []
+
+    try:
+        for depth in range(1, SPF_MAX_DEPTH + 1):
+            level = [d for d in level if d not in tree]
+            if not level:
+                break
+
+            futures = {d: executor.submit(_spf_lookup, dns, d) for d in level}
+            submitted.extend(futures.values())
+            done, not_done = wait(futures.values(), timeout=max(deadline - time.monotonic(), 0))
+
+            level = []
+            for d, future in futures.items():
+                found = future.result() if future in done else []
+                includes = list(dict.fromkeys(t for r in found for t in _spf_targets(r)))
+
+                tree[d] = {"depth": depth, "records": found, "includes": includes}
+                level.extend(includes)
+
+            if not_done:
+                # out of time, so the rest of the tree isn't looked up
+                break
+    finally:
+        # lookups that missed the deadline, at any level, finish in the background without holding up
+        # the process, and the queued ones are never made
+        for future in submitted:
+            future.cancel()
+        executor.shutdown()
+
+    return tree
+
+
+def _spf_lookup_count(records, tree, counted=None, path=()):
+    """
+    Returns the number of DNS lookups that evaluating the SPF `records` takes (RFC 7208 §4.6.4): one
+    for every include, a, mx, ptr and exists mechanism and redirect= modifier, and the lookups of the
+    records that includes and redirects point to, counted again each time a domain is included.
+    Loops are only followed once.
+    """
+    counted = {} if counted is None else counted
+    count = sum(_spf_lookup_terms(r) for r in records)
+
+    for target in (t for r in records for t in _spf_targets(r)):
+        if target in tree and target not in path:
+            if target not in counted:
+                counted[target] = _spf_lookup_count(tree[target]["records"], tree, counted, path + (target,))
+            count += counted[target]
+
+    return count
 
 
 # Check: SPF includes use less than 10 DNS requests
+@requires("dns_txt_response", optional=["dns_txt_response_fld"])
 def check_spf_uses_less_than_10_requests(responses, **kwargs):
     records = [
         r["data"]
@@ -112,27 +185,19 @@ def check_spf_uses_less_than_10_requests(responses, **kwargs):
             if "data" in r and r["data"].strip('"').strip("'").startswith("v=spf")
         ]
 
-    additional_lookups = []
-    for record in records:
-        matches = re.findall(r"include\:([^\s]+)", record)
-
-        for d in matches:
-            additional_lookups.extend(_spf_for_domain(d, dns_resolver=kwargs["dns_resolver"]))
-
-        matches = re.findall(r"redirect\=([^\s]+)", record)
-
-        for d in matches:
-            additional_lookups.extend(_spf_for_domain(d, dns_resolver=kwargs["dns_resolver"]))
+    tree = _spf_lookup_tree(records, dns_resolver=kwargs["dns_resolver"])
+    lookups = _spf_lookup_count(records, tree)
 
     return result(
-        len(additional_lookups) <= 10,
-        f"SPF includes use less than 10 DNS requests ({len(additional_lookups)})",
+        lookups <= 10,
+        f"SPF includes use less than 10 DNS requests ({lookups})",
         "email_spf_recursion",
         **kwargs,
     )
 
 
 # Check: DMARC record should exist
+@requires("dns_dmarc_response", optional=["dns_dmarc_response_fld"])
 def check_dmarc_record_should_exist(responses, **kwargs):
     records = [r["data"] for r in responses["dns_dmarc_response"].json.get("Answer", []) if "data" in r]
 
@@ -148,6 +213,7 @@ def check_dmarc_record_should_exist(responses, **kwargs):
 
 
 # Check: DMARC record should contain p=reject
+@requires("dns_dmarc_response", optional=["dns_dmarc_response_fld"])
 def check_dmarc_record_should_reject_failures(responses, **kwargs):
     records = [r["data"] for r in responses["dns_dmarc_response"].json.get("Answer", []) if "data" in r]
 
@@ -169,6 +235,7 @@ def check_dmarc_record_should_reject_failures(responses, **kwargs):
 
 
 # Check: SPF should be "v=spf1 -all" if there are no MX records or MX record is "."
+@requires("dns_mx_response", "dns_txt_response", optional=["dns_mx_response_fld"])
 def check_spf_dash_all(responses, **kwargs):
     # return none if there is an mx record
     mx_records = []
@@ -1,9 +1,11 @@
 import re
 
+from ready.checks import requires
 from ready.result import result
 
 
 # Check: HSTS Header should be included in response
+@requires("response")
 def check_hsts_header_should_be_included_in_response(responses, **kwargs):
     return result(
         responses["response"].headers.get("strict-transport-security") != None,
@@ -14,6 +16,7 @@ def check_hsts_header_should_be_included_in_response(responses, **kwargs):
 
 
 # Check: HSTS Header should have a long max-age
+@requires("response")
 def check_hsts_header_should_have_a_long_max_age(responses, **kwargs):
     try:
         hsts = responses["response"].headers.get("strict-transport-security", "")
@@ -38,6 +41,7 @@ def check_hsts_header_should_have_a_long_max_age(responses, **kwargs):
 
 
 # Check: HSTS Header should have includeSubdomains
+@requires("response", optional=["response_fld"])
 def check_hsts_header_should_have_includesubdomains(responses, **kwargs):
     hsts = responses["response"].headers.get("strict-transport-security", "")
 
@@ -55,6 +59,7 @@ def check_hsts_header_should_have_includesubdomains(responses, **kwargs):
 
 
 # Check: HSTS Header should have preload
+@requires("response", optional=["response_fld"])
 def check_hsts_header_should_have_preload(responses, **kwargs):
     hsts = responses["response"].headers.get("strict-transport-security", "")
 
@@ -2,18 +2,14 @@ import re
 from urllib.parse import urljoin
 
 from ready import thttp
-from ready.checks.csp import extract_csp
+from ready.checks import requires
+from ready.checks.csp import get_policy
+from ready.context import ScanContext
 from ready.result import result
 
-USE_BS4 = True
-
-try:
-    from bs4 import BeautifulSoup
-except ImportError:  # pragma: no cover
-    USE_BS4 = False
-
 
 # Check: Permissions-Policy should exist if the response is HTML
+@requires("response")
 def check_permissions_policy_should_exist(responses, **kwargs):
     return result(
         responses["response"].headers.get("permissions-policy") != None,
@@ -24,18 +20,20 @@ def check_permissions_policy_should_exist(responses, **kwargs):
 
 
 # Check: frame-ancestors should be in CSP or X-Frame-Options should exist if the response is HTML
+@requires("response")
 def check_frame_ancestors_should_exist(responses, **kwargs):
-    csp = extract_csp(responses["response"])
+    policy = get_policy(responses)
 
     return result(
-        responses["response"].headers.get("x-frame-options") != None or (csp != None and "frame-ancestors" in csp),
-        f"frame-ancestors should be in CSP or X-Frame-Options should exist if the response is HTML (X-Frame-Options: {responses['response'].headers.get('x-frame-options')}, CSP: {csp})",
+        responses["response"].headers.get("x-frame-options") != None or "frame-ancestors" in policy,
+        f"frame-ancestors should be in CSP or X-Frame-Options should exist if the response is HTML (X-Frame-Options: {responses['response'].headers.get('x-frame-options')}, CSP: {policy.text or None})",
         "html_frame_ancestors",
         **kwargs,
     )
 
 
 # Check: X-Content-Type-options should be "nosniff"
+@requires("response")
 def check_x_content_type_options_should_be_nosniff(responses, **kwargs):
     return result(
         responses["response"].headers.get("x-content-type-options", "") == "nosniff",
@@ -46,6 +44,7 @@ def check_x_content_type_options_should_be_nosniff(responses, **kwargs):
 
 
 # Check: Referrer-Policy should be set
+@requires("response")
 def check_referrer_policy_should_be_set(responses, **kwargs):
     return result(
         responses["response"].headers.get("referrer-policy") != None,
@@ -56,6 +55,7 @@ def check_referrer_policy_should_be_set(responses, **kwargs):
 
 
 # Check: X-XSS-Protection header should not exist
+@requires("response")
 def check_x_xss_protection_should_not_exist(responses, **kwargs):
     return result(
         "x-xss-protection" not in responses["response"].headers,
@@ -67,9 +67,10 @@ def check_x_xss_protection_should_not_exist(responses, **kwargs):
 
 
 # Check: HTML should start with "<!doctype html>"
+@requires("response")
 def check_html_starts_with_doctype(responses, **kwargs):
     return result(
-        responses["response"].content.lower().strip().startswith(b"<!doctype html>"),
+        ScanContext.of(responses).document().starts_with_doctype,
         f'HTML should start with "<!doctype html>"',
         "html_doctype",
         **kwargs,
@@ -77,14 +78,13 @@ def check_html_starts_with_doctype(responses, **kwargs):
 
 
 # Check: `<html>` tag should include lang
+@requires("response")
 def check_html_tag_includes_lang(responses, **kwargs):
-    if "<html" in responses["response"].content.decode(errors="ignore"):
-        html_tag = responses["response"].content.decode(errors="ignore").split("<html")[1].split(">")[0].replace("'", '"')
-        html_tag = "<html" + html_tag + ">"
-    else:
-        html_tag = "no tag"
+    document = ScanContext.of(responses).document()
+    html_tag = document.html_tag.replace("'", '"') if document.html_tag else "no tag"
+
     return result(
-        "lang=" in html_tag,
+        document.html_attrs is not None and "lang" in document.html_attrs,
         f"<html> tag should include lang ({html_tag})",
         "html_tag_includes_lang",
         **kwargs,
@@ -92,9 +92,10 @@ def check_html_tag_includes_lang(responses, **kwargs):
 
 
 # Check: HTML should include meta charset tag
+@requires("response")
 def check_html_meta_charset(responses, **kwargs):
     return result(
-        b"<meta charset=" in responses["response"].content.lower(),
+        any("charset" in meta for meta in ScanContext.of(responses).document().meta),
         f"HTML should include meta charset tag",
         "html_meta_charset",
         **kwargs,
@@ -102,9 +103,10 @@ def check_html_meta_charset(responses, **kwargs):
 
 
 # Check: HTML should include `<title>`
+@requires("response")
 def check_html_includes_title(responses, **kwargs):
     return result(
-        b"<title>" in responses["response"].content.lower(),
+        ScanContext.of(responses).document().has_title,
         f"HTML should include title",
         "html_includes_title",
         **kwargs,
@@ -112,12 +114,12 @@ def check_html_includes_title(responses, **kwargs):
 
 
 # Check: HTML should include link with rel="icon"
+@requires("response")
 def check_html_includes_rel_icon(responses, **kwargs):
-    link_re = re.compile(r"<link (.+)>")
-    links = [l.replace("'", '"') for l in link_re.findall(responses["response"].content.decode())]
+    rels = [link.get("rel", "").lower() for link in ScanContext.of(responses).document().links]
 
     return result(
-        any(['rel="icon"' in link for link in links]) or any(['rel="shortcut icon"' in link for link in links]),
+        any([rel in ("icon", "shortcut icon") for rel in rels]),
         'HTML should include link with rel="icon"',
         "html_rel_icon",
         **kwargs,
@@ -125,6 +127,7 @@ def check_html_includes_rel_icon(responses, **kwargs):
 
 
 # Check: HTML should not use schemeless urls for links or hrefs
+@requires("response")
 def check_html_should_not_use_schemeless_urls(responses, **kwargs):
     return result(
         b'="//' not in responses["response"].content and b"='//" not in responses["response"].content,
@@ -135,13 +138,13 @@ def check_html_should_not_use_schemeless_urls(responses, **kwargs):
 
 
 # Check: HTML should not use unnecessary HTML entities
+@requires("response")
 def check_html_should_not_use_unnecessary_entities(responses, **kwargs):
     allow_list = [b"nbsp", b"amp", b"quot", b"lt", b"gt"]
 
     # The longest entity on the registered entity list is "CounterClockwiseContourIntegral"
     # https://html.spec.whatwg.org/entities.json
-    entities = re.findall(r"&([\w#]{1,32});", responses["response"].content.decode())
-    entities = [e for e in entities if e not in allow_list]
+    entities = [e for e in ScanContext.of(responses).document().entities if e not in allow_list]
 
     return result(
         len(entities) == 0,
@@ -153,11 +156,13 @@ def check_html_should_not_use_unnecessary_entities(responses, **kwargs):
 
 
 # Check: All script tags should use subresource integrity
+@requires("response")
 def check_html_script_tags_use_sri(responses, **kwargs):
-    script_tags = re.findall(r"<script ([^\>]+)", responses["response"].content.decode())
+    # inline scripts without any attributes are ignored
+    scripts = [attrs for attrs in ScanContext.of(responses).document().scripts if attrs]
 
     return result(
-        all(["integrity" in tag for tag in script_tags]),
+        all(["integrity" in attrs for attrs in scripts]),
         f"All script tags should use subresource integrity",
         "html_sri_js",
         **kwargs,
@@ -165,6 +170,7 @@ def check_html_script_tags_use_sri(responses, **kwargs):
 
 
 # Check: X-DNS-Prefetch-Control should be set to off
+@requires("response")
 def check_x_dns_prefetch_control_is_off(responses, **kwargs):
     return result(
         responses["response"].headers.get("x-dns-prefetch-control", "") == "off",
@@ -175,6 +181,7 @@ def check_x_dns_prefetch_control_is_off(responses, **kwargs):
 
 
 # Check: CDNs should not be used for Javascript or CSS assets
+@requires("response")
 def check_cdns_should_not_be_used(responses, **kwargs):
     # XXX: This list was compiled by myself from a number of random web sources, if a better maintained list
     # exists then I would love to replace this
@@ -189,63 +196,51 @@ def check_cdns_should_not_be_used(responses, **kwargs):
         "ajax.aspnetcdn.com",
     ]
 
-    script_tags = re.findall(r"<script ([^\>]+)", responses["response"].content.decode())
-    link_tags = re.findall(r"<link (.+)>", responses["response"].content.decode())
+    document = ScanContext.of(responses).document()
 
-    for tag in script_tags + link_tags:
-        if any([x in tag for x in cdn_domains]):
+    for attrs in document.scripts + document.links:
+        if any([x in value for value in attrs.values() for x in cdn_domains]):
             return result(False, "CDNs should not be used for Javascript or CSS assets", "html_cdn_usage", **kwargs)
 
     return result(True, "CDNs should not be used for Javascript or CSS assets", "html_cdn_usage", **kwargs)
 
 
 # Check: RSS and JSON feeds should return Access-Control-Allow-Origin header
+@requires("response")
 def check_rss_should_return_cors_header(responses, **kwargs):
-    if USE_BS4:
-        feed_urls = []
-        feed_types = [
-            "application/rss+xml",
-            "application/feed+json",
-        ]
-
-        soup = BeautifulSoup(responses["response"].content, features="html.parser")
-
-        links = soup.find_all("link")
-
-        for link in links:
-            if "alternate" in link.attrs.get("rel", ""):
-                if link.attrs.get("type", "") in feed_types:
-                    feed_urls.append(urljoin(responses["response"].url, link.attrs.get("href")))
-
-        cors_values = []
-        for url in feed_urls:
-            # TODO: with the urljoin above this block probably isn't needed
-            if url.startswith("//"):  # pragma: no cover
-                url = "https:" + url
-            elif url.startswith("/"):  # pragma: no cover
-                url = responses["response"].url.rstrip("/") + url
-
-            if url.startswith("http"):
-                response = thttp.request(url)
-                cors_values.append(response.headers.get("access-control-allow-origin"))
-
-        return result(
-            all([x is not None for x in cors_values]),
-            f"RSS and JSON feeds should return Access-Control-Allow-Origin header ({', '.join(feed_urls) if feed_urls else 'no feeds'})",
-            "feeds_cors_enabled",
-            **kwargs,
-        )
-    else:  # pragma: no cover
-        return result(
-            False,
-            f"RSS and JSON feeds should return Access-Control-Allow-Origin header (skipped because beautifulsoup is missing)",
-            "feeds_cors_enabled",
-            warn_on_fail=True,
-            **kwargs,
-        )
+    feed_urls = []
+    feed_types = [
+        "application/rss+xml",
+        "application/feed+json",
+    ]
+
+    for link in ScanContext.of(responses).document().links:
+        if "alternate" in link.get("rel", "").split():
+            if link.get("type", "") in feed_types:
+                feed_urls.append(urljoin(responses["response"].url, link.get("href")))
+
+    cors_values = []
+    for url in feed_urls:
+        # TODO: with the urljoin above this block probably isn't needed
+        if url.startswith("//"):  # pragma: no cover
+            url = "https:" + url
+        elif url.startswith("/"):  # pragma: no cover
+            url = responses["response"].url.rstrip("/") + url
+
+        if url.startswith("http"):
+            response = thttp.request(url)
+            cors_values.append(response.headers.get("access-control-allow-origin"))
+
+    return result(
+        all([x is not None for x in cors_values]),
+        f"RSS and JSON feeds should return Access-Control-Allow-Origin header ({', '.join(feed_urls) if feed_urls else 'no feeds'})",
+        "feeds_cors_enabled",
+        **kwargs,
+    )
 
 
 # Check: Cache-Control max-age should be <= 86400 for HTML documents
+@requires("response")
 def check_html_should_not_be_cached_for_more_than_24_hours(responses, **kwargs):
     cc_header = responses["response"].headers.get("cache-control", "")
     error = "no Cache-Control header"
@@ -1,5 +1,6 @@
 import re
 
+from ready.checks import requires
 from ready.result import result
 
 LEAKY_HEADERS = [
@@ -59,6 +60,7 @@ LEAKY_HEADERS = [
 
 
 # Check: Headers that leak information should not be in the response
+@requires("response")
 def check_should_not_include_leaky_headers(responses, **kwargs):
     leaky = [x for x in LEAKY_HEADERS if re.search(r"\d\.\d", responses["response"].headers.get(x, "")) != None]
     return result(
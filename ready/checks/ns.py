@@ -1,7 +1,9 @@
+from ready.checks import requires
 from ready.result import result
 
 
 # Check: At least two nameservers should be configured
+@requires("dns_ns_response", optional=["dns_ns_response_fld"])
 def check_at_least_two_nameservers_configured(responses, **kwargs):
     nameservers = [x["data"] for x in responses["dns_ns_response"].json.get("Answer", [])]
 
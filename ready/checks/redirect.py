@@ -1,7 +1,9 @@
+from ready.checks import requires
 from ready.result import result
 
 
 # Check: HTTP -> HTTPS redirection occurs
+@requires("http_response")
 def check_http_to_https_redirect(responses, **kwargs):
     if responses["http_response"]:
         return result(
@@ -1,9 +1,11 @@
 import re
 
+from ready.checks import requires
 from ready.result import result
 
 
 # Check: Report-To Header must not be included in response
+@requires("response")
 def check_report_to_header_must_not_be_included_in_response(responses, **kwargs):
     return result(
         responses["response"].headers.get("report-to") in [None, ""],
@@ -1,10 +1,10 @@
 import errno
-import socket
 import ssl
 from datetime import date, datetime
 
+from ready.checks import requires
 from ready.result import result
-from ready.thttp import request
+from ready.tls import negotiate, probe, scan
 
 CONNECTION_TIMEOUT = 5.0
 
@@ -21,82 +21,62 @@ class LookupFailed(Exception):
     pass
 
 
+# the ssl.TLSVersion that each version specific ssl.PROTOCOL_* constant pins connections to
+PROTOCOL_VERSIONS = {
+    ssl.PROTOCOL_TLSv1: ssl.TLSVersion.TLSv1,
+    ssl.PROTOCOL_TLSv1_1: ssl.TLSVersion.TLSv1_1,
+    ssl.PROTOCOL_TLSv1_2: ssl.TLSVersion.TLSv1_2,
+}
+
+
 def connect_with_specific_protocol(domain, protocol, ipv6=False):
-    successful = False
+    # `protocol` can be an ssl.TLSVersion, or one of the ssl.PROTOCOL_* constants callers used to pass
+    protocol = PROTOCOL_VERSIONS.get(protocol, protocol)
+    return negotiate(domain, protocol=protocol, timeout=CONNECTION_TIMEOUT) is not None
 
-    ssl_sock = None
 
-    try:
-        sock_type = socket.AF_INET6 if ipv6 else socket.AF_INET
-        sock = socket.socket(sock_type, socket.SOCK_STREAM)
+def _expiry(tls_probe):
+    if not tls_probe.cert:
+        return None
 
-        context = ssl.SSLContext(protocol=protocol)
-        ssl_sock = context.wrap_socket(sock, server_hostname=domain)
-        ssl_sock.settimeout(CONNECTION_TIMEOUT)
-        ssl_sock.connect((domain, 443))
-        ssl_sock.close()
-        successful = True
-    except:
-        successful = False
-    finally:
-        if ssl_sock:
-            ssl_sock.close()
+    return datetime.fromtimestamp(ssl.cert_time_to_seconds(tls_probe.cert["notAfter"])).date()
 
 
 def get_ssl_expiry(domain, ipv6=False):
-    try:
-        sock_type = socket.AF_INET6 if ipv6 else socket.AF_INET
-        sock = socket.socket(sock_type, socket.SOCK_STREAM)
-        sock.settimeout(CONNECTION_TIMEOUT)
-
-        context = ssl.create_default_context()
-        ssl_sock = context.wrap_socket(sock, server_hostname=domain)
-        ssl_sock.settimeout(CONNECTION_TIMEOUT)
-        ssl_sock.connect((domain, 443))
-
-        cert = ssl_sock.getpeercert()
-        end = datetime.fromtimestamp(ssl.cert_time_to_seconds(cert["notAfter"]))
-        ssl_sock.close()
-        return end.date()
-    except:
-        return None
+    return _expiry(probe(domain))
 
 
 def get_ssl_certificate(domain, ipv6=False, binary=False):
-    try:
-        sock_type = socket.AF_INET6 if ipv6 else socket.AF_INET
-        sock = socket.socket(sock_type, socket.SOCK_STREAM)
-        sock.settimeout(CONNECTION_TIMEOUT)
-
-        context = ssl.create_default_context()
-        ssl_sock = context.wrap_socket(sock, server_hostname=domain)
-        ssl_sock.settimeout(CONNECTION_TIMEOUT)
-        ssl_sock.connect((domain, 443))
-
-        cert = ssl_sock.getpeercert(binary_form=binary)
-        ssl_sock.close()
-        return cert
-    except:
-        return None
+    tls_probe = probe(domain)
+    return tls_probe.cert_der if binary else tls_probe.cert
+
+
+def get_tls_probe(responses, domain):
+    # ready() probes each host once while fetching responses, but checks can also be run on their own
+    return responses.get("tls_probe") or probe(domain)
+
+
+def get_tls_capabilities(responses, domain):
+    return responses.get("tls_capabilities") or scan(domain)
 
 
 # Check: SSL certificate should be trusted
+@requires("tls_probe")
 def check_ssl_certificate_should_be_trusted(responses, **kwargs):
-    try:
-        response = request(f'https://{kwargs["domain"]}', verify=True)
-        return result(
-            True,
-            f"SSL certificate should be trusted",
-            "ssl_trusted",
-            **kwargs,
-        )
-    except:
-        return result(False, f"SSL certificate should be trusted", "ssl_trusted", **kwargs)
+    tls_probe = get_tls_probe(responses, kwargs["domain_with_no_path"])
+
+    return result(
+        tls_probe.trusted,
+        f"SSL certificate should be trusted",
+        "ssl_trusted",
+        **kwargs,
+    )
 
 
 # Check: SSL expiry should be less than one year
+@requires("tls_probe")
 def check_ssl_expiry_should_be_less_than_one_year(responses, **kwargs):
-    ssl_expiry = get_ssl_expiry(kwargs["domain_with_no_path"], ipv6=kwargs["is_ipv6"])
+    ssl_expiry = _expiry(get_tls_probe(responses, kwargs["domain_with_no_path"]))
     ssl_expiry_days = (ssl_expiry - date.today()).days if ssl_expiry else None
 
     return result(
@@ -108,8 +88,9 @@ def check_ssl_expiry_should_be_less_than_one_year(responses, **kwargs):
 
 
 # Check: SSL expiry should be greater than five days
+@requires("tls_probe")
 def check_ssl_expiry_should_be_greater_than_five_days(responses, **kwargs):
-    ssl_expiry = get_ssl_expiry(kwargs["domain_with_no_path"], ipv6=kwargs["is_ipv6"])
+    ssl_expiry = _expiry(get_tls_probe(responses, kwargs["domain_with_no_path"]))
     ssl_expiry_days = (ssl_expiry - date.today()).days if ssl_expiry else None
 
     return result(
@@ -121,12 +102,12 @@ def check_ssl_expiry_should_be_greater_than_five_days(responses, **kwargs):
 
 
 # Check: SSL connection fails when using TLS 1.1
+@requires("tls_capabilities")
 def check_ssl_connection_fails_with_tls_1_1(responses, **kwargs):
-    domain = kwargs["domain"]
-    connection_successful = connect_with_specific_protocol(domain, ssl.PROTOCOL_TLSv1_1, ipv6=kwargs["is_ipv6"])
+    capabilities = get_tls_capabilities(responses, kwargs["domain_with_no_path"])
 
     return result(
-        not connection_successful,
+        not capabilities["TLSv1.1"]["supported"],
         f"SSL connection fails when using TLS 1.1",
         "ssl_tls_1_1",
         **kwargs,
@@ -134,20 +115,35 @@ def check_ssl_connection_fails_with_tls_1_1(responses, **kwargs):
 
 
 # Check: SSL connection fails when using TLS 1.0
+@requires("tls_capabilities")
 def check_ssl_connection_fails_with_tls_1_0(responses, **kwargs):
-    domain = kwargs["domain"]
-    connection_successful = connect_with_specific_protocol(domain, ssl.PROTOCOL_TLSv1, ipv6=kwargs["is_ipv6"])
+    capabilities = get_tls_capabilities(responses, kwargs["domain_with_no_path"])
 
     return result(
-        not connection_successful,
+        not capabilities["TLSv1"]["supported"],
         f"SSL connection fails when using TLS 1.0",
         "ssl_tls_1_0",
         **kwargs,
     )
 
 
+# Check: SSL connection succeeds when using TLS 1.3
+@requires("tls_capabilities")
+def check_ssl_connection_succeeds_with_tls_1_3(responses, **kwargs):
+    capabilities = get_tls_capabilities(responses, kwargs["domain_with_no_path"])
+
+    return result(
+        capabilities["TLSv1.3"]["supported"],
+        f"SSL connection succeeds when using TLS 1.3 ({', '.join(capabilities['TLSv1.3']['ciphers']) or 'no ciphers'})",
+        "ssl_tls_1_3",
+        warn_on_fail=True,
+        **kwargs,
+    )
+
+
 # Check: DNS CAA should be enabled
 # https://blog.qualys.com/product-tech/2017/03/13/caa-mandated-by-cabrowser-forum
+@requires("dns_caa_response", optional=["dns_caa_response_fld"])
 def check_dns_caa_record_should_exist(responses, **kwargs):
     records = [
         r["data"] for r in responses["dns_caa_response"].json.get("Answer", []) if "data" in r and r.get("type", 0) == 257
@@ -169,6 +165,7 @@ def check_dns_caa_record_should_exist(responses, **kwargs):
 
 
 # Check: DNS CAA should include accounturi
+@requires("dns_caa_response", optional=["dns_caa_response_fld"])
 def check_dns_caa_record_should_include_accounturi(responses, **kwargs):
     records = [
         r["data"] for r in responses["dns_caa_response"].json.get("Answer", []) if "data" in r and r.get("type", 0) == 257
@@ -194,6 +191,7 @@ def check_dns_caa_record_should_include_accounturi(responses, **kwargs):
 
 
 # Check: DNS CAA should include validationmethods
+@requires("dns_caa_response", optional=["dns_caa_response_fld"])
 def check_dns_caa_record_should_include_validationmethods(responses, **kwargs):
     records = [
         r["data"] for r in responses["dns_caa_response"].json.get("Answer", []) if "data" in r and r.get("type", 0) == 257
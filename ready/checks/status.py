@@ -1,7 +1,9 @@
+from ready.checks import requires
 from ready.result import result
 
 
 # Check: Response should be a 200 (after redirects)
+@requires("response")
 def check_http_response_should_be_200(responses, **kwargs):
     return result(
         responses["response"] and responses["response"].status == 200,
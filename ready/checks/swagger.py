@@ -1,6 +1,7 @@
 import re
 from urllib.parse import urljoin
 
+from ready.checks import requires
 from ready.result import result
 from ready.thttp import request
 
@@ -23,6 +24,7 @@ SWAGGER_PATHS = [
 
 
 # Check: Swagger URLs should not return 200 (requires --fuzz)
+@requires("response")
 def check_swagger_should_not_return_200(responses, **kwargs):
     url = responses["response"].url
 
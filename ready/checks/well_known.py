@@ -1,3 +1,4 @@
+from ready.checks import requires
 from ready.result import result
 import datetime
 
@@ -12,6 +13,7 @@ def get_utc_time():
 
 
 # Check: Robots.txt exists and is a text file
+@requires("robots_txt_response")
 def check_robots_txt_exists(responses, **kwargs):
     robots_response = responses["robots_txt_response"]
 
@@ -24,6 +26,7 @@ def check_robots_txt_exists(responses, **kwargs):
 
 
 # Check: Security.txt exists and is a text file that contains required attributes
+@requires("security_txt_response")
 def check_security_txt_exists(responses, **kwargs):
     security_txt_response = responses["security_txt_response"]
 
@@ -40,6 +43,7 @@ def check_security_txt_exists(responses, **kwargs):
 
 
 # Check: Security.txt has an expiry date in the future
+@requires("security_txt_response")
 def check_security_txt_not_expired(responses, **kwargs):
     security_txt_response = responses["security_txt_response"]
 
@@ -74,6 +78,7 @@ def check_security_txt_not_expired(responses, **kwargs):
 
 
 # Check: Favicon is served at /favicon.ico
+@requires("favicon_response")
 def check_favicon_is_served(responses, **kwargs):
     favicon_response = responses["favicon_response"]
     return result(
@@ -0,0 +1,275 @@
+"""
+The `ready` command line tool.
+
+Only the options that run a scan import `ready.ready`, which loads the HTTP, TLS and DNS clients,
+so `--version`, `--doc` and `--help` return straight away.
+"""
+
+import contextlib
+import functools
+import json
+import sys
+
+from ready import VERSION
+
+
+def parse_args(args):
+    result = {
+        a.split("=")[0]: (
+            int(a.split("=")[1]) if "=" in a and a.split("=")[1].isnumeric() else a.split("=")[1] if "=" in a else True
+        )
+        for a in args
+        if "--" in a
+    }
+    result["[]"] = [a for a in args if not a.startswith("--")]
+    return result
+
+
+def usage():
+    print("ready")
+    print("")
+    print("Usage: ready.py [--headers] [--content] [--json] [--quiet] [--score] [--fuzz] <domain>")
+    print("")
+    print("  --headers      Output the headers from the HTTPS request made to the domain")
+    print("  --content      Output the content from the HTTPS request made to the domain")
+    print("  --fuzz         Include checks that fuzz urls (only run this on your own domain)")
+    print("  --json         Provide JSON output")
+    print("  --quiet        No text output")
+    print("  --score        Print a score out of 100 for this domain")
+    print("  --jobs=<n>     Run up to <n> checks at once (default: 1)")
+    print("  --doc          Print the list of check names")
+    print("  --version      Print version information")
+    print("  --input=<path> Scan every domain listed in a file (one per line, - for stdin) and print a line of JSON")
+    print("                 for each domain as its scan finishes")
+    print("  --workers=<n>  Number of domains to scan at once with --input (default: 8)")
+    print("  --processes[=<n>]  Shard --input across <n> processes (default: one per core), writing lines in input order")
+    print("  --checkpoint=<path> Record the domains scanned with --input, so that the scan can be resumed")
+    print("  --resume       Skip the domains already in the --checkpoint and add to it (append the output with >>)")
+    print("")
+    print("Scanning across several processes or machines that share a disk:")
+    print("")
+    print("  ready coordinator --queue=<path> [--input=<path>]   Queue the domains and print a line of JSON for each as it's")
+    print("                                                       scanned, until the queue is finished")
+    print("  ready worker --queue=<path> [--lease=<s>]           Scan domains from the queue until it's finished")
+    print("")
+    print("  --max-attempts=<n>   Give up on a domain after <n> workers failed to finish it in time (default: 3)")
+    print("  --lease=<s>          Seconds a worker has to scan a domain before it's given to another (default: 120)")
+    print("")
+    print("Politeness limits (per process), where requests wait for their turn instead of failing:")
+    print("")
+    print("  --rate-per-host=<n>      Make at most <n> requests per second to each host (default: no limit)")
+    print("  --rate-per-resolver=<n>  Make at most <n> DNS queries per second to each resolver (default: no limit)")
+    print("  --max-requests=<n>       Make at most <n> requests at once")
+    print("")
+    print("  --dns-resolver=<x>   DoH resolver to use, one of quad9, google, doh.li, dns.sb or a URL (default: google)")
+    print("                       or udp://host:port to query a recursive resolver directly over UDP and TCP")
+    print("  --dns-format=<x>     json (default) or wire to use RFC 8484 application/dns-message requests")
+    print("  --dns-hedge[=<ms>]   Also query the other DoH resolvers if the first hasn't answered within <ms> (default: 250)")
+    print("  --dns-cache=<path>   Cache DNS answers in an SQLite database that can be shared between processes")
+
+    print("\nDevelopment / experimental options for filtering checks and HTTP requests during testing:")
+    print("")
+    print("  --check-filter=<x>     Only run checks that match the provided filter")
+    print("  --request-filter=<x>   Only make HTTP requests that match the provided filter")
+
+
+def open_input(path):
+    """
+    Returns the lines of the file at `path`, or of stdin for "-" (or a bare `--input`), as a context
+    manager that closes the file (but not stdin).
+    """
+    return contextlib.nullcontext(sys.stdin) if path in ("-", True) else open(path)
+
+
+def dns_client(args):
+    """
+    Returns the DNS client for the --dns-* options.
+    """
+    from ready import resolver
+    from ready.ready import DNS_RESOLVERS, DNS_WIRE_RESOLVERS
+
+    wire_format = args.get("--dns-format", "json") == "wire"
+    resolvers = DNS_WIRE_RESOLVERS if wire_format else DNS_RESOLVERS
+
+    resolver_name = args.get("--dns-resolver", "google")
+    if not resolver_name.startswith(("http", "udp://")):
+        if resolver_name.lower() in resolvers:
+            dns_resolver = resolvers[resolver_name.lower()]
+        else:
+            print(
+                f"{resolver_name} is not a valid DNS resolver name. Provide one of {resolvers.keys()}, a full URI for the DoH resolver or udp://host:port."
+            )
+            sys.exit(1)
+    else:
+        dns_resolver = resolver_name
+
+    # answers can be cached on disk and shared between processes
+    dns_cache = resolver.SQLiteCache(args["--dns-cache"]) if "--dns-cache" in args else None
+
+    if "--dns-hedge" in args:
+        # race the chosen resolver against the others when it's slow to answer
+        delay = resolver.HEDGE_DELAY if args["--dns-hedge"] is True else args["--dns-hedge"] / 1000
+        others = [url for url in resolvers.values() if url != dns_resolver]
+        return resolver.HedgedDNSClient(
+            [resolver.get_client(url, wire_format=wire_format) for url in [dns_resolver] + others], delay=delay, cache=dns_cache
+        )
+
+    return resolver.get_client(dns_resolver, wire_format=wire_format, cache=dns_cache)
+
+
+def scheduler_options(args):
+    """
+    Returns the `ready.scheduler.configure()` arguments for the --rate-* and --max-requests options.
+    """
+    options = {}
+
+    for option, name, convert in (
+        ("--rate-per-host", "host_rate", float),
+        ("--rate-per-resolver", "resolver_rate", float),
+        ("--max-requests", "max_concurrency", int),
+    ):
+        if option in args:
+            try:
+                options[name] = convert(args[option])
+            except ValueError:
+                print(f"{option} needs a number")
+                sys.exit(1)
+
+    return options
+
+
+def print_scheduler_stats(stats=None):
+    """
+    Prints `stats` (like the merged stats of `ready_sharded()`'s processes), or this process's
+    scheduler stats, to stderr.
+    """
+    from ready import scheduler
+
+    if stats is None and scheduler.get_scheduler():
+        stats = scheduler.get_scheduler().stats()
+
+    if stats is not None:
+        print(json.dumps({"scheduler": stats}), file=sys.stderr)
+
+
+def cli():
+    args = parse_args(sys.argv[1:])
+
+    if "--version" in args:
+        print(f"ready {VERSION}")
+        sys.exit()
+
+    if "--doc" in args:
+        from ready.catalogue import CATALOGUE
+
+        for _, _, _, description in CATALOGUE:
+            print(f"- {description}")
+        sys.exit()
+
+    if "--help" in args or not (args["[]"] or "--input" in args):
+        usage()
+        sys.exit()
+
+    from ready.ready import BATCH_WORKERS, read_domains, ready, ready_many, ready_report, ready_sharded, score_from_results
+
+    command = args["[]"][0] if args["[]"] else None
+
+    if command in ("coordinator", "worker"):
+        from ready import workqueue
+
+        if not isinstance(args.get("--queue"), str):
+            print(f"ready {command} needs --queue=<path>")
+            sys.exit(1)
+
+        queue = workqueue.WorkQueue(args["--queue"])
+
+    if command == "coordinator":
+        with open_input(args["--input"]) if "--input" in args else contextlib.nullcontext() as lines:
+            domains = read_domains(lines) if lines is not None else None
+            workqueue.coordinate(queue, sys.stdout, domains, max_attempts=args.get("--max-attempts", workqueue.MAX_ATTEMPTS))
+        sys.exit()
+
+    from ready import scheduler
+
+    scheduler.configure(**scheduler_options(args))
+    dns_resolver = dns_client(args)
+
+    if command == "worker":
+        scan = functools.partial(
+            ready_report,
+            fuzz=args.get("--fuzz", False),
+            check_filter=args.get("--check-filter", ""),
+            request_filter=args.get("--request-filter", ""),
+            dns_resolver=dns_resolver,
+            jobs=args.get("--jobs", 1),
+        )
+
+        with contextlib.redirect_stdout(sys.stderr):
+            workqueue.work(queue, scan, lease=args.get("--lease", workqueue.LEASE_SECONDS))
+        print_scheduler_stats()
+        sys.exit()
+
+    if "--input" in args:
+        from ready.checkpoint import Checkpoint, CheckpointedOutput
+
+        # `--input` on its own reads the file named by the first argument
+        path = args["--input"] if args["--input"] is not True else (args["[]"] or ["-"])[0]
+        output = sys.stdout
+        checkpoint = None
+
+        if isinstance(args.get("--checkpoint"), str):
+            checkpoint = Checkpoint(args["--checkpoint"], resume="--resume" in args)
+            output = CheckpointedOutput(output, checkpoint)
+            if checkpoint.finished:
+                print(f"Resuming, skipping {len(checkpoint.finished)} domains that were already scanned", file=sys.stderr)
+        elif "--resume" in args:
+            print("--resume needs --checkpoint=<path>")
+            sys.exit(1)
+
+        scan_kwargs = {
+            "workers": args.get("--workers", BATCH_WORKERS),
+            "fuzz": args.get("--fuzz", False),
+            "check_filter": args.get("--check-filter", ""),
+            "request_filter": args.get("--request-filter", ""),
+            "jobs": args.get("--jobs", 1),
+        }
+
+        # everything but the lines of JSON goes to stderr, and the input is closed and the checkpoint
+        # synced however the scan ends
+        with open_input(path) as lines, checkpoint or contextlib.nullcontext(), contextlib.redirect_stdout(sys.stderr):
+            domains = read_domains(lines)
+            if checkpoint:
+                domains = checkpoint.pending(domains)
+
+            if "--processes" in args:
+                # each process makes its own DNS client
+                processes = None if args["--processes"] is True else args["--processes"]
+                ready_sharded(
+                    domains,
+                    output,
+                    processes,
+                    dns_resolver_factory=functools.partial(dns_client, args),
+                    scheduler_options=scheduler_options(args),
+                    scheduler_stats=print_scheduler_stats,
+                    **scan_kwargs,
+                )
+            else:
+                ready_many(domains, output, dns_resolver=dns_resolver, **scan_kwargs)
+                print_scheduler_stats()
+        sys.exit()
+
+    results = ready(
+        args["[]"][0],
+        print_headers=args.get("--headers", False),
+        print_content=args.get("--content", False),
+        json_output=args.get("--json", False),
+        hide_output=args.get("--quiet", False),
+        fuzz=args.get("--fuzz", False),
+        check_filter=args.get("--check-filter", ""),
+        request_filter=args.get("--request-filter", ""),
+        dns_resolver=dns_resolver,
+        jobs=args.get("--jobs", 1),
+    )
+
+    if "--score" in args:
+        print(f"Score: {score_from_results(results)}/100")
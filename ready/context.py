@@ -0,0 +1,50 @@
+"""
+The responses dict for a scan, with memoized views of the responses in it.
+
+Several checks derive the same data from a response (the decoded body, the lowercased body, the
+parsed HTML document, the Content-Security-Policy). Checks ask the ScanContext for those views
+instead of recomputing them, so each one is computed at most once per scan.
+"""
+
+from ready.document import parse_html
+
+
+def _content(response):
+    return response.content if isinstance(response.content, bytes) else (response.content or "").encode()
+
+
+class ScanContext(dict):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._views = {}
+
+    @classmethod
+    def of(cls, responses):
+        """
+        Returns `responses` if it's already a ScanContext, or a new ScanContext wrapping it (checks
+        can be called with a plain dict in tests).
+        """
+        return responses if isinstance(responses, cls) else cls(responses)
+
+    def view(self, name, key, func):
+        """
+        Returns `func(self[key])`, which is only called the first time the `name` view of `key` is
+        requested.
+        """
+        try:
+            return self._views[(name, key)]
+        except KeyError:
+            # two threads may both compute a view when checks run concurrently, but only one is kept
+            return self._views.setdefault((name, key), func(self[key]))
+
+    def text(self, key="response"):
+        return self.view("text", key, lambda response: _content(response).decode(errors="ignore"))
+
+    def lower(self, key="response"):
+        return self.view("lower", key, lambda response: _content(response).lower())
+
+    def document(self, key="response"):
+        """
+        Returns the `ready.document.HTMLDocument` extracted from the response.
+        """
+        return self.view("document", key, lambda response: parse_html(self.text(key)))
@@ -0,0 +1,106 @@
+"""
+A parser for Content-Security-Policy (CSP Level 3) that indexes each policy by directive name.
+
+A response can carry several policies: the header can be repeated or hold a comma-separated list,
+and the HTML document can add more with `<meta http-equiv>`. Browsers enforce every one of them,
+so a source is only allowed if all the policies allow it.
+
+Names and sources are lowercased, like the rest of the CSP checks.
+"""
+
+from collections import namedtuple
+
+# Fetch directives fall back to the first of these that the policy has (CSP3 §6.8.3)
+FALLBACKS = {
+    "script-src-elem": ("script-src-elem", "script-src", "default-src"),
+    "script-src-attr": ("script-src-attr", "script-src", "default-src"),
+    "script-src": ("script-src", "default-src"),
+    "style-src-elem": ("style-src-elem", "style-src", "default-src"),
+    "style-src-attr": ("style-src-attr", "style-src", "default-src"),
+    "style-src": ("style-src", "default-src"),
+    "worker-src": ("worker-src", "child-src", "script-src", "default-src"),
+    "frame-src": ("frame-src", "child-src", "default-src"),
+    "child-src": ("child-src", "default-src"),
+    "connect-src": ("connect-src", "default-src"),
+    "font-src": ("font-src", "default-src"),
+    "img-src": ("img-src", "default-src"),
+    "manifest-src": ("manifest-src", "default-src"),
+    "media-src": ("media-src", "default-src"),
+    "object-src": ("object-src", "default-src"),
+    "prefetch-src": ("prefetch-src", "default-src"),
+}
+
+# Directives that are ignored when the policy is delivered in a <meta> tag
+META_IGNORED = frozenset(["frame-ancestors", "report-uri", "sandbox"])
+
+Policy = namedtuple("Policy", "directives delivery")
+
+
+def _parse_policy(text, delivery="header"):
+    directives = {}
+
+    for directive in text.split(";"):
+        tokens = directive.strip().lower().split()
+        if not tokens:
+            continue
+
+        name = tokens[0]
+        # a repeated directive is ignored, as are ones a <meta> policy can't set
+        if name not in directives and not (delivery == "meta" and name in META_IGNORED):
+            directives[name] = frozenset(tokens[1:])
+
+    return Policy(directives, delivery)
+
+
+def _effective_sources(policy, name):
+    for fallback in FALLBACKS.get(name, (name,)):
+        if fallback in policy.directives:
+            return policy.directives[fallback]
+    return None
+
+
+class ContentSecurityPolicy:
+    """
+    Every policy that applies to a response.
+
+    `names` lists the directive names in the order they appear, `tokens` holds every directive
+    name and source (without quotes) for "anywhere in the policy" lookups, and `text` is the
+    policy text for messages.
+    """
+
+    def __init__(self, policies, text):
+        self.policies = [p for p in policies if p.directives]
+        self.text = text
+        self.names = [name for p in self.policies for name in p.directives]
+        self.tokens = frozenset(self.names) | frozenset(
+            source.strip("'") for p in self.policies for sources in p.directives.values() for source in sources
+        )
+
+    def __bool__(self):
+        return bool(self.policies)
+
+    def __contains__(self, name):
+        return any(name in p.directives for p in self.policies)
+
+    def get(self, name):
+        """
+        Returns the sources listed for the `name` directive in any of the policies (without
+        following fallbacks).
+        """
+        return frozenset().union(*(p.directives.get(name, ()) for p in self.policies))
+
+    def restricts(self, name):
+        """
+        Returns whether any policy has the `name` directive or one it falls back to.
+        """
+        return any(_effective_sources(p, name) is not None for p in self.policies)
+
+
+def parse_csp(headers=(), meta=()):
+    """
+    Returns a ContentSecurityPolicy for the `headers` values and `meta` tag contents.
+    """
+    policies = [_parse_policy(p) for header in headers for p in header.split(",")]
+    policies += [_parse_policy(content, "meta") for content in meta]
+
+    return ContentSecurityPolicy(policies, ", ".join(list(headers) + list(meta)).lower())
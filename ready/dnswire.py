@@ -0,0 +1,223 @@
+"""
+A small encoder and decoder for the DNS wire format (RFC 1035) used by the binary DoH client
+(RFC 8484) and the UDP/TCP resolver.
+
+Decoded messages have the same shape as the DNS-over-HTTPS JSON API, so the checks can't tell the
+difference:
+
+    {"Status": 0, "TC": False, "Question": [...], "Answer": [{"name", "type", "TTL", "data"}], "Authority": [...]}
+"""
+
+import random
+import socket
+import struct
+
+RECORD_TYPES = {
+    "A": 1,
+    "NS": 2,
+    "CNAME": 5,
+    "SOA": 6,
+    "PTR": 12,
+    "MX": 15,
+    "TXT": 16,
+    "AAAA": 28,
+    "OPT": 41,
+    "SPF": 99,
+    "CAA": 257,
+}
+
+CLASS_IN = 1
+FLAG_RD = 0x0100
+FLAG_TC = 0x0200
+EDNS_PAYLOAD_SIZE = 1232
+
+
+class DNSWireError(ValueError):
+    pass
+
+
+def encode_name(name):
+    try:
+        labels = [label.encode("idna") for label in name.rstrip(".").split(".") if label]
+    except UnicodeError as e:
+        raise DNSWireError(f"Can't encode {name}: {e}")
+
+    if any(len(label) > 63 for label in labels):
+        raise DNSWireError(f"Label too long in {name}")
+
+    return b"".join(bytes([len(label)]) + label for label in labels) + b"\0"
+
+
+def encode_query(name, record_type, query_id=None, edns_payload_size=EDNS_PAYLOAD_SIZE):
+    """
+    Returns a recursive query for `name` and `record_type` (a name like "TXT" or a number). A random
+    query ID is used unless one is provided (RFC 8484 recommends 0 for DoH).
+    """
+    if query_id is None:
+        query_id = random.randint(0, 0xFFFF)
+
+    record_type = RECORD_TYPES[record_type.upper()] if isinstance(record_type, str) else record_type
+    additional = 1 if edns_payload_size else 0
+
+    message = struct.pack("!HHHHHH", query_id, FLAG_RD, 1, 0, 0, additional)
+    message += encode_name(name) + struct.pack("!HH", record_type, CLASS_IN)
+
+    if edns_payload_size:
+        # OPT pseudo-record: root name, type, payload size, extended rcode/flags, no options
+        message += b"\0" + struct.pack("!HHIH", RECORD_TYPES["OPT"], edns_payload_size, 0, 0)
+
+    return message
+
+
+def query_id(message):
+    return struct.unpack("!H", message[:2])[0]
+
+
+def _decode_name(message, offset):
+    labels = []
+    end = None
+    jumps = 0
+
+    while True:
+        if offset >= len(message):
+            raise DNSWireError("Name runs past the end of the message")
+
+        length = message[offset]
+
+        if length & 0xC0 == 0xC0:  # compression pointer
+            if offset + 1 >= len(message):
+                raise DNSWireError("Truncated compression pointer")
+            if end is None:
+                end = offset + 2
+
+            jumps += 1
+            if jumps > 64:
+                raise DNSWireError("Compression pointer loop")
+
+            offset = ((length & 0x3F) << 8) | message[offset + 1]
+        elif length == 0:
+            return ".".join(labels) + ".", end if end is not None else offset + 1
+        else:
+            labels.append(message[offset + 1 : offset + 1 + length].decode("ascii", errors="replace"))
+            offset += 1 + length
+
+
+def _character_strings(rdata):
+    strings = []
+    offset = 0
+
+    while offset < len(rdata):
+        length = rdata[offset]
+        strings.append(rdata[offset + 1 : offset + 1 + length].decode("utf-8", errors="replace"))
+        offset += 1 + length
+
+    return strings
+
+
+def _decode_rdata(message, record_type, offset, length):
+    rdata = message[offset : offset + length]
+
+    if record_type in (RECORD_TYPES["A"], RECORD_TYPES["AAAA"]):
+        family = socket.AF_INET if record_type == RECORD_TYPES["A"] else socket.AF_INET6
+        try:
+            return socket.inet_ntop(family, rdata)
+        except ValueError:
+            raise DNSWireError(f"Address record with {length} bytes of data")
+
+    if record_type in (RECORD_TYPES["NS"], RECORD_TYPES["CNAME"], RECORD_TYPES["PTR"]):
+        return _decode_name(message, offset)[0]
+
+    if record_type == RECORD_TYPES["MX"]:
+        return f"{struct.unpack('!H', rdata[:2])[0]} {_decode_name(message, offset + 2)[0]}"
+
+    if record_type in (RECORD_TYPES["TXT"], RECORD_TYPES["SPF"]):
+        return "".join(_character_strings(rdata))
+
+    if record_type == RECORD_TYPES["SOA"]:
+        mname, offset = _decode_name(message, offset)
+        rname, offset = _decode_name(message, offset)
+        numbers = struct.unpack("!IIIII", message[offset : offset + 20])
+        return " ".join([mname, rname] + [str(n) for n in numbers])
+
+    if record_type == RECORD_TYPES["CAA"]:
+        flags, tag_length = rdata[0], rdata[1]
+        tag = rdata[2 : 2 + tag_length].decode("ascii", errors="replace")
+        value = rdata[2 + tag_length :].decode("utf-8", errors="replace")
+        return f'{flags} {tag} "{value}"'
+
+    # RFC 3597 generic format for everything else
+    return f"\\# {length} {rdata.hex()}"
+
+
+def _decode_records(message, offset, count):
+    records = []
+
+    for _ in range(count):
+        name, offset = _decode_name(message, offset)
+        if offset + 10 > len(message):
+            raise DNSWireError("Truncated resource record")
+
+        record_type, _, ttl, length = struct.unpack("!HHIH", message[offset : offset + 10])
+        offset += 10
+
+        if offset + length > len(message):
+            raise DNSWireError("Truncated resource record data")
+
+        if record_type != RECORD_TYPES["OPT"]:
+            records.append(
+                {
+                    "name": name,
+                    "type": record_type,
+                    "TTL": ttl,
+                    "data": _decode_rdata(message, record_type, offset, length),
+                }
+            )
+
+        offset += length
+
+    return records, offset
+
+
+def decode_message(message):
+    """
+    Decodes a DNS response into the DoH JSON structure. Raises DNSWireError if it's malformed.
+    """
+    try:
+        return _decode_message(message)
+    except (IndexError, struct.error) as e:
+        raise DNSWireError(f"Malformed DNS message: {e}")
+
+
+def _decode_message(message):
+    if len(message) < 12:
+        raise DNSWireError("Message is shorter than a DNS header")
+
+    _, flags, qdcount, ancount, nscount, _ = struct.unpack("!HHHHHH", message[:12])
+    offset = 12
+
+    questions = []
+    for _ in range(qdcount):
+        name, offset = _decode_name(message, offset)
+        record_type, _ = struct.unpack("!HH", message[offset : offset + 4])
+        questions.append({"name": name, "type": record_type})
+        offset += 4
+
+    answers, offset = _decode_records(message, offset, ancount)
+    authority, offset = _decode_records(message, offset, nscount)
+
+    result = {
+        "Status": flags & 0x000F,
+        "TC": bool(flags & FLAG_TC),
+        "RD": bool(flags & FLAG_RD),
+        "RA": bool(flags & 0x0080),
+        "AD": bool(flags & 0x0020),
+        "CD": bool(flags & 0x0010),
+        "Question": questions,
+    }
+
+    if answers:
+        result["Answer"] = answers
+    if authority:
+        result["Authority"] = authority
+
+    return result
@@ -0,0 +1,237 @@
+"""
+Extracts everything the HTML checks read from a document in a single pass, so the cost of parsing
+a page doesn't grow with the number of checks.
+
+The document is parsed with selectolax (lexbor) or lxml when one of them is installed, as they are
+much faster than the standard library's `html.parser` on large pages. Every backend produces the
+same HTMLDocument. `benchmarks/html_backends.py` compares them.
+"""
+
+import re
+from html.parser import HTMLParser
+
+USE_SELECTOLAX = True
+USE_LXML = True
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:  # pragma: no cover
+    USE_SELECTOLAX = False
+
+try:
+    import lxml.etree
+    import lxml.html
+except ImportError:  # pragma: no cover
+    USE_LXML = False
+
+ENTITY_RE = re.compile(r"&([\w#]{1,32});")
+HTML_TAG_RE = re.compile(r"<html(?=[\s/>])[^>]*>", re.IGNORECASE)
+# comments and script/style contents, which can't hold tags or entity references
+RAW_TEXT_RE = re.compile(r"<!--.*?-->|<(script|style)\b.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+# libxml2 gives these attributes their name as a value when they have none, so `defer` and
+# `defer="defer"` can't be told apart in lxml trees
+BOOLEAN_ATTRIBUTES = {
+    "checked",
+    "compact",
+    "declare",
+    "defer",
+    "disabled",
+    "ismap",
+    "multiple",
+    "nohref",
+    "noresize",
+    "noshade",
+    "nowrap",
+    "readonly",
+    "selected",
+}
+
+
+class HTMLDocument:
+    """
+    The parts of an HTML document that the checks use. Tag attributes are dicts with lowercased
+    names and valueless attributes mapped to "", as are boolean attributes like `defer="defer"`.
+    """
+
+    def __init__(self, backend="stdlib"):
+        self.backend = backend
+        self.starts_with_doctype = False
+        self.html_tag = None  # the source of the first <html> start tag
+        self.html_attrs = None
+        self.meta = []
+        self.has_title = False
+        self.links = []
+        self.scripts = []
+        self.entities = []
+
+
+class _Extractor(HTMLParser):
+    def __init__(self, document, text):
+        super().__init__(convert_charrefs=False)
+        self.document = document
+        self.seen_content = False
+        self.text = text
+        # the index in `text` where each line starts, to find references from getpos()
+        self.line_starts = [0] + [match.end() for match in re.finditer("\n", text)]
+
+    def handle_decl(self, decl):
+        if not self.seen_content and decl.lower() == "doctype html":
+            self.document.starts_with_doctype = True
+        self.seen_content = True
+
+    def handle_starttag(self, tag, attrs):
+        self.seen_content = True
+        source = self.get_starttag_text()
+        attrs = _attrs(attrs)
+
+        if "&" in source:
+            # entities in attribute values are unescaped before they get here
+            self.document.entities.extend(ENTITY_RE.findall(source))
+
+        if tag == "html" and self.document.html_tag is None:
+            self.document.html_tag = source
+            self.document.html_attrs = attrs
+        elif tag == "meta":
+            self.document.meta.append(attrs)
+        elif tag == "title":
+            self.document.has_title = True
+        elif tag == "link":
+            self.document.links.append(attrs)
+        elif tag == "script":
+            self.document.scripts.append(attrs)
+
+    def handle_data(self, data):
+        if not self.seen_content and data.strip():
+            self.seen_content = True
+
+    def handle_comment(self, data):
+        self.seen_content = True
+
+    def handle_pi(self, data):
+        self.seen_content = True
+
+    def _add_reference(self, name):
+        # html.parser also reports references that aren't terminated by ";", which aren't recorded
+        line, offset = self.getpos()
+        match = ENTITY_RE.match(self.text, self.line_starts[line - 1] + offset)
+        if match and match.group(1) == name:
+            self.document.entities.append(name)
+
+    def handle_entityref(self, name):
+        self.seen_content = True
+        self._add_reference(name)
+
+    def handle_charref(self, name):
+        self.seen_content = True
+        self._add_reference("#" + name)
+
+
+def _parse_stdlib(text):
+    document = HTMLDocument("stdlib")
+    parser = _Extractor(document, text)
+
+    try:
+        parser.feed(text)
+        parser.close()
+    except (AssertionError, ValueError):  # pragma: no cover
+        pass
+
+    return document
+
+
+class _TagParser(HTMLParser):
+    attrs = None
+
+    def handle_starttag(self, tag, attrs):
+        if self.attrs is None:
+            self.attrs = {name: value or "" for name, value in attrs}
+
+
+def _from_source(text, backend):
+    # tree builders add <html> (and merge the attributes of any later <html> tags into it) and drop
+    # doctypes and entity references, so those come from the source, as the stdlib parser sees it
+    document = HTMLDocument(backend)
+    document.starts_with_doctype = text.lstrip()[:15].lower() == "<!doctype html>"
+
+    markup = RAW_TEXT_RE.sub("", text) if "<" in text else text
+
+    match = HTML_TAG_RE.search(markup)
+    if match:
+        document.html_tag = match.group(0)
+        parser = _TagParser()
+        parser.feed(document.html_tag)
+        document.html_attrs = parser.attrs
+
+    if "&" in markup:
+        document.entities = ENTITY_RE.findall(markup)
+
+    return document
+
+
+def _attrs(attributes):
+    attrs = {}
+    for name, value in attributes:
+        name = name.lower()
+        attrs[name] = "" if not value or (name in BOOLEAN_ATTRIBUTES and value.lower() == name) else value
+    return attrs
+
+
+def _parse_selectolax(text):
+    document = _from_source(text, "selectolax")
+    tree = LexborHTMLParser(text)
+
+    for node in tree.css("meta, title, link, script"):
+        if node.tag == "meta":
+            document.meta.append(_attrs(node.attributes.items()))
+        elif node.tag == "title":
+            document.has_title = True
+        elif node.tag == "link":
+            document.links.append(_attrs(node.attributes.items()))
+        elif node.tag == "script":
+            document.scripts.append(_attrs(node.attributes.items()))
+
+    return document
+
+
+def _parse_lxml(text):
+    document = _from_source(text, "lxml")
+
+    try:
+        root = lxml.html.document_fromstring(text)
+    except (lxml.etree.ParserError, ValueError):
+        # empty documents, or an XML encoding declaration in a str
+        return _parse_stdlib(text) if text.strip() else document
+
+    for element in root.iter("meta", "title", "link", "script"):
+        if element.tag == "meta":
+            document.meta.append(_attrs(element.attrib.items()))
+        elif element.tag == "title":
+            document.has_title = True
+        elif element.tag == "link":
+            document.links.append(_attrs(element.attrib.items()))
+        elif element.tag == "script":
+            document.scripts.append(_attrs(element.attrib.items()))
+
+    return document
+
+
+BACKENDS = {
+    "selectolax": (USE_SELECTOLAX, _parse_selectolax),
+    "lxml": (USE_LXML, _parse_lxml),
+    "stdlib": (True, _parse_stdlib),
+}
+
+
+def available_backends():
+    """
+    Returns the names of the installed backends, fastest first.
+    """
+    return [name for name, (available, _) in BACKENDS.items() if available]
+
+
+def parse_html(text, backend=None):
+    """
+    Returns an HTMLDocument for `text`, parsed with `backend` ("selectolax", "lxml" or "stdlib") or
+    the fastest one installed. Malformed markup is parsed as far as possible rather than raising.
+    """
+    return BACKENDS[backend or available_backends()[0]][1](text)
@@ -1,113 +1,26 @@
+import asyncio
+import contextlib
 import datetime
+import functools
+import io
 import json
 import os
 import sys
+import threading
 import urllib
-
-from importlib import resources
-from . import checks as checks_module
-
-VERSION = "1.7.0"
-
-from ready.checks.bad_response import (
-    check_bad_response_cloudflare,
-    check_bad_response_kasada,
-)
-from ready.checks.content import (
-    check_http_cache_control_is_included,
-    check_http_content_type_header_contains_charset,
-    check_http_expires_header_not_used_without_cache_control,
-    check_http_p3p_header_is_not_set,
-    check_http_response_should_be_gzipped,
-    check_http_response_should_include_content_type,
-)
-from ready.checks.cookies import (
-    check_cookies_should_be_httponly,
-    check_cookies_should_be_samesite,
-    check_cookies_should_be_secure,
-)
-from ready.checks.corp_coop_coep import (
-    check_cross_origin_embedder_policy_should_be_require_corp,
-    check_cross_origin_opener_policy_should_be_sameorigin,
-    check_cross_origin_resource_policy_should_be_sameorigin,
-)
-from ready.checks.csp import (
-    check_csp_includes_default_or_script_directive,
-    check_csp_must_not_include_report_sample,
-    check_csp_must_not_include_unsafe_eval,
-    check_csp_must_not_include_unsafe_inline,
-    check_csp_should_exist,
-    check_csp_should_not_include_reportto,
-    check_csp_must_not_include_reporturi,
-    check_csp_should_only_include_valid_directives,
-    check_csp_should_start_with_defaultsrc_none,
-    check_csp_upgrade_insecure_requests,
-)
-from ready.checks.dns import check_aaaa_record_exists
-from ready.checks.email import (
-    check_dmarc_record_should_exist,
-    check_dmarc_record_should_reject_failures,
-    check_spf_dash_all,
-    check_spf_dns_record_does_not_exist,
-    check_spf_record_should_exist,
-    check_spf_txt_record_should_disallow_all,
-    check_spf_uses_less_than_10_requests,
-)
-from ready.checks.hsts import (
-    check_hsts_header_should_be_included_in_response,
-    check_hsts_header_should_have_a_long_max_age,
-    check_hsts_header_should_have_includesubdomains,
-    check_hsts_header_should_have_preload,
-)
-from ready.checks.html import (
-    check_cdns_should_not_be_used,
-    check_frame_ancestors_should_exist,
-    check_html_includes_rel_icon,
-    check_html_includes_title,
-    check_html_meta_charset,
-    check_html_script_tags_use_sri,
-    check_html_should_not_be_cached_for_more_than_24_hours,
-    check_html_should_not_use_schemeless_urls,
-    check_html_should_not_use_unnecessary_entities,
-    check_html_starts_with_doctype,
-    check_html_tag_includes_lang,
-    check_permissions_policy_should_exist,
-    check_referrer_policy_should_be_set,
-    check_rss_should_return_cors_header,
-    check_x_content_type_options_should_be_nosniff,
-    check_x_dns_prefetch_control_is_off,
-    check_x_xss_protection_should_not_exist,
-)
-from ready.checks.leaky_headers import check_should_not_include_leaky_headers
-from ready.checks.ns import check_at_least_two_nameservers_configured
-from ready.checks.redirect import check_http_to_https_redirect
-from ready.checks.report_to import check_report_to_header_must_not_be_included_in_response
-from ready.checks.ssl import (
-    check_dns_caa_record_should_exist,
-    check_dns_caa_record_should_include_accounturi,
-    check_dns_caa_record_should_include_validationmethods,
-    check_ssl_certificate_should_be_trusted,
-    check_ssl_connection_fails_with_tls_1_0,
-    check_ssl_connection_fails_with_tls_1_1,
-    check_ssl_expiry_should_be_greater_than_five_days,
-    check_ssl_expiry_should_be_less_than_one_year,
-)
-from ready.checks.status import check_http_response_should_be_200
-from ready.checks.swagger import check_swagger_should_not_return_200
-from ready.checks.well_known import (
-    check_favicon_is_served,
-    check_robots_txt_exists,
-    check_security_txt_exists,
-    check_security_txt_not_expired,
-)
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from importlib import import_module
+from importlib.util import find_spec
+
+from ready import VERSION, athttp, resolver, scheduler, tls
+from ready.catalogue import CATALOGUE
+from ready.cli import cli, parse_args, usage
+from ready.context import ScanContext
 from ready.thttp import pretty, request
 
-USE_FLD = True
-
-try:
-    from tld import get_fld
-except ImportError:
-    USE_FLD = False
+# tld is only imported when a scan uses it, as loading it is slow
+USE_FLD = find_spec("tld") is not None
 
 
 DEFAULT_HEADERS = {
@@ -125,6 +38,23 @@ DNS_RESOLVERS = {
     "dns.sb": "https://doh.dns.sb/dns-query",
 }
 
+# RFC 8484 (application/dns-message) endpoints for the same resolvers
+DNS_WIRE_RESOLVERS = {
+    "quad9": "https://dns.quad9.net/dns-query",
+    "google": "https://dns.google/dns-query",
+    "doh.li": "https://doh.li/dns-query",
+    "dns.sb": "https://doh.dns.sb/dns-query",
+}
+
+# Maximum number of HTTP and DNS requests that are in flight at once for a single scan
+FETCH_WORKERS = 8
+
+# Number of scans that run at once when scanning a list of domains (in each process with ready_sharded())
+BATCH_WORKERS = 8
+
+# Number of domains sent to a worker process at a time by ready_sharded()
+SHARD_CHUNK_SIZE = 32
+
 
 def response_or_none(url, name="", request_filter="", **kwargs):
     if request_filter and request_filter not in name:
@@ -141,21 +71,361 @@ def response_or_none(url, name="", request_filter="", **kwargs):
         return None
 
 
-def ready(
-    domain,
-    print_headers=False,
-    print_content=False,
-    json_output=False,
-    hide_output=False,
-    fuzz=False,
-    check_filter=None,
-    request_filter=None,
-    dns_resolver="https://dns.google/resolve",
-    extra_args={},
-):
+def call_or_none(func, name="", request_filter="", kwargs={}):
+    if request_filter and request_filter not in name:
+        print(f"Skipping request {name}")
+        return None
+
+    try:
+        return func(**kwargs)
+    except OSError:
+        # URLError, timeouts and connection failures from the DNS clients and TLS probe
+        return None
+    except Exception as e:
+        print(func.__name__, type(e))
+        return None
+
+
+def fetch_responses(fetches, request_filter="", max_workers=FETCH_WORKERS, deferred=(), proceed=None):
+    """
+    Makes the requests in `fetches` ({key: (url, name, kwargs)}) on a bounded pool of threads and
+    returns a dict with the same keys, so a scan takes about as long as its slowest request.
+
+    `url` can also be a function (like `ready.tls.probe` or a DNS client's `query`), which is called
+    with `kwargs`.
+
+    The fetches whose keys are in `deferred` wait for the "response" fetch, and only the ones in
+    `proceed({"response": response})` (all of them without `proceed`) are made. The others are left
+    out of the returned dict.
+    """
+
+    def submit(executor, key):
+        url, name, kwargs = fetches[key]
+        if callable(url):
+            return executor.submit(call_or_none, url, name, request_filter, kwargs)
+        return executor.submit(response_or_none, url, name, request_filter, **kwargs)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {key: submit(executor, key) for key in fetches if key not in deferred}
+
+        if deferred:
+            selected = proceed({"response": futures["response"].result()}) if proceed else deferred
+            futures.update({key: submit(executor, key) for key in fetches if key in deferred and key in selected})
+
+    return {key: futures[key].result() for key in fetches if key in futures}
+
+
+async def async_call_or_none(func, name="", request_filter="", kwargs={}):
+    if request_filter and request_filter not in name:
+        print(f"Skipping request {name}")
+        return None
+
+    try:
+        return await func(**kwargs)
+    except (OSError, asyncio.TimeoutError):
+        return None
+    except Exception as e:
+        print(func.__name__, type(e))
+        return None
+
+
+async def async_response_or_none(url, name="", request_filter="", **kwargs):
+    if request_filter and request_filter not in name:
+        print(f"Skipping HTTP request {name}")
+        return None
+
+    try:
+        return await athttp.request(url, **kwargs)
+    except (OSError, asyncio.TimeoutError):
+        return None
+    except Exception as e:
+        print(url, type(e))
+        return None
+
+
+async def async_fetch_responses(fetches, request_filter="", max_concurrency=FETCH_WORKERS, deferred=(), proceed=None):
+    """
+    Asyncio version of `fetch_responses()`. At most `max_concurrency` requests are in flight at once.
+    Coroutine functions are awaited and other functions are run in the loop's default executor.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def fetch(url, name, kwargs):
+        async with semaphore:
+            if asyncio.iscoroutinefunction(url):
+                return await async_call_or_none(url, name, request_filter, kwargs)
+
+            if callable(url):
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(None, functools.partial(call_or_none, url, name, request_filter, kwargs))
+
+            return await async_response_or_none(url, name, request_filter, **kwargs)
+
+    tasks = {key: asyncio.ensure_future(fetch(*fetches[key])) for key in fetches if key not in deferred}
+
+    if deferred:
+        selected = proceed({"response": await tasks["response"]}) if proceed else deferred
+        tasks.update(
+            {key: asyncio.ensure_future(fetch(*fetches[key])) for key in fetches if key in deferred and key in selected}
+        )
+
+    results = await asyncio.gather(*tasks.values())
+    responses = dict(zip(tasks.keys(), results))
+    return {key: responses[key] for key in fetches if key in responses}
+
+
+# The checks are listed by name and their modules are only imported when they're selected (see
+# `load_check()`)
+
+# bad response checks go first
+CHECKS = [
+    "check_bad_response_kasada",
+    "check_bad_response_cloudflare",
+    "check_http_to_https_redirect",
+    "check_http_response_should_be_200",
+    "check_http_response_should_include_content_type",
+    "check_aaaa_record_exists",
+    "check_hsts_header_should_be_included_in_response",
+    "check_hsts_header_should_have_a_long_max_age",
+    "check_hsts_header_should_have_includesubdomains",
+    "check_hsts_header_should_have_preload",
+    "check_csp_should_exist",
+    "check_csp_should_start_with_defaultsrc_none",
+    "check_csp_includes_default_or_script_directive",
+    "check_csp_must_not_include_unsafe_inline",
+    "check_csp_must_not_include_unsafe_eval",
+    "check_csp_must_not_include_report_sample",
+    "check_csp_upgrade_insecure_requests",
+    "check_csp_must_not_include_reporturi",
+    "check_csp_should_not_include_reportto",
+    "check_csp_should_only_include_valid_directives",
+    "check_report_to_header_must_not_be_included_in_response",
+    "check_robots_txt_exists",
+    "check_security_txt_exists",
+    "check_security_txt_not_expired",
+    "check_favicon_is_served",
+    "check_http_response_should_be_gzipped",
+    "check_http_content_type_header_contains_charset",
+    "check_http_expires_header_not_used_without_cache_control",
+    "check_http_cache_control_is_included",
+    "check_http_p3p_header_is_not_set",
+    "check_referrer_policy_should_be_set",
+    "check_cross_origin_resource_policy_should_be_sameorigin",
+    "check_cross_origin_opener_policy_should_be_sameorigin",
+    "check_cross_origin_embedder_policy_should_be_require_corp",
+    "check_should_not_include_leaky_headers",
+    "check_ssl_expiry_should_be_less_than_one_year",
+    "check_ssl_expiry_should_be_greater_than_five_days",
+    "check_ssl_certificate_should_be_trusted",
+    "check_ssl_connection_fails_with_tls_1_1",
+    "check_ssl_connection_fails_with_tls_1_0",
+    "check_ssl_connection_succeeds_with_tls_1_3",
+    "check_dns_caa_record_should_exist",
+    "check_dns_caa_record_should_include_accounturi",
+    "check_dns_caa_record_should_include_validationmethods",
+    "check_at_least_two_nameservers_configured",
+    "check_cookies_should_be_samesite",
+    "check_cookies_should_be_secure",
+    "check_cookies_should_be_httponly",
+    "check_spf_dash_all",
+    "check_spf_record_should_exist",
+    "check_spf_dns_record_does_not_exist",
+    "check_spf_txt_record_should_disallow_all",
+    "check_dmarc_record_should_exist",
+    "check_dmarc_record_should_reject_failures",
+    "check_spf_uses_less_than_10_requests",
+]
+
+# checks that only run when the response is HTML
+HTML_CHECKS = [
+    "check_permissions_policy_should_exist",
+    "check_frame_ancestors_should_exist",
+    "check_x_content_type_options_should_be_nosniff",
+    "check_x_xss_protection_should_not_exist",
+    "check_html_starts_with_doctype",
+    "check_html_tag_includes_lang",
+    "check_html_meta_charset",
+    "check_html_includes_title",
+    "check_html_includes_rel_icon",
+    "check_html_should_not_use_schemeless_urls",
+    "check_html_script_tags_use_sri",
+    "check_html_should_not_use_unnecessary_entities",
+    "check_html_should_not_be_cached_for_more_than_24_hours",
+    "check_x_dns_prefetch_control_is_off",
+    "check_cdns_should_not_be_used",
+    "check_rss_should_return_cors_header",
+]
+
+# checks that request extra URLs, which only run with --fuzz
+FUZZ_CHECKS = [
+    "check_swagger_should_not_return_200",
+]
+
+# checks that fail when the response is a bot protection challenge page instead of the site
+BOT_WALL_CHECKS = [
+    "check_bad_response_kasada",
+    "check_bad_response_cloudflare",
+]
+
+
+class _OrderedOutput:
+    """
+    Stands in for sys.stdout while checks run on a thread pool. Output from `capture()` is buffered
+    per thread so that it can be written out in check order instead of interleaving.
+    """
+
+    def __init__(self, stdout):
+        self.stdout = stdout
+        self.local = threading.local()
+
+    def write(self, s):
+        buffer = getattr(self.local, "buffer", None)
+        return (self.stdout if buffer is None else buffer).write(s)
+
+    def flush(self):
+        if getattr(self.local, "buffer", None) is None:
+            self.stdout.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stdout, name)
+
+    def capture(self, func, *args, **kwargs):
+        """
+        Returns the result of `func(*args, **kwargs)` and everything it printed.
+        """
+        self.local.buffer = io.StringIO()
+        try:
+            return func(*args, **kwargs), self.local.buffer.getvalue()
+        finally:
+            self.local.buffer = None
+
+
+_output_lock = threading.Lock()
+_output_users = 0
+
+
+@contextlib.contextmanager
+def _ordered_output():
+    # concurrent scans (from async_ready) share one _OrderedOutput
+    global _output_users
+
+    with _output_lock:
+        if not isinstance(sys.stdout, _OrderedOutput):
+            sys.stdout = _OrderedOutput(sys.stdout)
+        _output_users += 1
+        output = sys.stdout
+
+    try:
+        yield output
+    finally:
+        with _output_lock:
+            _output_users -= 1
+            if not _output_users and sys.stdout is output:
+                sys.stdout = output.stdout
+
+
+CHECK_MODULES = {name: module for module, name, _, _ in CATALOGUE}
+CHECK_IDS = {name: check_id for _, name, check_id, _ in CATALOGUE}
+
+
+def _check_name(check):
+    return check if isinstance(check, str) else check.__name__
+
+
+def load_check(check):
+    """
+    Returns the function for a check name, importing its module from `ready.checks` the first time
+    one of its checks is needed. Functions are returned as they are.
+    """
+    if callable(check):
+        return check
+
+    return getattr(import_module(f"ready.checks.{CHECK_MODULES[check]}"), check)
+
+
+def select_checks(is_html=True, fuzz=False, check_filter=None):
+    checks = CHECKS + (HTML_CHECKS if is_html else []) + (FUZZ_CHECKS if fuzz else [])
+    return [load_check(c) for c in checks if not check_filter or check_filter in _check_name(c)]
+
+
+def required_fetches(fetches, checks, request_filter=None):
+    """
+    Returns the subset of `fetches` that `checks` read (see `ready.checks.requires`). The HTTPS response
+    for the domain is always fetched because it decides which checks apply. Fetches that don't match
+    `request_filter` are left out, and the checks that require them are skipped.
+    """
+    keys = {"response"}
+    for check in checks:
+        if not hasattr(check, "requires"):
+            keys = set(fetches)  # a check that doesn't declare its inputs gets everything
+            break
+        keys.update(check.requires, check.optional)
+
+    return {
+        key: fetch
+        for key, fetch in fetches.items()
+        if key in keys and (key == "response" or not request_filter or request_filter in fetch[1])
+    }
+
+
+def reads_page(check):
+    """
+    Returns whether the result of `check` depends on the page response, so it would describe a bot
+    protection challenge page rather than the site. Checks that don't declare their inputs are
+    assumed to read it.
+    """
+    return "response" in getattr(check, "requires", ("response",)) and check.__name__ not in BOT_WALL_CHECKS
+
+
+def is_bot_wall(responses):
+    """
+    Returns whether any of the BOT_WALL_CHECKS fail for the page response.
+    """
+    return bool(responses.get("response")) and any(
+        not load_check(c)(responses, print_output=False).passed for c in BOT_WALL_CHECKS
+    )
+
+
+def page_only_fetches(fetches, checks):
+    """
+    Returns the keys of the `fetches` that only checks which read the page response need, which are
+    deferred until the response shows that it isn't a bot protection page.
+    """
+    page_checks = [c for c in checks if reads_page(c)]
+    other_checks = [c for c in checks if not reads_page(c)]
+    return set(required_fetches(fetches, page_checks)) - set(required_fetches(fetches, other_checks))
+
+
+def deferred_fetches(fetches, checks, request_filter=None):
+    """
+    Returns the keys of the `fetches` that wait for the page response, and the `proceed` function
+    for `fetch_responses()` that picks the ones to make once it's in: none when there's no response
+    (the scan stops there unless there's a request filter), and only those that checks which don't
+    read the page need when it's a bot protection page. `proceed.bot_wall` is set to whether it was
+    one, for `run_checks()`.
+    """
+    deferred = set(fetches) - {"response", "http_response"}
+    page_only = page_only_fetches(fetches, checks)
+
+    def proceed(responses):
+        proceed.bot_wall = is_bot_wall(responses)
+
+        if not responses["response"] and not request_filter:
+            return set()
+        if proceed.bot_wall:
+            return deferred - page_only
+        return deferred
+
+    proceed.bot_wall = None
+    return deferred, proceed
+
+
+def scan_domains(domain, hide_output=False):
     domain_with_no_path = urllib.parse.urlparse("https://" + domain).hostname
 
     if USE_FLD:
+        from tld import get_fld
+
         fld = get_fld(domain, fix_protocol=True)
     else:
         fld = "Disabled. Install tld to improve support for subdomains."
@@ -163,82 +433,186 @@ def ready(
     if not hide_output:
         print(f"URL (no scheme): {domain}, Domain (no path): {domain_with_no_path}, Second Level Domain: {fld}")
 
-    responses = {
-        "http_response": response_or_none(
-            f"http://{domain}", "http_response", request_filter, verify=False, headers=DEFAULT_HEADERS, timeout=3
+    return domain_with_no_path, fld
+
+
+def scan_fetches(domain, domain_with_no_path, fld, dns_query, asynchronous=False):
+    """
+    Returns the requests that make up the responses dict for a scan as {key: (url, name, kwargs)}.
+    DNS lookups are made with `dns_query(name, record_type)`, and the TLS handshakes are made with
+    the coroutines in `ready.tls` when `asynchronous` is true.
+    """
+    page_kwargs = {"headers": DEFAULT_HEADERS, "timeout": 3}
+
+    fetches = {
+        "http_response": (f"http://{domain}", "http_response", dict(page_kwargs, verify=False)),
+        "response": (f"https://{domain}", "response", dict(page_kwargs, verify=False)),
+        "security_txt_response": (
+            f"https://{domain_with_no_path}/.well-known/security.txt",
+            "security_txt_response",
+            page_kwargs,
         ),
-        "response": response_or_none(
-            f"https://{domain}", "response", request_filter, verify=False, headers=DEFAULT_HEADERS, timeout=3
+        "robots_txt_response": (f"https://{domain_with_no_path}/robots.txt", "robots_txt_response", page_kwargs),
+        "favicon_response": (
+            f"https://{domain_with_no_path}/favicon.ico",
+            "favicon_response",
+            dict(page_kwargs, verify=False),
         ),
+        "tls_probe": (tls.async_probe if asynchronous else tls.probe, "tls_probe", {"host": domain_with_no_path}),
+        "tls_capabilities": (
+            tls.async_scan if asynchronous else tls.scan,
+            "tls_capabilities",
+            {"host": domain_with_no_path},
+        ),
+        "dns_ns_response": (dns_query, "dns_ns_response", {"name": domain_with_no_path, "record_type": "NS"}),
+        "dns_mx_response": (dns_query, "dns_mx_response", {"name": domain_with_no_path, "record_type": "MX"}),
+        "dns_txt_response": (dns_query, "dns_txt_response", {"name": domain_with_no_path, "record_type": "TXT"}),
+        "dns_spf_response": (dns_query, "dns_spf_response", {"name": domain_with_no_path, "record_type": "SPF"}),
+        "dns_caa_response": (dns_query, "dns_caa_response", {"name": domain_with_no_path, "record_type": "CAA"}),
+        "dns_a_response": (dns_query, "dns_a_response", {"name": domain_with_no_path, "record_type": "A"}),
+        "dns_aaaa_response": (dns_query, "dns_aaaa_response", {"name": domain_with_no_path, "record_type": "AAAA"}),
+        "dns_dmarc_response": (dns_query, "dns_dmarc_response", {"name": f"_dmarc.{domain_with_no_path}", "record_type": "TXT"}),
     }
 
-    if not responses["response"]:
-        print(f"No response from https://{domain}")
+    if USE_FLD and domain != fld:
+        fetches.update(
+            {
+                "response_fld": (f"https://{fld}", "response_fld", dict(page_kwargs, verify=False)),
+                "dns_ns_response_fld": (dns_query, "dns_ns_response_fld", {"name": fld, "record_type": "NS"}),
+                "dns_mx_response_fld": (dns_query, "dns_mx_response_fld", {"name": fld, "record_type": "MX"}),
+                "dns_spf_response_fld": (dns_query, "dns_spf_response_fld", {"name": fld, "record_type": "SPF"}),
+                "dns_txt_response_fld": (dns_query, "dns_txt_response_fld", {"name": fld, "record_type": "TXT"}),
+                "dns_dmarc_response_fld": (dns_query, "dns_dmarc_response_fld", {"name": f"_dmarc.{fld}", "record_type": "TXT"}),
+                "dns_caa_response_fld": (dns_query, "dns_caa_response_fld", {"name": fld, "record_type": "CAA"}),
+            }
+        )
 
-        if request_filter:
-            print("Request filter in place, continuing...")
-        else:
-            return None
+    return fetches
 
-    responses["security_txt_response"] = response_or_none(
-        f"https://{domain_with_no_path}/.well-known/security.txt",
-        "security_txt_response",
-        request_filter,
-        headers=DEFAULT_HEADERS,
-        timeout=3,
-    )
 
-    responses["robots_txt_response"] = response_or_none(
-        f"https://{domain_with_no_path}/robots.txt", "robots_txt_response", request_filter, headers=DEFAULT_HEADERS, timeout=3
+def ready(
+    domain,
+    print_headers=False,
+    print_content=False,
+    json_output=False,
+    hide_output=False,
+    fuzz=False,
+    check_filter=None,
+    request_filter=None,
+    dns_resolver="https://dns.google/resolve",
+    extra_args={},
+    jobs=1,
+):
+    domain_with_no_path, fld = scan_domains(domain, hide_output)
+    dns = resolver.get_client(dns_resolver)
+    checks = select_checks(fuzz=fuzz, check_filter=check_filter)
+    fetches = required_fetches(scan_fetches(domain, domain_with_no_path, fld, dns.query), checks, request_filter)
+    deferred, proceed = deferred_fetches(fetches, checks, request_filter)
+    responses = ScanContext(fetch_responses(fetches, request_filter, deferred=deferred, proceed=proceed))
+
+    return run_checks(
+        domain,
+        domain_with_no_path,
+        responses,
+        print_headers=print_headers,
+        print_content=print_content,
+        json_output=json_output,
+        hide_output=hide_output,
+        fuzz=fuzz,
+        check_filter=check_filter,
+        request_filter=request_filter,
+        dns_resolver=dns_resolver,
+        extra_args=extra_args,
+        jobs=jobs,
+        bot_wall=proceed.bot_wall,
     )
 
-    responses["favicon_response"] = response_or_none(
-        f"https://{domain_with_no_path}/favicon.ico",
-        "favicon_response",
-        request_filter,
-        verify=False,
-        headers=DEFAULT_HEADERS,
-        timeout=3,
-    )
 
-    responses["dns_ns_response"] = response_or_none(
-        f"{dns_resolver}?name={domain_with_no_path}&type=NS", "dns_ns_response", request_filter
-    )
-    responses["dns_mx_response"] = response_or_none(
-        f"{dns_resolver}?name={domain_with_no_path}&type=MX", "dns_mx_response", request_filter
-    )
-    responses["dns_txt_response"] = response_or_none(
-        f"{dns_resolver}?name={domain_with_no_path}&type=TXT", "dns_txt_response", request_filter
-    )
-    responses["dns_spf_response"] = response_or_none(
-        f"{dns_resolver}?name={domain_with_no_path}&type=SPF", "dns_spf_response", request_filter
-    )
-    responses["dns_caa_response"] = response_or_none(
-        f"{dns_resolver}?name={domain_with_no_path}&type=CAA", "dns_caa_response", request_filter
-    )
-    responses["dns_a_response"] = response_or_none(
-        f"{dns_resolver}?name={domain_with_no_path}&type=A", "dns_aaaa_response", request_filter
-    )
-    responses["dns_aaaa_response"] = response_or_none(
-        f"{dns_resolver}?name={domain_with_no_path}&type=AAAA", "dns_aaaa_response", request_filter
+async def async_ready(
+    domain,
+    print_headers=False,
+    print_content=False,
+    json_output=False,
+    hide_output=False,
+    fuzz=False,
+    check_filter=None,
+    request_filter=None,
+    dns_resolver="https://dns.google/resolve",
+    extra_args={},
+    jobs=1,
+):
+    """
+    Asyncio version of `ready()` that returns the same list of results.
+
+    The responses, DNS lookups and TLS handshakes are made on the running event loop (with
+    `ready.athttp`, the DNS clients' `async_query` and `ready.tls.async_probe`), so many scans can be
+    in flight without a thread each. The checks still run in the loop's default executor: they're
+    CPU-bound parsing, which gains nothing from the event loop, and a few (like the SPF check) make
+    their own blocking DNS lookups. `ready_many()` gives the executor a thread per worker.
+    """
+    domain_with_no_path, fld = scan_domains(domain, hide_output)
+    dns = resolver.get_client(dns_resolver)
+    checks = select_checks(fuzz=fuzz, check_filter=check_filter)
+    fetches = required_fetches(
+        scan_fetches(domain, domain_with_no_path, fld, dns.async_query, asynchronous=True), checks, request_filter
     )
-    responses["dns_dmarc_response"] = response_or_none(
-        f"{dns_resolver}?name=_dmarc.{domain_with_no_path}&type=TXT", "dns_dmarc_response", request_filter
+    deferred, proceed = deferred_fetches(fetches, checks, request_filter)
+    responses = ScanContext(await async_fetch_responses(fetches, request_filter, deferred=deferred, proceed=proceed))
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        None,
+        functools.partial(
+            run_checks,
+            domain,
+            domain_with_no_path,
+            responses,
+            print_headers=print_headers,
+            print_content=print_content,
+            json_output=json_output,
+            hide_output=hide_output,
+            fuzz=fuzz,
+            check_filter=check_filter,
+            request_filter=request_filter,
+            dns_resolver=dns_resolver,
+            extra_args=extra_args,
+            jobs=jobs,
+            bot_wall=proceed.bot_wall,
+        ),
     )
 
-    if USE_FLD and domain != fld:
-        responses["response_fld"] = response_or_none(
-            f"https://{fld}", "response_fld", request_filter, verify=False, headers=DEFAULT_HEADERS, timeout=3
-        )
 
-        responses["dns_ns_response_fld"] = response_or_none(f"{dns_resolver}?name={fld}&type=NS")
-        responses["dns_mx_response_fld"] = response_or_none(f"{dns_resolver}?name={fld}&type=MX")
-        responses["dns_spf_response_fld"] = response_or_none(f"{dns_resolver}?name={fld}&type=SPF")
-        responses["dns_txt_response_fld"] = response_or_none(f"{dns_resolver}?name={fld}&type=TXT")
-        responses["dns_dmarc_response_fld"] = response_or_none(f"{dns_resolver}?name=_dmarc.{fld}&type=TXT")
-        responses["dns_caa_response_fld"] = response_or_none(f"{dns_resolver}?name={fld}&type=CAA")
+def run_checks(
+    domain,
+    domain_with_no_path,
+    responses,
+    print_headers=False,
+    print_content=False,
+    json_output=False,
+    hide_output=False,
+    fuzz=False,
+    check_filter=None,
+    request_filter=None,
+    dns_resolver="https://dns.google/resolve",
+    extra_args={},
+    jobs=1,
+    bot_wall=None,
+):
+    """
+    Runs the checks on the fetched `responses` and returns their ScanResults. `bot_wall` is whether
+    the page response is a bot protection page, which is worked out here unless it's already known.
+    """
+    extra_args = dict(extra_args)
+    responses = ScanContext.of(responses)
+
+    if not responses["response"]:
+        print(f"No response from https://{domain}")
+
+        if request_filter:
+            print("Request filter in place, continuing...")
+        else:
+            return None
 
-    checks = []
     is_html = responses["response"] and "html" in responses["response"].headers.get("content-type", "")
 
     extra_args["is_ipv6"] = False
@@ -255,214 +629,269 @@ def ready(
     if print_content:
         print(responses["response"].content)
 
-    # bad response checks go first
+    checks = select_checks(is_html, fuzz, check_filter)
+
+    extra_args["print_output"] = not hide_output
+    extra_args["dns_resolver"] = dns_resolver
+
+    # skip checks when the responses they need weren't fetched, or were skipped by the request filter
+    # (the page response is always in `responses`, as None when the filter skipped it)
     checks = [
-        check_bad_response_kasada,
-        check_bad_response_cloudflare,
+        c
+        for c in checks
+        if all(key in responses and (not request_filter or request_filter in key) for key in getattr(c, "requires", ()))
     ]
 
-    checks.extend(
-        [
-            check_http_to_https_redirect,
-            check_http_response_should_be_200,
-            check_http_response_should_include_content_type,
-            check_aaaa_record_exists,
-            check_hsts_header_should_be_included_in_response,
-            check_hsts_header_should_have_a_long_max_age,
-            check_hsts_header_should_have_includesubdomains,
-            check_hsts_header_should_have_preload,
-            check_csp_should_exist,
-            check_csp_should_start_with_defaultsrc_none,
-            check_csp_includes_default_or_script_directive,
-            check_csp_must_not_include_unsafe_inline,
-            check_csp_must_not_include_unsafe_eval,
-            check_csp_must_not_include_report_sample,
-            check_csp_upgrade_insecure_requests,
-            check_csp_must_not_include_reporturi,
-            check_csp_should_not_include_reportto,
-            check_csp_should_only_include_valid_directives,
-            check_report_to_header_must_not_be_included_in_response,
-            check_robots_txt_exists,
-            check_security_txt_exists,
-            check_security_txt_not_expired,
-            check_favicon_is_served,
-            check_http_response_should_be_gzipped,
-            check_http_content_type_header_contains_charset,
-            check_http_expires_header_not_used_without_cache_control,
-            check_http_cache_control_is_included,
-            check_http_p3p_header_is_not_set,
-            check_referrer_policy_should_be_set,
-            check_cross_origin_resource_policy_should_be_sameorigin,
-            check_cross_origin_opener_policy_should_be_sameorigin,
-            check_cross_origin_embedder_policy_should_be_require_corp,
-            check_should_not_include_leaky_headers,
-            check_ssl_expiry_should_be_less_than_one_year,
-            check_ssl_expiry_should_be_greater_than_five_days,
-            check_ssl_certificate_should_be_trusted,
-            check_ssl_connection_fails_with_tls_1_1,
-            check_ssl_connection_fails_with_tls_1_0,
-            check_dns_caa_record_should_exist,
-            check_dns_caa_record_should_include_accounturi,
-            check_dns_caa_record_should_include_validationmethods,
-            check_at_least_two_nameservers_configured,
-            check_cookies_should_be_samesite,
-            check_cookies_should_be_secure,
-            check_cookies_should_be_httponly,
-            check_spf_dash_all,
-            check_spf_record_should_exist,
-            check_spf_dns_record_does_not_exist,
-            check_spf_txt_record_should_disallow_all,
-            check_dmarc_record_should_exist,
-            check_dmarc_record_should_reject_failures,
-            check_spf_uses_less_than_10_requests,
-        ]
-    )
+    # the results of checks that read a bot protection page would be about the page, not the site
+    if bot_wall is None:
+        bot_wall = is_bot_wall(responses)
 
-    if is_html:
-        checks.extend(
-            [
-                check_permissions_policy_should_exist,
-                check_frame_ancestors_should_exist,
-                check_x_content_type_options_should_be_nosniff,
-                check_x_xss_protection_should_not_exist,
-                check_html_starts_with_doctype,
-                check_html_tag_includes_lang,
-                check_html_meta_charset,
-                check_html_includes_title,
-                check_html_includes_rel_icon,
-                check_html_should_not_use_schemeless_urls,
-                check_html_script_tags_use_sri,
-                check_html_should_not_use_unnecessary_entities,
-                check_html_should_not_be_cached_for_more_than_24_hours,
-                check_x_dns_prefetch_control_is_off,
-                check_cdns_should_not_be_used,
-                check_rss_should_return_cors_header,
-            ]
-        )
+    inconclusive = []
+    if bot_wall:
+        # listed by the ids their results would have had
+        inconclusive = [CHECK_IDS.get(c.__name__, c.__name__) for c in checks if reads_page(c)]
+        checks = [c for c in checks if not reads_page(c)]
 
-    if fuzz:
-        checks.extend(
-            [
-                check_swagger_should_not_return_200,
-            ]
-        )
+        if not hide_output:
+            print(f"The response is a bot protection page, skipping {len(inconclusive)} checks that read it")
 
-    extra_args["print_output"] = not hide_output
-    extra_args["dns_resolver"] = dns_resolver
+    def run_check(check):
+        return check(responses, domain=domain, domain_with_no_path=domain_with_no_path, **extra_args)
 
-    results = []
-    for c in checks:
-        if check_filter and check_filter not in c.__name__:
-            continue
+    if jobs > 1:
+        with _ordered_output() as output, ThreadPoolExecutor(max_workers=jobs) as executor:
+            futures = [executor.submit(output.capture, run_check, c) for c in checks]
 
-        result = c(responses, domain=domain, domain_with_no_path=domain_with_no_path, **extra_args)
-        if result:
-            results.append(result)
+        outcomes = []
+        for future in futures:
+            result, printed = future.result()
+            sys.stdout.write(printed)
+            outcomes.append(result)
+    else:
+        outcomes = [run_check(c) for c in checks]
+
+    results = ScanResults(result for result in outcomes if result)
+    results.inconclusive = inconclusive
 
     if json_output:
-        print(
-            json.dumps(
-                {
-                    "domain": domain,
-                    "score": score_from_results(results),
-                    "checks": {
-                        r.check: {
-                            "passed": r.passed,
-                            "message": r.message,
-                        }
-                        for r in results
-                    },
-                    "when": datetime.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
-                    "version": VERSION,
-                },
-                indent=2,
-            )
-        )
+        print(json.dumps(scan_report(domain, results), indent=2))
 
     return results
 
 
+class ScanResults(list):
+    """
+    The results of the checks in a scan. `inconclusive` has the ids of the checks that were skipped
+    because the response was a bot protection page.
+    """
+
+    inconclusive = []
+
+
+def scan_report(domain, results):
+    """
+    Returns the `--json` output for the results of a scan.
+    """
+    return {
+        "domain": domain,
+        "score": score_from_results(results),
+        "checks": {
+            r.check: {
+                "passed": r.passed,
+                "message": r.message,
+            }
+            for r in results
+        },
+        "inconclusive": getattr(results, "inconclusive", []),
+        "when": datetime.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "version": VERSION,
+    }
+
+
 def score_from_results(results):
     return 100 - 3 * len([x for x in results if not x.passed and not x.warn_on_fail])
 
 
-def parse_args(args):
-    result = {
-        a.split("=")[0]: (
-            int(a.split("=")[1]) if "=" in a and a.split("=")[1].isnumeric() else a.split("=")[1] if "=" in a else True
-        )
-        for a in args
-        if "--" in a
-    }
-    result["[]"] = [a for a in args if not a.startswith("--")]
-    return result
-
-
-def usage():
-    print("ready")
-    print("")
-    print("Usage: ready.py [--headers] [--content] [--json] [--quiet] [--score] [--fuzz] <domain>")
-    print("")
-    print("  --headers      Output the headers from the HTTPS request made to the domain")
-    print("  --content      Output the content from the HTTPS request made to the domain")
-    print("  --fuzz         Include checks that fuzz urls (only run this on your own domain)")
-    print("  --json         Provide JSON output")
-    print("  --quiet        No text output")
-    print("  --score        Print a score out of 100 for this domain")
-    print("  --doc          Print the list of check names")
-    print("  --version      Print version information")
-
-    print("\nDevelopment / experimental options for filtering checks and HTTP requests during testing:")
-    print("")
-    print("  --check-filter=<x>     Only run checks that match the provided filter")
-    print("  --request-filter=<x>   Only make HTTP requests that match the provided filter")
-
-
-def cli():
-    args = parse_args(sys.argv[1:])
-
-    if "--version" in args:
-        print(f"ready {VERSION}")
-        sys.exit()
-
-    if "--doc" in args:
-        for f in resources.files(checks_module).iterdir():
-            if f.name.endswith(".py"):
-                for line in open(f).readlines():
-                    if line.strip().startswith("# Check: "):
-                        print(line.strip().replace("# Check: ", "- "))
-        sys.exit()
-
-    if "--help" in args or not args["[]"]:
-        usage()
-        sys.exit()
-
-    resolver_name = args.get("--dns-resolver", "google")
-    if not resolver_name.startswith("http"):
-        if resolver_name.lower() in DNS_RESOLVERS:
-            dns_resolver = DNS_RESOLVERS[resolver_name.lower()]
-        else:
-            print(
-                f"{resolver_name} is not a valid DNS resolver name. Provide one of {DNS_RESOLVERS.keys()} or a full URI for the DoH resolver."
-            )
-            sys.exit(1)
-    else:
-        dns_resolver = resolver_name
-
-    results = ready(
-        args["[]"][0],
-        print_headers=args.get("--headers", False),
-        print_content=args.get("--content", False),
-        json_output=args.get("--json", False),
-        hide_output=args.get("--quiet", False),
-        fuzz=args.get("--fuzz", False),
-        check_filter=args.get("--check-filter", ""),
-        request_filter=args.get("--request-filter", ""),
-        dns_resolver=dns_resolver,
-    )
+def read_domains(lines):
+    """
+    Yields the domains from an iterable of lines, skipping blank lines and # comments.
+    """
+    for line in lines:
+        domain = line.split("#", 1)[0].strip()
+        if domain:
+            yield domain
+
+
+def ready_report(domain, **kwargs):
+    """
+    Scans `domain` with `ready()` and returns the `--json` output as a dict, or {"domain", "error"} when
+    the scan couldn't be made.
+    """
+    try:
+        results = ready(domain, hide_output=True, **kwargs)
+    except Exception as e:
+        return {"domain": domain, "error": f"{type(e).__name__}: {e}"}
+
+    if results is None:
+        return {"domain": domain, "error": f"No response from https://{domain}"}
+
+    return scan_report(domain, results)
+
+
+async def _async_scan_report(domain, **kwargs):
+    try:
+        results = await async_ready(domain, hide_output=True, **kwargs)
+    except Exception as e:
+        return {"domain": domain, "error": f"{type(e).__name__}: {e}"}
+
+    if results is None:
+        return {"domain": domain, "error": f"No response from https://{domain}"}
+
+    return scan_report(domain, results)
 
-    if "--score" in args:
-        print(f"Score: {score_from_results(results)}/100")
+
+async def async_ready_many(domains, output, workers=BATCH_WORKERS, **kwargs):
+    """
+    Scans each of the `domains` with `async_ready()`, `workers` at a time, and writes a line of JSON to
+    `output` as each scan finishes. Lines have the same shape as the `--json` output, or are
+    {"domain", "error"} when a scan couldn't be made. Returns the number of domains scanned.
+
+    Workers take the next domain from the iterable when they become free, so only `workers` domains
+    are held in memory however long the input is. `kwargs` are passed to `async_ready()`.
+    """
+    domains = iter(domains)
+    scanned = 0
+
+    async def worker():
+        nonlocal scanned
+
+        # the workers share the iterator, and the event loop only runs one of them at a time
+        for domain in domains:
+            output.write(json.dumps(await _async_scan_report(domain, **kwargs)) + "\n")
+            output.flush()
+            scanned += 1
+
+    await asyncio.gather(*[worker() for _ in range(workers)])
+    return scanned
+
+
+def _checks_executor(workers):
+    # the checks of every scan in flight run in the loop's default executor, so size it to match
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=workers))
+
+
+def ready_many(domains, output, workers=BATCH_WORKERS, **kwargs):
+    """
+    Runs `async_ready_many()` on a new event loop, whose default executor has a thread for each of
+    the `workers`.
+    """
+
+    async def run():
+        _checks_executor(workers)
+        return await async_ready_many(domains, output, workers=workers, **kwargs)
+
+    return asyncio.run(run())
+
+
+_shard_dns_resolver = None
+
+
+def _init_shard(dns_resolver_factory, scheduler_options):
+    global _shard_dns_resolver
+
+    # the parent process owns stdout, scans only write to it to report problems
+    sys.stdout = sys.stderr
+    _shard_dns_resolver = dns_resolver_factory() if dns_resolver_factory else None
+    scheduler.configure(**(scheduler_options or {}))
+
+
+def _scan_shard(domains, workers, kwargs):
+    if _shard_dns_resolver is not None:
+        kwargs = dict(kwargs, dns_resolver=_shard_dns_resolver)
+
+    async def scan():
+        _checks_executor(workers)
+        semaphore = asyncio.Semaphore(workers)
+
+        async def scan_one(domain):
+            async with semaphore:
+                return json.dumps(await _async_scan_report(domain, **kwargs)) + "\n"
+
+        return await asyncio.gather(*[scan_one(domain) for domain in domains])
+
+    lines = asyncio.run(scan())
+    # the process's scheduler stats so far, which the parent adds up
+    limits = scheduler.get_scheduler()
+    return lines, os.getpid(), limits.stats() if limits else None
+
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def ready_sharded(
+    domains,
+    output,
+    processes=None,
+    workers=BATCH_WORKERS,
+    chunk_size=SHARD_CHUNK_SIZE,
+    dns_resolver_factory=None,
+    scheduler_options=None,
+    scheduler_stats=None,
+    **kwargs,
+):
+    """
+    Scans the `domains` like `ready_many()`, but on a pool of `processes` worker processes (one per
+    core by default) so that parsing and checks aren't limited to the one core the GIL allows.
+
+    The domains are split into chunks of `chunk_size` and each process scans `workers` domains of a
+    chunk at a time. Lines are written to `output` in the same order as `domains`. At most two chunks
+    per process are read ahead of the output, so memory stays bounded when the output is slow or one
+    chunk takes a long time.
+
+    `kwargs` are passed to `async_ready()` in each process, so they have to be picklable. DNS clients
+    aren't, so pass `dns_resolver_factory`, a picklable function that returns the client each process
+    should use. Each process schedules its own requests with `scheduler.configure(**scheduler_options)`,
+    so the limits apply per process. Once the scan is done `scheduler_stats` (if given) is called with
+    the processes' `scheduler.stats()` added together, when requests were scheduled. Returns the
+    number of domains scanned.
+    """
+    processes = processes or os.cpu_count()
+    pending = deque()
+    scanned = 0
+    stats = {}
+
+    def write(future):
+        nonlocal scanned
+        lines, pid, process_stats = future.result()
+        output.writelines(lines)
+        output.flush()
+        scanned += len(lines)
+        if process_stats is not None:
+            # each process's stats add up over the chunks it scanned, so only its latest count
+            stats[pid] = process_stats
+
+    with ProcessPoolExecutor(processes, initializer=_init_shard, initargs=(dns_resolver_factory, scheduler_options)) as executor:
+        for chunk in _chunks(domains, chunk_size):
+            pending.append(executor.submit(_scan_shard, chunk, workers, kwargs))
+
+            if len(pending) >= processes * 2:
+                write(pending.popleft())
+
+        while pending:
+            write(pending.popleft())
+
+    if scheduler_stats and stats:
+        scheduler_stats(scheduler.merge_stats(stats.values()))
+
+    return scanned
 
 
 if __name__ == "__main__":
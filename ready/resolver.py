@@ -0,0 +1,759 @@
+"""
+DNS clients used for every DNS lookup made during a scan.
+
+Answers are returned as a `Response` whose `json` has the same shape as the DNS-over-HTTPS JSON API
+(https://developers.google.com/speed/public-dns/docs/doh/json), which is what the checks read.
+"""
+
+import asyncio
+import concurrent.futures
+import functools
+import json
+import queue
+import random
+import socket
+import sqlite3
+import struct
+import threading
+import time
+from base64 import urlsafe_b64encode
+from collections import OrderedDict
+from urllib.error import URLError
+from urllib.parse import urlsplit
+
+from ready import athttp, scheduler
+from ready.dnswire import RECORD_TYPES, DNSWireError, decode_message, encode_query, query_id
+from ready.thttp import Response, request
+
+STATUS_NOERROR = 0
+STATUS_NXDOMAIN = 3
+
+# Seconds to wait for a resolver before the same query is also sent to the next one
+HEDGE_DELAY = 0.25
+
+
+class LookupExecutor:
+    """
+    A thread pool for lookups that may be given up on (a hedged query that lost the race, or one that
+    missed a deadline). Unlike ThreadPoolExecutor its threads are daemons, so a lookup that's still
+    waiting on a slow resolver doesn't keep the process from exiting.
+    """
+
+    def __init__(self, max_workers):
+        self.max_workers = max_workers
+        self._queue = queue.SimpleQueue()
+        self._idle = threading.Semaphore(0)
+        self._threads = 0
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args):
+        future = concurrent.futures.Future()
+        self._queue.put((future, fn, args))
+
+        # like ThreadPoolExecutor, only start a thread when none is idle
+        if not self._idle.acquire(blocking=False):
+            with self._lock:
+                if self._threads < self.max_workers:
+                    self._threads += 1
+                    threading.Thread(target=self._work, daemon=True).start()
+
+        return future
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+
+            future, fn, args = item
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(fn(*args))
+                except BaseException as e:
+                    future.set_exception(e)
+
+            self._idle.release()
+
+    def shutdown(self):
+        """
+        Stops the threads once the lookups that were submitted have finished or been cancelled.
+        """
+        with self._lock:
+            for _ in range(self._threads):
+                self._queue.put(None)
+            self._threads = 0
+
+
+def answer_ttl(answer):
+    """
+    Returns how long a DNS answer can be cached for in seconds. Positive answers use the lowest TTL
+    in the answer section, negative answers (NXDOMAIN or no data) use the SOA minimum from the
+    authority section (RFC 2308) and everything else (SERVFAIL, missing SOA) isn't cached.
+    """
+    if not answer or answer.get("Status") not in (STATUS_NOERROR, STATUS_NXDOMAIN):
+        return 0
+
+    if answer.get("Answer"):
+        return min(r.get("TTL", 0) for r in answer["Answer"])
+
+    for r in answer.get("Authority", []):
+        if r.get("type") == RECORD_TYPES["SOA"]:
+            try:
+                return min(r.get("TTL", 0), int(r["data"].split()[-1]))
+            except (KeyError, IndexError, ValueError):
+                return 0
+
+    return 0
+
+
+class MemoryCache:
+    """
+    A thread-safe in-process cache of DNS answers that keeps at most `max_entries` answers.
+    """
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if not entry:
+                return None
+
+            value, expires = entry
+            if expires <= time.monotonic():
+                del self._entries[key]
+                return None
+
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class SQLiteCache:
+    """
+    A cache of DNS answers in an SQLite database at `path` that can be shared by every process on the
+    machine. The database uses write-ahead logging so that readers don't block writers, and a
+    cache that's busy or broken is treated as a miss rather than failing the lookup.
+    """
+
+    PRUNE_INTERVAL = 1000
+
+    def __init__(self, path, timeout=5.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        self._sets = 0
+
+        db = self._db()
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS answers ("
+            "name TEXT, type TEXT, expires REAL, status INTEGER, url TEXT, headers TEXT, content BLOB, json TEXT, "
+            "PRIMARY KEY (name, type))"
+        )
+
+    def _db(self):
+        # sqlite3 connections can't be shared between threads, so each thread gets its own
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+            with self._lock:
+                self._connections.append(db)
+
+        return db
+
+    def get(self, key):
+        name, record_type = key
+        try:
+            row = (
+                self._db()
+                .execute(
+                    "SELECT status, url, headers, content, json FROM answers WHERE name = ? AND type = ? AND expires > ?",
+                    (name, record_type, time.time()),
+                )
+                .fetchone()
+            )
+        except sqlite3.Error:
+            return None
+
+        if not row:
+            return None
+
+        status, url, headers, content, answer = row
+        return Response(None, content, json.loads(answer), status, url, json.loads(headers), None)
+
+    def set(self, key, value, ttl):
+        name, record_type = key
+        content = value.content if isinstance(value.content, bytes) else (value.content or "").encode()
+
+        try:
+            db = self._db()
+            db.execute(
+                "INSERT OR REPLACE INTO answers VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    name,
+                    record_type,
+                    time.time() + ttl,
+                    value.status,
+                    value.url,
+                    json.dumps(value.headers),
+                    content,
+                    json.dumps(value.json),
+                ),
+            )
+
+            with self._lock:
+                self._sets += 1
+                prune = self._sets % self.PRUNE_INTERVAL == 0
+            if prune:
+                db.execute("DELETE FROM answers WHERE expires <= ?", (time.time(),))
+        except sqlite3.Error:
+            pass
+
+    def close(self):
+        with self._lock:
+            connections, self._connections = self._connections, []
+
+        for db in connections:
+            db.close()
+        self._local = threading.local()
+
+
+class DNSClient:
+    """
+    Base class for DNS clients. Subclasses implement `lookup()` (and optionally `async_lookup()`),
+    and answers are cached for their TTL in `cache`. A `timeout` passed to a lookup caps the client's
+    own timeout for that lookup.
+    """
+
+    def __init__(self, cache=None):
+        self.cache = MemoryCache() if cache is None else cache
+
+    @staticmethod
+    def cache_key(name, record_type):
+        return (name.lower().rstrip("."), record_type.upper())
+
+    def _store(self, key, response):
+        ttl = answer_ttl(response.json)
+        if ttl > 0:
+            self.cache.set(key, response, ttl)
+
+    def query(self, name, record_type):
+        key = self.cache_key(name, record_type)
+
+        response = self.cache.get(key)
+        if response is None:
+            response = self.lookup(name, record_type)
+            self._store(key, response)
+
+        return response
+
+    async def async_query(self, name, record_type):
+        key = self.cache_key(name, record_type)
+
+        response = self.cache.get(key)
+        if response is None:
+            response = await self.async_lookup(name, record_type)
+            self._store(key, response)
+
+        return response
+
+    def _timeout(self, timeout):
+        # the lower of the client's own timeout and the one for this lookup
+        limits = [t for t in (getattr(self, "timeout", None), timeout) if t is not None]
+        return min(limits) if limits else None
+
+    def lookup(self, name, record_type, timeout=None):
+        raise NotImplementedError
+
+    async def async_lookup(self, name, record_type, timeout=None):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(self.lookup, name, record_type, timeout=timeout))
+
+
+class DoHClient(DNSClient):
+    """
+    Looks up records with a resolver's DNS-over-HTTPS JSON API (`?name=&type=`).
+    """
+
+    def __init__(self, resolver, cache=None, timeout=None):
+        super().__init__(cache)
+        self.resolver = resolver
+        self.timeout = timeout
+        self.rate_key = ("resolver", resolver)
+
+    def url(self, name, record_type):
+        return f"{self.resolver}?name={name}&type={record_type}"
+
+    @staticmethod
+    def _with_json(response):
+        # some resolvers answer with application/dns-json, which thttp doesn't parse
+        if response.json is None:
+            return response._replace(json=json.loads(response.content))
+
+        return response
+
+    def lookup(self, name, record_type, timeout=None):
+        return self._with_json(request(self.url(name, record_type), timeout=self._timeout(timeout), rate_key=self.rate_key))
+
+    async def async_lookup(self, name, record_type, timeout=None):
+        return self._with_json(
+            await athttp.request(self.url(name, record_type), timeout=self._timeout(timeout), rate_key=self.rate_key)
+        )
+
+
+class DoHWireClient(DoHClient):
+    """
+    Looks up records with RFC 8484 DNS-over-HTTPS (`?dns=` with application/dns-message), which is
+    smaller on the wire and cheaper to parse than the JSON API.
+    """
+
+    HEADERS = {"accept": "application/dns-message"}
+
+    def url(self, name, record_type):
+        # a query ID of 0 lets HTTP caches share answers (RFC 8484 section 4.1)
+        query = urlsafe_b64encode(encode_query(name, record_type, query_id=0)).rstrip(b"=").decode()
+        return f"{self.resolver}?dns={query}"
+
+    @staticmethod
+    def _decoded(response):
+        if response.status != 200:
+            raise URLError(f"DoH resolver returned HTTP {response.status}")
+
+        return response._replace(json=decode_message(response.content))
+
+    def lookup(self, name, record_type, timeout=None):
+        return self._decoded(
+            request(self.url(name, record_type), headers=self.HEADERS, timeout=self._timeout(timeout), rate_key=self.rate_key)
+        )
+
+    async def async_lookup(self, name, record_type, timeout=None):
+        return self._decoded(
+            await athttp.request(
+                self.url(name, record_type), headers=self.HEADERS, timeout=self._timeout(timeout), rate_key=self.rate_key
+            )
+        )
+
+
+def _recv_exactly(sock, length):
+    data = b""
+    while len(data) < length:
+        chunk = sock.recv(length - len(data))
+        if not chunk:
+            raise ConnectionError("Connection closed by the name server")
+        data += chunk
+    return data
+
+
+class _DatagramQuery(asyncio.DatagramProtocol):
+    # the endpoint of one async lookup, which waits for the answer with its query ID
+    def __init__(self, qid, answered):
+        self.qid = qid
+        self.answered = answered
+
+    def datagram_received(self, data, addr):
+        if len(data) >= 12 and query_id(data) == self.qid and not self.answered.done():
+            self.answered.set_result(data)
+
+    def error_received(self, exc):
+        # ICMP port unreachable, nothing is listening on the resolver's port
+        if not self.answered.done():
+            self.answered.set_exception(exc)
+
+    def connection_lost(self, exc):
+        if exc and not self.answered.done():
+            self.answered.set_exception(exc)
+
+
+class UDPClient(DNSClient):
+    """
+    Sends queries straight to a recursive resolver over UDP, retrying over TCP when an answer is
+    truncated (RFC 7766).
+
+    Every lookup shares one UDP socket. Queries get random IDs and a receiver thread hands each
+    answer to the lookup waiting on that ID, so many queries can be in flight at once. Async lookups
+    each open their own datagram endpoint on the running event loop instead, so they never block it.
+    Unanswered queries are resent `retries` times before a TimeoutError is raised.
+    """
+
+    def __init__(self, host, port=53, cache=None, timeout=5.0, retries=1):
+        super().__init__(cache)
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.retries = retries
+        self.resolver = f"udp://{host}:{port}"
+        self.rate_key = ("resolver", self.resolver)
+
+        self._sock = None
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def _socket(self):
+        # called with self._lock held
+        if self._sock is None:
+            family, _, _, _, address = socket.getaddrinfo(self.host, self.port, type=socket.SOCK_DGRAM)[0]
+            self._sock = socket.socket(family, socket.SOCK_DGRAM)
+            self._sock.connect(address)
+            threading.Thread(target=self._receive, args=(self._sock,), daemon=True).start()
+
+        return self._sock
+
+    def _fail_pending(self, error):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(error)
+
+    def _receive(self, sock):
+        while True:
+            try:
+                message = sock.recv(65535)
+            except ConnectionRefusedError as e:
+                # ICMP port unreachable, nothing is listening on the resolver's port
+                self._fail_pending(e)
+                continue
+            except OSError as e:
+                with self._lock:
+                    if self._sock is sock:
+                        self._sock = None
+                self._fail_pending(e)
+                return
+
+            if len(message) < 12:
+                continue
+
+            with self._lock:
+                future = self._pending.pop(query_id(message), None)
+
+            if future:
+                try:
+                    future.set_result(message)
+                except concurrent.futures.InvalidStateError:
+                    pass  # the lookup gave up waiting
+
+    def _send(self, name, record_type):
+        future = concurrent.futures.Future()
+
+        with self._lock:
+            sock = self._socket()
+            qid = random.randint(0, 0xFFFF)
+            while qid in self._pending:
+                qid = random.randint(0, 0xFFFF)
+            self._pending[qid] = future
+
+        query = encode_query(name, record_type, query_id=qid)
+        sock.send(query)
+        return qid, query, future
+
+    def _forget(self, qid):
+        with self._lock:
+            self._pending.pop(qid, None)
+
+    def _tcp(self, query, timeout):
+        with socket.create_connection((self.host, self.port), timeout=timeout) as sock:
+            sock.sendall(struct.pack("!H", len(query)) + query)
+            length = struct.unpack("!H", _recv_exactly(sock, 2))[0]
+            return _recv_exactly(sock, length)
+
+    def _response(self, name, record_type, message, answer):
+        question = answer["Question"][0] if answer["Question"] else {}
+        expected = (name.lower().rstrip(".") + ".", RECORD_TYPES[record_type.upper()])
+        if (question.get("name", "").lower(), question.get("type")) != expected:
+            raise DNSWireError(f"Answer from {self.resolver} doesn't match the query for {name} {record_type}")
+
+        return Response(None, message, answer, 200, self.resolver, {"content-type": "application/dns-message"}, None)
+
+    def lookup(self, name, record_type, timeout=None):
+        timeout = self._timeout(timeout)
+
+        for _ in range(self.retries + 1):
+            with scheduler.slot(self.rate_key):
+                qid, query, future = self._send(name, record_type)
+                try:
+                    message = future.result(timeout)
+                except concurrent.futures.TimeoutError:
+                    continue
+                finally:
+                    self._forget(qid)
+
+            answer = decode_message(message)
+            if answer["TC"]:
+                message = self._tcp(query, timeout)
+                answer = decode_message(message)
+
+            return self._response(name, record_type, message, answer)
+
+        raise TimeoutError(f"No answer from {self.resolver} for {name} {record_type}")
+
+    async def _async_tcp(self, query, timeout):
+        async def exchange():
+            reader, writer = await asyncio.open_connection(self.host, self.port)
+            try:
+                writer.write(struct.pack("!H", len(query)) + query)
+                length = struct.unpack("!H", await reader.readexactly(2))[0]
+                return await reader.readexactly(length)
+            except asyncio.IncompleteReadError:
+                raise ConnectionError("Connection closed by the name server")
+            finally:
+                writer.close()
+
+        return await asyncio.wait_for(exchange(), timeout)
+
+    async def async_lookup(self, name, record_type, timeout=None):
+        timeout = self._timeout(timeout)
+        loop = asyncio.get_running_loop()
+
+        qid = random.randint(0, 0xFFFF)
+        query = encode_query(name, record_type, query_id=qid)
+        answered = loop.create_future()
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: _DatagramQuery(qid, answered), remote_addr=(self.host, self.port)
+        )
+
+        try:
+            for _ in range(self.retries + 1):
+                async with scheduler.slot(self.rate_key):
+                    transport.sendto(query)
+                    try:
+                        # shielded, so a late answer to an earlier send still counts
+                        message = await asyncio.wait_for(asyncio.shield(answered), timeout)
+                        break
+                    except asyncio.TimeoutError:
+                        continue
+            else:
+                raise TimeoutError(f"No answer from {self.resolver} for {name} {record_type}")
+        finally:
+            transport.close()
+
+        answer = decode_message(message)
+        if answer["TC"]:
+            message = await self._async_tcp(query, timeout)
+            answer = decode_message(message)
+
+        return self._response(name, record_type, message, answer)
+
+    def close(self):
+        with self._lock:
+            sock, self._sock = self._sock, None
+
+        if sock:
+            sock.close()
+
+
+class HedgedDNSClient(DNSClient):
+    """
+    Sends each query to the fastest of `clients` and, if it hasn't answered within `delay`
+    seconds (or fails), to the next fastest as well, and so on. The first NOERROR or NXDOMAIN
+    answer wins. A lookup that takes longer than `timeout` seconds raises TimeoutError.
+
+    The latency of every resolver is tracked as an exponentially weighted moving average so that
+    a resolver that's slow or failing moves to the back of the queue. Queries that lose the race
+    keep running in the background until they complete, so their latency is recorded, but each one
+    is given until the hedged lookup's deadline at most.
+    """
+
+    SMOOTHING = 0.3
+
+    def __init__(self, clients, delay=HEDGE_DELAY, timeout=10.0, cache=None):
+        super().__init__(cache)
+        self.clients = list(clients)
+        self.delay = delay
+        self.timeout = timeout
+
+        self._stats = {id(c): {"resolver": c.resolver, "latency": 0.0, "queries": 0, "failures": 0, "wins": 0} for c in clients}
+        self._lock = threading.Lock()
+        self._executor = LookupExecutor(max_workers=8 * len(self.clients))
+        self._background = set()
+
+    def ranked(self):
+        """
+        Returns the clients from fastest to slowest (resolvers that haven't been used yet keep
+        their original order at the front).
+        """
+        with self._lock:
+            return sorted(self.clients, key=lambda c: self._stats[id(c)]["latency"])
+
+    def stats(self):
+        with self._lock:
+            return [dict(self._stats[id(c)]) for c in self.clients]
+
+    def _record(self, client, started, ok):
+        # failures are counted as taking the full timeout so the resolver is ranked last
+        elapsed = time.monotonic() - started if ok else self.timeout
+
+        with self._lock:
+            stats = self._stats[id(client)]
+            stats["latency"] = (
+                elapsed if not stats["queries"] else self.SMOOTHING * elapsed + (1 - self.SMOOTHING) * stats["latency"]
+            )
+            stats["queries"] += 1
+            stats["failures"] += 0 if ok else 1
+
+    def _win(self, client):
+        with self._lock:
+            self._stats[id(client)]["wins"] += 1
+
+    @staticmethod
+    def _valid(response):
+        return response is not None and (response.json or {}).get("Status") in (STATUS_NOERROR, STATUS_NXDOMAIN)
+
+    def _timed_lookup(self, client, name, record_type, timeout):
+        started = time.monotonic()
+        try:
+            response = client.lookup(name, record_type, timeout=timeout)
+        except Exception:
+            self._record(client, started, False)
+            raise
+
+        self._record(client, started, self._valid(response))
+        return response
+
+    def lookup(self, name, record_type, timeout=None):
+        timeout = self._timeout(timeout)
+        deadline = time.monotonic() + timeout
+        queue = self.ranked()
+        running = {}
+        fallback, error = None, None
+
+        while queue or running:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+
+            if queue:
+                client = queue.pop(0)
+                running[self._executor.submit(self._timed_lookup, client, name, record_type, remaining)] = client
+
+            done, _ = concurrent.futures.wait(
+                running,
+                timeout=min(self.delay, remaining) if queue else remaining,
+                return_when=concurrent.futures.FIRST_COMPLETED,
+            )
+
+            for future in done:
+                client = running.pop(future)
+                try:
+                    response = future.result()
+                except Exception as e:
+                    error = e
+                    continue
+
+                if self._valid(response):
+                    self._win(client)
+                    return response
+                fallback = response
+
+        if fallback is not None:
+            return fallback
+        if error is not None and not running:
+            raise error
+        raise TimeoutError(f"No answer for {name} {record_type} within {timeout} seconds")
+
+    async def _async_timed_lookup(self, client, name, record_type, timeout):
+        # only lookups that complete are recorded, not ones cancelled when the loop is shut down
+        started = time.monotonic()
+        try:
+            response = await client.async_lookup(name, record_type, timeout=timeout)
+        except Exception:
+            self._record(client, started, False)
+            raise
+
+        self._record(client, started, self._valid(response))
+        return response
+
+    def _done_in_background(self, task):
+        self._background.discard(task)
+        if not task.cancelled():
+            # the losers' errors don't matter
+            task.exception()
+
+    async def async_lookup(self, name, record_type, timeout=None):
+        loop = asyncio.get_running_loop()
+        timeout = self._timeout(timeout)
+        deadline = loop.time() + timeout
+        queue = self.ranked()
+        running = {}
+        fallback, error = None, None
+
+        try:
+            while queue or running:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+
+                if queue:
+                    client = queue.pop(0)
+                    running[asyncio.ensure_future(self._async_timed_lookup(client, name, record_type, remaining))] = client
+
+                done, _ = await asyncio.wait(
+                    running, timeout=min(self.delay, remaining) if queue else remaining, return_when=asyncio.FIRST_COMPLETED
+                )
+
+                for task in done:
+                    client = running.pop(task)
+                    try:
+                        response = task.result()
+                    except Exception as e:
+                        error = e
+                        continue
+
+                    if self._valid(response):
+                        self._win(client)
+                        return response
+                    fallback = response
+        finally:
+            # like the threads of lookup(), the losers run on until they complete
+            for task in running:
+                self._background.add(task)
+                task.add_done_callback(self._done_in_background)
+
+        if fallback is not None:
+            return fallback
+        if error is not None and not running:
+            raise error
+        raise TimeoutError(f"No answer for {name} {record_type} within {timeout} seconds")
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(resolver, wire_format=False, cache=None):
+    """
+    Returns a DNSClient for `resolver`, which is either a DNSClient, the URL of a DoH resolver or
+    `udp://host:port` for a plain DNS resolver. `wire_format` selects RFC 8484 binary DoH instead of
+    the JSON API and `cache` replaces the default in-memory cache (with an SQLiteCache, for
+    example). Clients are shared by every scan in the process so that they share a cache.
+    """
+    if isinstance(resolver, DNSClient):
+        return resolver
+
+    key = (resolver, wire_format, id(cache))
+
+    with _clients_lock:
+        if key not in _clients:
+            if resolver.startswith("udp://"):
+                url = urlsplit(resolver)
+                _clients[key] = UDPClient(url.hostname, url.port or 53, cache=cache)
+            elif wire_format:
+                _clients[key] = DoHWireClient(resolver, cache=cache)
+            else:
+                _clients[key] = DoHClient(resolver, cache=cache)
+
+        return _clients[key]
@@ -0,0 +1,256 @@
+"""
+Politeness limits for the requests made during scans.
+
+A Scheduler keeps a token bucket for each host that's scanned and each DNS resolver that's queried,
+and caps the number of requests in flight in the process. A request that would go over a limit
+waits for its turn instead of being made (and refused, or silently answered with nothing), so batch
+scans run as fast as the limits allow.
+
+Requests made with `ready.thttp`, `ready.athttp`, `ready.tls` and the DNS clients wait for a `slot()`
+with a key like ("host", "example.com") or ("resolver", url). Nothing is limited until `configure()`
+is called.
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict, deque
+from urllib.parse import urlsplit
+
+
+class TokenBucket:
+    """
+    Allows `rate` requests per second on average, and bursts of up to `burst` requests.
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def reserve(self):
+        """
+        Takes a token and returns the number of seconds to wait before using it. Tokens can be
+        taken before they're available, so callers are served in the order they reserved.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate) - 1
+        self.updated = now
+        return 0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+class Scheduler:
+    """
+    Rate limits requests by the kind of their key ("host" or "resolver") and caps the number of
+    requests in flight at `max_concurrency`. A rate of None doesn't limit that kind of request. Up to
+    `max_keys` buckets are kept, the least recently used are dropped after that.
+    """
+
+    def __init__(self, host_rate=None, resolver_rate=None, max_concurrency=None, burst=None, max_keys=10000):
+        self.rates = {"host": host_rate, "resolver": resolver_rate}
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.max_keys = max_keys
+
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()
+        self._in_flight = 0
+        self._waiters = deque()
+
+        self._waiting = 0
+        self._stats = {"requests": 0, "max_waiting": 0, "wait_seconds_total": 0.0, "wait_seconds_max": 0.0}
+        self._kinds = {}
+
+    def _reserve(self, key):
+        rate = self.rates.get(key[0])
+        if not rate:
+            return 0
+
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(rate, self.burst or max(1, rate))
+                while len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            self._buckets.move_to_end(key)
+
+            return bucket.reserve()
+
+    def _try_acquire(self, wake):
+        # returns True if a request slot was free, or queues `wake` to be called when one is handed over
+        with self._lock:
+            if self.max_concurrency is None or (self._in_flight < self.max_concurrency and not self._waiters):
+                self._in_flight += 1
+                return True
+
+            self._waiters.append(wake)
+            return False
+
+    def release(self):
+        with self._lock:
+            if not self._waiters:
+                self._in_flight -= 1
+                return
+
+            # the slot goes straight to the next waiter, so _in_flight doesn't change
+            wake = self._waiters.popleft()
+
+        wake()
+
+    def _start_waiting(self):
+        with self._lock:
+            self._waiting += 1
+            self._stats["max_waiting"] = max(self._stats["max_waiting"], self._waiting)
+
+    def _stop_waiting(self, key, waited):
+        with self._lock:
+            self._waiting -= 1
+            self._stats["requests"] += 1
+            self._stats["wait_seconds_total"] += waited
+            self._stats["wait_seconds_max"] = max(self._stats["wait_seconds_max"], waited)
+
+            kind = self._kinds.setdefault(key[0], {"requests": 0, "wait_seconds_total": 0.0})
+            kind["requests"] += 1
+            kind["wait_seconds_total"] += waited
+
+    def acquire(self, key):
+        started = time.monotonic()
+        self._start_waiting()
+
+        try:
+            delay = self._reserve(key)
+            if delay:
+                time.sleep(delay)
+
+            handed_over = threading.Event()
+            if not self._try_acquire(handed_over.set):
+                handed_over.wait()
+        finally:
+            self._stop_waiting(key, time.monotonic() - started)
+
+    async def async_acquire(self, key):
+        started = time.monotonic()
+        self._start_waiting()
+
+        try:
+            delay = self._reserve(key)
+            if delay:
+                await asyncio.sleep(delay)
+
+            loop = asyncio.get_running_loop()
+            handed_over = loop.create_future()
+
+            def wake():
+                loop.call_soon_threadsafe(lambda: handed_over.done() or handed_over.set_result(None))
+
+            if not self._try_acquire(wake):
+                try:
+                    await handed_over
+                except asyncio.CancelledError:
+                    with self._lock:
+                        queued = wake in self._waiters
+                        if queued:
+                            self._waiters.remove(wake)
+                    if not queued:
+                        # the slot was handed over as the wait was cancelled
+                        self.release()
+                    raise
+        finally:
+            self._stop_waiting(key, time.monotonic() - started)
+
+    def slot(self, key):
+        return _Slot(self, key)
+
+    def stats(self):
+        """
+        Returns the number of requests made, how many are waiting and in flight right now, the most
+        that were waiting at once, the total and longest waits in seconds, and the requests and total
+        wait for each kind of key.
+        """
+        with self._lock:
+            return dict(
+                self._stats,
+                waiting=self._waiting,
+                in_flight=self._in_flight,
+                kinds={kind: dict(stats) for kind, stats in self._kinds.items()},
+            )
+
+
+class _Slot:
+    # a context manager for both `with` and `async with`, as contextlib.nullcontext only supports
+    # `async with` from Python 3.10
+    def __init__(self, scheduler, key):
+        self.scheduler = scheduler
+        self.key = key
+
+    def __enter__(self):
+        if self.scheduler:
+            self.scheduler.acquire(self.key)
+
+    def __exit__(self, *exc_info):
+        if self.scheduler:
+            self.scheduler.release()
+
+    async def __aenter__(self):
+        if self.scheduler:
+            await self.scheduler.async_acquire(self.key)
+
+    async def __aexit__(self, *exc_info):
+        if self.scheduler:
+            self.scheduler.release()
+
+
+_scheduler = None
+
+
+def configure(host_rate=None, resolver_rate=None, max_concurrency=None, **kwargs):
+    """
+    Sets the scheduler for requests made by this process and returns it. With no limits, requests
+    aren't scheduled at all.
+    """
+    global _scheduler
+
+    if host_rate or resolver_rate or max_concurrency:
+        _scheduler = Scheduler(host_rate, resolver_rate, max_concurrency, **kwargs)
+    else:
+        _scheduler = None
+
+    return _scheduler
+
+
+def get_scheduler():
+    return _scheduler
+
+
+def slot(key):
+    """
+    Returns a context manager (for `with` or `async with`) that waits until a request for `key` is
+    allowed by the scheduler.
+    """
+    return _Slot(_scheduler, key)
+
+
+def merge_stats(stats):
+    """
+    Returns the `Scheduler.stats()` of several schedulers (one per process, say) added together, with
+    the most waiting at once and the longest wait of any of them.
+    """
+    merged = {"requests": 0, "max_waiting": 0, "wait_seconds_total": 0.0, "wait_seconds_max": 0.0}
+    merged.update(waiting=0, in_flight=0, kinds={})
+
+    for s in stats:
+        for key in ("requests", "wait_seconds_total", "waiting", "in_flight"):
+            merged[key] += s[key]
+        for key in ("max_waiting", "wait_seconds_max"):
+            merged[key] = max(merged[key], s[key])
+        for kind, kind_stats in s["kinds"].items():
+            totals = merged["kinds"].setdefault(kind, {"requests": 0, "wait_seconds_total": 0.0})
+            totals["requests"] += kind_stats["requests"]
+            totals["wait_seconds_total"] += kind_stats["wait_seconds_total"]
+
+    return merged
+
+
+def host_key(url):
+    return ("host", urlsplit(url).hostname or "")
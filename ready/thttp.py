@@ -7,19 +7,27 @@ https://github.com/sesh/thttp
 
 import gzip
 import json as json_lib
-import ssl
+import threading
+import time
 from base64 import b64encode
 from collections import namedtuple
+from http.client import HTTPConnection
 from http.cookiejar import CookieJar
+from io import BytesIO
 from urllib.error import HTTPError, URLError
 from urllib.parse import urlencode
 from urllib.request import (
     HTTPCookieProcessor,
+    HTTPHandler,
     HTTPRedirectHandler,
     HTTPSHandler,
     Request,
     build_opener,
 )
+from urllib.response import addinfourl
+
+from ready import scheduler
+from ready.tls import ResumingHTTPSConnection, get_context
 
 Response = namedtuple("Response", "request content json status url headers cookiejar")
 
@@ -32,6 +40,139 @@ class NoRedirect(HTTPRedirectHandler):
         return None
 
 
+class ConnectionPool:
+    """
+    Keeps idle HTTP(S) connections so that later requests to the same host can skip the TCP and TLS
+    handshakes. At most `max_per_host` idle connections are kept for each host, and connections that
+    have been idle for more than `idle_timeout` seconds are closed instead of being reused.
+    """
+
+    def __init__(self, max_per_host=4, idle_timeout=30):
+        self.max_per_host = max_per_host
+        self.idle_timeout = idle_timeout
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        now = time.monotonic()
+
+        with self._lock:
+            connections = self._idle.get(key, [])
+            while connections:
+                conn, last_used = connections.pop()
+                if now - last_used < self.idle_timeout:
+                    return conn
+                conn.close()
+
+        return None
+
+    def put(self, key, conn):
+        now = time.monotonic()
+
+        with self._lock:
+            # close anything that has expired while we hold the lock
+            for k, connections in list(self._idle.items()):
+                for c, last_used in connections:
+                    if now - last_used >= self.idle_timeout:
+                        c.close()
+                self._idle[k] = [(c, last_used) for c, last_used in connections if now - last_used < self.idle_timeout]
+
+            connections = self._idle.setdefault(key, [])
+            if len(connections) < self.max_per_host:
+                connections.append((conn, now))
+                return
+
+        conn.close()
+
+    def close(self):
+        with self._lock:
+            for connections in self._idle.values():
+                for conn, _ in connections:
+                    conn.close()
+            self._idle = {}
+
+
+DEFAULT_POOL = ConnectionPool()
+
+
+class KeepAliveHandler(HTTPHandler, HTTPSHandler):
+    """
+    Replaces urllib's HTTP and HTTPS handlers (which always send "Connection: close") with ones that
+    take connections from, and return them to, a `ConnectionPool`. Each request (including each
+    redirect) waits for a `ready.scheduler` slot for its host, or for `rate_key` if it's given.
+    """
+
+    def __init__(self, pool, context, verify, rate_key=None):
+        HTTPSHandler.__init__(self, context=context)
+        self.pool = pool
+        self.verify = verify
+        self.rate_key = rate_key
+
+    def http_open(self, req):
+        return self.do_open_pooled(HTTPConnection, req)
+
+    def https_open(self, req):
+        return self.do_open_pooled(ResumingHTTPSConnection, req, context=self._context)
+
+    def do_open_pooled(self, http_class, req, **http_conn_args):
+        if not req.host:
+            raise URLError("no host given")
+
+        if req._tunnel_host:  # pragma: no cover
+            return self.do_open(http_class, req, **http_conn_args)
+
+        key = (req.type, req.host, self.verify)
+        headers = dict(req.unredirected_hdrs)
+        headers.update({k: v for k, v in req.headers.items() if k not in headers})
+        headers = {name.title(): val for name, val in headers.items()}
+
+        with scheduler.slot(self.rate_key or scheduler.host_key(req.full_url)):
+            conn = self.pool.get(key)
+            if conn:
+                try:
+                    return self._send(conn, key, req, headers, reused=True)
+                except ConnectionError:
+                    # the server closed the idle connection, try again with a new one
+                    pass
+
+            conn = http_class(req.host, timeout=req.timeout, **http_conn_args)
+            return self._send(conn, key, req, headers)
+
+    def _send(self, conn, key, req, headers, reused=False):
+        if reused:
+            conn.timeout = req.timeout
+            if conn.sock:
+                conn.sock.settimeout(req.timeout)
+
+        try:
+            try:
+                conn.request(
+                    req.get_method(), req.selector, req.data, headers, encode_chunked=req.has_header("Transfer-encoding")
+                )
+            except OSError as err:
+                if reused and isinstance(err, ConnectionError):
+                    raise
+                raise URLError(err)
+
+            r = conn.getresponse()
+            content = r.read()
+        except:
+            conn.close()
+            raise
+
+        if isinstance(conn, ResumingHTTPSConnection):
+            conn.save_session()
+
+        if r.will_close:
+            conn.close()
+        else:
+            self.pool.put(key, conn)
+
+        resp = addinfourl(BytesIO(content), r.msg, req.get_full_url(), r.status)
+        resp.msg = r.reason
+        return resp
+
+
 def request(
     url,
     params={},
@@ -44,6 +185,8 @@ def request(
     cookiejar=None,
     basic_auth=None,
     timeout=None,
+    pool=None,
+    rate_key=None,
 ):
     """
     Returns a (named)tuple with the following properties:
@@ -55,6 +198,10 @@ def request(
         - status
         - url (final url, after any redirects)
         - cookiejar
+
+    Connections are kept alive in `pool` (a ConnectionPool, defaults to DEFAULT_POOL) and reused by
+    later requests to the same host. Requests are scheduled by host, or by `rate_key` if it's given
+    (see `ready.scheduler`).
     """
     method = method.upper()
     headers = {k.lower(): v for k, v in headers.items()}  # lowecase headers
@@ -81,13 +228,10 @@ def request(
     if not cookiejar:
         cookiejar = CookieJar()
 
-    ctx = ssl.create_default_context()
-    if not verify:  # ignore ssl errors
-        ctx.check_hostname = False
-        ctx.verify_mode = ssl.CERT_NONE
+    ctx = get_context(verify)
 
     handlers = []
-    handlers.append(HTTPSHandler(context=ctx))
+    handlers.append(KeepAliveHandler(pool or DEFAULT_POOL, ctx, verify, rate_key))
     handlers.append(HTTPCookieProcessor(cookiejar=cookiejar))
 
     if not redirect:
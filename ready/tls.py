@@ -0,0 +1,295 @@
+"""
+Shared SSLContext objects and TLS sessions for the HTTPS requests and TLS probes made during a scan.
+
+Creating an SSLContext loads the system CA bundle, so contexts are created once per combination of
+settings and reused by every request, check and scan in the process. TLS sessions are kept per host
+so that later handshakes to the same host can be resumed.
+"""
+
+import asyncio
+import socket
+import ssl
+import threading
+import warnings
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from http.client import HTTPConnection, HTTPSConnection
+
+from ready import scheduler
+
+MAX_SESSIONS = 1024
+CONNECTION_TIMEOUT = 5.0
+
+TLSProbe = namedtuple("TLSProbe", "host cert cert_der version cipher trusted error")
+
+TLS_VERSIONS = {
+    "TLSv1": (ssl.TLSVersion.TLSv1, ssl.HAS_TLSv1),
+    "TLSv1.1": (ssl.TLSVersion.TLSv1_1, ssl.HAS_TLSv1_1),
+    "TLSv1.2": (ssl.TLSVersion.TLSv1_2, ssl.HAS_TLSv1_2),
+    "TLSv1.3": (ssl.TLSVersion.TLSv1_3, ssl.HAS_TLSv1_3),
+}
+
+_sessions = OrderedDict()
+_sessions_lock = threading.Lock()
+
+
+def get_context(verify=True, protocol=None, alpn_protocols=None, ciphers=None):
+    """
+    Returns a shared SSLContext.
+
+    `protocol` is an `ssl.TLSVersion` that the context is pinned to (legacy versions have the
+    OpenSSL security level lowered so that the handshake can be attempted at all),
+    `alpn_protocols` is a sequence of ALPN protocol names and `ciphers` is an OpenSSL cipher string
+    for TLS 1.2 and earlier.
+
+    The same settings always return the same context, however they're passed.
+    """
+    return _context(bool(verify), protocol, tuple(alpn_protocols) if alpn_protocols else None, ciphers or None)
+
+
+@lru_cache(maxsize=None)
+def _context(verify, protocol, alpn_protocols, ciphers):
+    # cached on the normalized positional arguments, as lru_cache keys on how a function is called
+    ctx = ssl.create_default_context()
+
+    if not verify:  # ignore ssl errors
+        ctx.check_hostname = False
+        ctx.verify_mode = ssl.CERT_NONE
+
+    if protocol:
+        if protocol < ssl.TLSVersion.TLSv1_2:
+            ctx.set_ciphers("ALL:@SECLEVEL=0")
+        with warnings.catch_warnings():
+            # probing for legacy versions is the point, so don't warn that they're deprecated
+            warnings.simplefilter("ignore", DeprecationWarning)
+            ctx.minimum_version = protocol
+            ctx.maximum_version = protocol
+
+    if ciphers:
+        ctx.set_ciphers(ciphers + ":@SECLEVEL=0")
+
+    if alpn_protocols:
+        ctx.set_alpn_protocols(list(alpn_protocols))
+
+    return ctx
+
+
+def get_session(host, port, context):
+    with _sessions_lock:
+        return _sessions.get((host, port, id(context)))
+
+
+def save_session(host, port, context, ssl_sock):
+    session = getattr(ssl_sock, "session", None)
+    if not session:
+        return
+
+    with _sessions_lock:
+        _sessions[(host, port, id(context))] = session
+        _sessions.move_to_end((host, port, id(context)))
+
+        while len(_sessions) > MAX_SESSIONS:
+            _sessions.popitem(last=False)
+
+
+def wrap_socket(sock, host, port=443, context=None):
+    """
+    Wraps `sock` with `context` (the default verifying context if not provided), resuming an earlier
+    session with the host if there is one.
+    """
+    context = context or get_context()
+    return context.wrap_socket(sock, server_hostname=host, session=get_session(host, port, context))
+
+
+class ResumingHTTPSConnection(HTTPSConnection):
+    """
+    An HTTPSConnection that resumes earlier TLS sessions with the same host. Call `save_session()`
+    once a response has been read, as TLS 1.3 servers only send session tickets after the handshake.
+    """
+
+    def connect(self):
+        HTTPConnection.connect(self)
+        self.sock = wrap_socket(self.sock, self._tunnel_host or self.host, self.port, self._context)
+
+    def save_session(self):
+        if self.sock:
+            save_session(self._tunnel_host or self.host, self.port, self._context, self.sock)
+
+
+def _handshake(host, port, context, timeout):
+    with scheduler.slot(("host", host.lower())):
+        sock = socket.create_connection((host, port), timeout=timeout)
+
+        with wrap_socket(sock, host, port, context) as ssl_sock:
+            save_session(host, port, context, ssl_sock)
+            return ssl_sock.getpeercert(), ssl_sock.getpeercert(binary_form=True), ssl_sock.version(), ssl_sock.cipher()
+
+
+async def _async_handshake(host, port, context, timeout):
+    async with scheduler.slot(("host", host.lower())):
+        _, writer = await asyncio.wait_for(asyncio.open_connection(host, port, ssl=context, server_hostname=host), timeout)
+
+        try:
+            ssl_object = writer.get_extra_info("ssl_object")
+            save_session(host, port, context, ssl_object)
+            return ssl_object.getpeercert(), ssl_object.getpeercert(binary_form=True), ssl_object.version(), ssl_object.cipher()
+        finally:
+            writer.close()
+
+
+def probe(host, port=443, timeout=CONNECTION_TIMEOUT):
+    """
+    Makes a single verified TLS handshake with the host and returns a TLSProbe with the peer
+    certificate (as a dict and in DER form), the negotiated version and cipher, and whether the
+    certificate is trusted.
+
+    If verification fails the handshake is repeated without verification so that the DER
+    certificate, version and cipher are still available. `cert` is None in that case because
+    Python only decodes verified certificates. `error` describes why the probe failed.
+    """
+    try:
+        cert, cert_der, version, cipher = _handshake(host, port, get_context(), timeout)
+        return TLSProbe(host, cert, cert_der, version, cipher, True, None)
+    except ssl.SSLCertVerificationError as e:
+        error = e.verify_message or str(e)
+    except OSError as e:
+        return TLSProbe(host, None, None, None, None, False, str(e) or type(e).__name__)
+
+    try:
+        _, cert_der, version, cipher = _handshake(host, port, get_context(verify=False), timeout)
+        return TLSProbe(host, None, cert_der, version, cipher, False, error)
+    except OSError:
+        return TLSProbe(host, None, None, None, None, False, error)
+
+
+async def async_probe(host, port=443, timeout=CONNECTION_TIMEOUT):
+    """
+    Asyncio version of `probe()`, which makes the handshakes on the running event loop.
+    """
+    try:
+        cert, cert_der, version, cipher = await _async_handshake(host, port, get_context(), timeout)
+        return TLSProbe(host, cert, cert_der, version, cipher, True, None)
+    except ssl.SSLCertVerificationError as e:
+        error = e.verify_message or str(e)
+    except (OSError, asyncio.TimeoutError) as e:
+        return TLSProbe(host, None, None, None, None, False, str(e) or type(e).__name__)
+
+    try:
+        _, cert_der, version, cipher = await _async_handshake(host, port, get_context(verify=False), timeout)
+        return TLSProbe(host, None, cert_der, version, cipher, False, error)
+    except (OSError, asyncio.TimeoutError):
+        return TLSProbe(host, None, None, None, None, False, error)
+
+
+def negotiate(host, port=443, protocol=None, cipher=None, timeout=CONNECTION_TIMEOUT):
+    """
+    Returns the cipher negotiated in an unverified handshake pinned to `protocol` (and `cipher`,
+    for TLS 1.2 and earlier), or None if the server refused the handshake.
+    """
+    try:
+        _, _, _, negotiated = _handshake(host, port, get_context(False, protocol, ciphers=cipher), timeout)
+        return negotiated[0]
+    except OSError:
+        return None
+
+
+async def async_negotiate(host, port=443, protocol=None, cipher=None, timeout=CONNECTION_TIMEOUT):
+    """
+    Asyncio version of `negotiate()`.
+    """
+    try:
+        _, _, _, negotiated = await _async_handshake(host, port, get_context(False, protocol, ciphers=cipher), timeout)
+        return negotiated[0]
+    except (OSError, asyncio.TimeoutError):
+        return None
+
+
+def _cipher_names(protocol):
+    ctx = get_context(verify=False, protocol=protocol, ciphers="ALL")
+    return [c["name"] for c in ctx.get_ciphers() if c["protocol"] != "TLSv1.3"]
+
+
+def _scan_plan(versions, enumerate_ciphers):
+    # returns the versions that can be tested, and the (version, protocol, cipher) handshakes to try
+    testable = [name for name in versions if TLS_VERSIONS[name][1]]
+    attempts = []
+
+    if enumerate_ciphers:
+        for name in testable:
+            protocol = TLS_VERSIONS[name][0]
+            if protocol < ssl.TLSVersion.TLSv1_3:
+                attempts.extend((name, protocol, cipher) for cipher in _cipher_names(protocol))
+
+    return testable, attempts
+
+
+def _capabilities(versions, enumerate_ciphers, negotiated, accepted):
+    # `negotiated` is {version: cipher or None}, `accepted` lists the (version, cipher) attempts that worked
+    capabilities = {name: {"supported": None, "ciphers": []} for name in versions}
+
+    for name, cipher in negotiated.items():
+        capabilities[name]["supported"] = cipher is not None
+        if cipher and (not enumerate_ciphers or TLS_VERSIONS[name][0] == ssl.TLSVersion.TLSv1_3):
+            capabilities[name]["ciphers"] = [cipher]
+
+    for name, cipher in accepted:
+        capabilities[name]["ciphers"].append(cipher)
+
+    return capabilities
+
+
+def scan(host, port=443, versions=tuple(TLS_VERSIONS), enumerate_ciphers=False, max_workers=8, timeout=CONNECTION_TIMEOUT):
+    """
+    Returns the TLS capabilities of the host as {version: {"supported": bool, "ciphers": [...]}}
+    for each of the `versions` ("TLSv1", "TLSv1.1", "TLSv1.2", "TLSv1.3").
+
+    The handshakes are made concurrently on up to `max_workers` threads. Without
+    `enumerate_ciphers`, "ciphers" only holds the cipher negotiated for each version. With it,
+    every cipher the local OpenSSL offers is tried on its own for TLS 1.2 and earlier. TLS 1.3
+    suites can't be restricted from Python, so only the negotiated one is listed.
+
+    "supported" is None if the local OpenSSL can't make handshakes with that version.
+    """
+    testable, attempts = _scan_plan(versions, enumerate_ciphers)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        negotiated = {name: executor.submit(negotiate, host, port, TLS_VERSIONS[name][0], timeout=timeout) for name in testable}
+        tried = [
+            (name, cipher, executor.submit(negotiate, host, port, protocol, cipher, timeout))
+            for name, protocol, cipher in attempts
+        ]
+
+    return _capabilities(
+        versions,
+        enumerate_ciphers,
+        {name: future.result() for name, future in negotiated.items()},
+        [(name, cipher) for name, cipher, future in tried if future.result()],
+    )
+
+
+async def async_scan(
+    host, port=443, versions=tuple(TLS_VERSIONS), enumerate_ciphers=False, max_workers=8, timeout=CONNECTION_TIMEOUT
+):
+    """
+    Asyncio version of `scan()`, with up to `max_workers` handshakes in flight at once on the running
+    event loop.
+    """
+    testable, attempts = _scan_plan(versions, enumerate_ciphers)
+    semaphore = asyncio.Semaphore(max_workers)
+
+    async def handshake(protocol, cipher=None):
+        async with semaphore:
+            return await async_negotiate(host, port, protocol, cipher, timeout)
+
+    results = await asyncio.gather(
+        *[handshake(TLS_VERSIONS[name][0]) for name in testable],
+        *[handshake(protocol, cipher) for _, protocol, cipher in attempts],
+    )
+
+    return _capabilities(
+        versions,
+        enumerate_ciphers,
+        dict(zip(testable, results)),
+        [(name, cipher) for (name, _, cipher), result in zip(attempts, results[len(testable) :]) if result],
+    )
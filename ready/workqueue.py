@@ -0,0 +1,211 @@
+"""
+A durable queue of domains to scan, shared by a coordinator and any number of worker processes.
+
+The queue is an SQLite database on a local disk. The coordinator adds the domains, re-queues the
+jobs of workers that didn't finish before their lease expired (because they crashed or were killed)
+and writes out the reports as they're completed. Workers lease one domain at a time, scan it and
+store the report. Because all of the state is in the database, workers can be added or restarted at
+any time, and a coordinator that's restarted carries on where it left off.
+
+    ready coordinator --queue=scan.db --input=domains.txt > results.ndjson
+    ready worker --queue=scan.db
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import time
+
+# Seconds a worker has to complete a job before it's given to another worker
+LEASE_SECONDS = 120
+
+# Times a job is leased before it's given up on
+MAX_ATTEMPTS = 3
+
+# Seconds between polls of the queue by idle workers and the coordinator
+POLL_INTERVAL = 1.0
+
+
+class WorkQueue:
+    """
+    The jobs table, where each job is a domain that's "pending", "leased" to a worker until
+    `lease_expires`, "done" with a report, or "failed" after MAX_ATTEMPTS leases expired.
+    """
+
+    def __init__(self, path, timeout=30.0):
+        self.path = path
+        self.db = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id INTEGER PRIMARY KEY, domain TEXT UNIQUE NOT NULL, state TEXT NOT NULL DEFAULT 'pending', "
+            "worker TEXT, lease_expires REAL, attempts INTEGER NOT NULL DEFAULT 0, report TEXT, "
+            "collected INTEGER NOT NULL DEFAULT 0)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, id)")
+
+    def close(self):
+        self.db.close()
+
+    def add(self, domains, batch_size=1000):
+        """
+        Adds the `domains` (any iterable) to the queue, skipping ones that are already in it so that
+        a restarted coordinator can add the same list again. Returns the number added.
+        """
+        added = 0
+        batch = []
+
+        def insert():
+            before = self.db.total_changes
+            with self.db:
+                self.db.execute("BEGIN IMMEDIATE")
+                self.db.executemany("INSERT OR IGNORE INTO jobs (domain) VALUES (?)", [(d,) for d in batch])
+            return self.db.total_changes - before
+
+        for domain in domains:
+            batch.append(domain)
+            if len(batch) == batch_size:
+                added += insert()
+                batch = []
+
+        if batch:
+            added += insert()
+
+        return added
+
+    def lease(self, worker, duration=LEASE_SECONDS):
+        """
+        Leases the oldest pending job to `worker` for `duration` seconds. Returns (job id, domain), or
+        None if there are no pending jobs.
+        """
+        with self.db:
+            # take the write lock first so that two workers can't lease the same job
+            self.db.execute("BEGIN IMMEDIATE")
+            row = self.db.execute("SELECT id, domain FROM jobs WHERE state = 'pending' ORDER BY id LIMIT 1").fetchone()
+            if row:
+                self.db.execute(
+                    "UPDATE jobs SET state = 'leased', worker = ?, lease_expires = ?, attempts = attempts + 1 WHERE id = ?",
+                    (worker, time.time() + duration, row[0]),
+                )
+
+        return row
+
+    def complete(self, job_id, report):
+        """
+        Stores the report for a job. A report that arrives after the lease expired is still kept
+        unless another worker completed the job first. If the job had already failed, the report is
+        collected again, after its failure.
+        """
+        with self.db:
+            self.db.execute("BEGIN IMMEDIATE")
+            self.db.execute(
+                "UPDATE jobs SET state = 'done', report = ?, lease_expires = NULL, collected = 0 WHERE id = ? AND state != 'done'",
+                (json.dumps(report), job_id),
+            )
+
+    def requeue_expired(self, max_attempts=MAX_ATTEMPTS):
+        """
+        Puts jobs whose lease has expired back in the queue, or fails them once they've been leased
+        `max_attempts` times. Returns the number of jobs that were re-queued or failed.
+        """
+        now = time.time()
+
+        with self.db:
+            self.db.execute("BEGIN IMMEDIATE")
+            expired = self.db.execute(
+                "SELECT id, domain, attempts FROM jobs WHERE state = 'leased' AND lease_expires < ?", (now,)
+            ).fetchall()
+
+            for job_id, domain, attempts in expired:
+                if attempts >= max_attempts:
+                    report = {"domain": domain, "error": f"The lease expired {attempts} times"}
+                    self.db.execute(
+                        "UPDATE jobs SET state = 'failed', report = ?, lease_expires = NULL WHERE id = ?",
+                        (json.dumps(report), job_id),
+                    )
+                else:
+                    self.db.execute(
+                        "UPDATE jobs SET state = 'pending', worker = NULL, lease_expires = NULL WHERE id = ?", (job_id,)
+                    )
+
+        return len(expired)
+
+    def collect(self):
+        """
+        Returns the reports of the jobs that finished since the last call, in queue order.
+        """
+        with self.db:
+            self.db.execute("BEGIN IMMEDIATE")
+            rows = self.db.execute(
+                "SELECT id, report FROM jobs WHERE state IN ('done', 'failed') AND collected = 0 ORDER BY id"
+            ).fetchall()
+            self.db.executemany("UPDATE jobs SET collected = 1 WHERE id = ?", [(job_id,) for job_id, _ in rows])
+
+        return [json.loads(report) for _, report in rows]
+
+    def counts(self):
+        """
+        Returns the number of jobs in each state.
+        """
+        return dict(self.db.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall())
+
+    def finished(self):
+        """
+        Returns whether every job is done or failed.
+        """
+        return not self.db.execute("SELECT 1 FROM jobs WHERE state IN ('pending', 'leased') LIMIT 1").fetchone()
+
+
+def coordinate(queue, output, domains=None, max_attempts=MAX_ATTEMPTS, poll_interval=POLL_INTERVAL):
+    """
+    Adds the `domains` to the queue, then writes each report to `output` as a line of JSON as the
+    workers complete them, re-queuing expired leases, until every job is finished. Returns the
+    number of reports written.
+    """
+    if domains is not None:
+        queue.add(domains)
+
+    written = 0
+
+    while True:
+        queue.requeue_expired(max_attempts)
+
+        # check before collecting, so that the reports of the last jobs are written before returning
+        finished = queue.finished()
+
+        for report in queue.collect():
+            output.write(json.dumps(report) + "\n")
+            written += 1
+        output.flush()
+
+        if finished:
+            return written
+
+        time.sleep(poll_interval)
+
+
+def work(queue, scan, worker=None, lease=LEASE_SECONDS, poll_interval=POLL_INTERVAL):
+    """
+    Leases domains from the queue and stores `scan(domain)` as the report for each one, until every
+    job in the queue is finished. Returns the number of domains scanned.
+
+    The worker keeps polling while the queue is empty (the coordinator may not have added the domains
+    yet) and while other workers hold leases, as their jobs are re-queued if they crash.
+    """
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+    scanned = 0
+
+    while True:
+        job = queue.lease(worker, lease)
+
+        if job is None:
+            if queue.finished() and queue.counts():
+                return scanned
+            time.sleep(poll_interval)
+            continue
+
+        job_id, domain = job
+        queue.complete(job_id, scan(domain))
+        scanned += 1
@@ -0,0 +1,146 @@
+"""
+Helpers for building DNS wire format answers in tests.
+"""
+
+import socket
+import struct
+import threading
+import time
+
+from ready.dnswire import RECORD_TYPES, encode_name
+
+QUESTION_POINTER = b"\xc0\x0c"
+
+
+def _rdata(record_type, data):
+    if record_type == "A":
+        return socket.inet_pton(socket.AF_INET, data)
+    if record_type == "AAAA":
+        return socket.inet_pton(socket.AF_INET6, data)
+    if record_type in ("NS", "CNAME"):
+        return encode_name(data)
+    if record_type == "MX":
+        preference, exchange = data.split()
+        return struct.pack("!H", int(preference)) + encode_name(exchange)
+    if record_type in ("TXT", "SPF"):
+        chunks = [data[i : i + 255].encode() for i in range(0, len(data), 255)] or [b""]
+        return b"".join(bytes([len(c)]) + c for c in chunks)
+    if record_type == "CAA":
+        flags, tag, value = data.split(" ", 2)
+        return bytes([int(flags), len(tag)]) + tag.encode() + value.strip('"').encode()
+    if record_type == "SOA":
+        mname, rname, *numbers = data.split()
+        return encode_name(mname) + encode_name(rname) + struct.pack("!IIIII", *[int(n) for n in numbers])
+    raise ValueError(record_type)
+
+
+def _record(name, record_type, ttl, data):
+    rdata = _rdata(record_type, data)
+    return name + struct.pack("!HHIH", RECORD_TYPES[record_type], 1, ttl, len(rdata)) + rdata
+
+
+def build_response(query, answers=(), authority=(), status=0, truncated=False):
+    """
+    Returns a response to `query` (from `encode_query`). `answers` and `authority` are lists of
+    (record_type, ttl, data) tuples for the queried name.
+    """
+    query_id, flags = struct.unpack("!HH", query[:4])
+    question_end = 12 + query[12:].index(b"\0") + 5
+
+    flags |= 0x8080 | status  # QR and RA
+    if truncated:
+        flags |= 0x0200
+
+    message = struct.pack("!HHHHHH", query_id, flags, 1, len(answers), len(authority), 0)
+    message += query[12:question_end]
+
+    for record_type, ttl, data in list(answers) + list(authority):
+        message += _record(QUESTION_POINTER, record_type, ttl, data)
+
+    return message
+
+
+def question(query):
+    question_end = 12 + query[12:].index(b"\0")
+    labels = []
+    offset = 12
+    while offset < question_end:
+        length = query[offset]
+        labels.append(query[offset + 1 : offset + 1 + length].decode())
+        offset += 1 + length
+
+    record_type = struct.unpack("!H", query[question_end + 1 : question_end + 3])[0]
+    return ".".join(labels), {v: k for k, v in RECORD_TYPES.items()}[record_type]
+
+
+class StubNameServer:
+    """
+    A name server on 127.0.0.1 that answers over UDP and TCP on the same port from `records`
+    ({(name, record_type): [(record_type, ttl, data), ...]}). Names in `truncate` get a truncated UDP
+    answer, names in `delays` are answered after that many seconds and names in `drop` are ignored.
+    """
+
+    def __init__(self, records, truncate=(), delays={}, drop=()):
+        self.records = records
+        self.truncate = truncate
+        self.delays = delays
+        self.drop = drop
+        self.udp_queries = 0
+        self.tcp_queries = 0
+
+        self.udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.udp.bind(("127.0.0.1", 0))
+        self.port = self.udp.getsockname()[1]
+
+        self.tcp = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.tcp.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.tcp.bind(("127.0.0.1", self.port))
+        self.tcp.listen()
+
+        threading.Thread(target=self._serve_udp, daemon=True).start()
+        threading.Thread(target=self._serve_tcp, daemon=True).start()
+
+    def answer(self, query, truncated=False):
+        name, record_type = question(query)
+        answers = self.records.get((name, record_type))
+
+        if answers is None:
+            return build_response(
+                query, authority=[("SOA", 900, "ns1.example.com admin.example.com 1 7200 900 1209600 300")], status=3
+            )
+        if truncated:
+            return build_response(query, truncated=True)
+        return build_response(query, answers=answers)
+
+    def _reply_udp(self, query, address):
+        name, _ = question(query)
+        time.sleep(self.delays.get(name, 0))
+        self.udp.sendto(self.answer(query, truncated=name in self.truncate), address)
+
+    def _serve_udp(self):
+        while True:
+            try:
+                query, address = self.udp.recvfrom(65535)
+            except OSError:
+                return
+
+            self.udp_queries += 1
+            if question(query)[0] not in self.drop:
+                threading.Thread(target=self._reply_udp, args=(query, address), daemon=True).start()
+
+    def _serve_tcp(self):
+        while True:
+            try:
+                conn, _ = self.tcp.accept()
+            except OSError:
+                return
+
+            with conn:
+                self.tcp_queries += 1
+                length = struct.unpack("!H", conn.recv(2))[0]
+                response = self.answer(conn.recv(length))
+                conn.sendall(struct.pack("!H", len(response)) + response)
+
+    def close(self):
+        self.udp.close()
+        self.tcp.close()
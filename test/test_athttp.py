@@ -0,0 +1,80 @@
+import asyncio
+import gzip
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import TestCase
+
+from ready import athttp
+from ready.ready import async_fetch_responses
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/redirect":
+            self.send_response(302)
+            self.send_header("Location", "/json")
+            self.send_header("Set-Cookie", "session=test; Path=/")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        elif self.path == "/json":
+            body = gzip.compress(b'{"cookie": "%s"}' % self.headers.get("cookie", "").encode())
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Encoding", "gzip")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif self.path == "/chunked":
+            self.send_response(200)
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            self.wfile.write(b"5\r\nhello\r\n6\r\n world\r\n0\r\n\r\n")
+        else:
+            self.send_response(404)
+            self.send_header("Content-Type", "text/plain")
+            self.end_headers()
+            self.wfile.write(b"not found")
+
+    def log_message(self, *args):
+        pass
+
+
+class AsyncRequestTestCase(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        cls.url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def test_should_follow_redirect_with_cookies(self):
+        response = asyncio.run(athttp.request(f"{self.url}/redirect"))
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.url, f"{self.url}/json")
+        self.assertEqual(response.json, {"cookie": "session=test"})
+
+    def test_should_not_follow_redirect_if_redirect_false(self):
+        response = asyncio.run(athttp.request(f"{self.url}/redirect", redirect=False))
+        self.assertEqual(response.status, 302)
+
+    def test_should_read_chunked_response(self):
+        response = asyncio.run(athttp.request(f"{self.url}/chunked"))
+        self.assertEqual(response.content, b"hello world")
+
+    def test_should_return_response_for_404(self):
+        response = asyncio.run(athttp.request(f"{self.url}/missing"))
+        self.assertEqual(response.status, 404)
+        self.assertEqual(response.content, b"not found")
+
+    def test_async_fetch_responses(self):
+        fetches = {
+            "response": (f"{self.url}/json", "response", {"timeout": 3}),
+            "missing_response": ("http://127.0.0.1:1/", "missing_response", {"timeout": 3}),
+        }
+        responses = asyncio.run(async_fetch_responses(fetches))
+        self.assertEqual(responses["response"].status, 200)
+        self.assertIsNone(responses["missing_response"])
@@ -0,0 +1,91 @@
+import asyncio
+import io
+import json
+import os
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from ready.checkpoint import Checkpoint, CheckpointedOutput
+from ready.ready import ready_many
+from ready.result import result
+
+
+async def fake_async_ready(domain, **kwargs):
+    await asyncio.sleep(0)
+    return [result(True, f"{domain} passed", "status", print_output=False)]
+
+
+class CheckpointTestCase(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "scan.checkpoint")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_resume_skips_finished_domains(self):
+        checkpoint = Checkpoint(self.path)
+        checkpoint.record('{"domain": "a.example.com"}\n{"domain": "b.example.com"}\n')
+        checkpoint.close()
+
+        checkpoint = Checkpoint(self.path, resume=True)
+        self.assertEqual(checkpoint.finished, {"a.example.com", "b.example.com"})
+        self.assertEqual(list(checkpoint.pending(["a.example.com", "c.example.com"])), ["c.example.com"])
+        checkpoint.close()
+
+        # without resume, the scan starts over
+        with Checkpoint(self.path) as checkpoint:
+            self.assertEqual(checkpoint.finished, set())
+        self.assertEqual(os.path.getsize(self.path), 0)
+
+    def test_line_cut_short_is_dropped(self):
+        with open(self.path, "w") as f:
+            f.write('{"domain": "a.example.com"}\n{"domain": "b.exa')
+
+        checkpoint = Checkpoint(self.path, resume=True)
+        self.assertEqual(checkpoint.finished, {"a.example.com"})
+        checkpoint.record('{"domain": "c.example.com"}\n')
+        checkpoint.close()
+
+        with open(self.path) as f:
+            self.assertEqual(f.read(), '{"domain": "a.example.com"}\n{"domain": "c.example.com"}\n')
+
+    def test_corrupt_lines_are_skipped(self):
+        with open(self.path, "w") as f:
+            f.write('{"domain": "a.example.com"}\n{"dom\x00\n{"domain": "b.example.com"}\n')
+
+        with Checkpoint(self.path, resume=True) as checkpoint:
+            # the domain on the corrupt line is scanned again, the ones after it aren't
+            self.assertEqual(checkpoint.finished, {"a.example.com", "b.example.com"})
+
+        self.assertEqual(os.path.getsize(self.path), 63)
+
+    def test_failed_scans_are_retried(self):
+        with Checkpoint(self.path) as checkpoint:
+            checkpoint.record('{"domain": "a.example.com"}\n{"domain": "b.example.com", "error": "No response"}\n')
+
+        with Checkpoint(self.path, resume=True) as checkpoint:
+            self.assertEqual(checkpoint.finished, {"a.example.com"})
+            self.assertEqual(list(checkpoint.pending(["a.example.com", "b.example.com"])), ["b.example.com"])
+
+    def test_batch_scan_is_resumed(self):
+        domains = [f"{i}.example.com" for i in range(6)]
+
+        # the first run is stopped after 4 domains
+        checkpoint = Checkpoint(self.path)
+        output = io.StringIO()
+        with patch("ready.ready.async_ready", fake_async_ready):
+            ready_many(domains[:4], CheckpointedOutput(output, checkpoint), workers=2)
+        checkpoint.close()
+
+        checkpoint = Checkpoint(self.path, resume=True)
+        with patch("ready.ready.async_ready", fake_async_ready):
+            scanned = ready_many(checkpoint.pending(domains), CheckpointedOutput(output, checkpoint), workers=2)
+        checkpoint.close()
+
+        reports = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual(scanned, 2)
+        self.assertEqual(sorted(r["domain"] for r in reports), sorted(domains))
+        with open(self.path) as f:
+            self.assertEqual(f.read(), output.getvalue())
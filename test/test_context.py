@@ -0,0 +1,39 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from ready.checks.csp import check_csp_should_exist, extract_csp, get_policy
+from ready.checks.html import check_frame_ancestors_should_exist
+from ready.context import ScanContext
+from ready.document import parse_html
+from ready.thttp import Response
+
+HTML = b"<!DOCTYPE html><html lang='en'><meta http-equiv='Content-Security-Policy' content=\"default-src 'none'\"></html>"
+
+
+class ScanContextTestCase(TestCase):
+    def setUp(self):
+        self.response = Response(None, HTML, None, 200, "https://example.com", {"content-type": "text/html"}, None)
+
+    def test_views_are_memoized(self):
+        context = ScanContext({"response": self.response})
+
+        self.assertIs(context.text(), context.text())
+        self.assertIs(context.lower(), context.lower())
+        self.assertTrue(context.lower().startswith(b"<!doctype html>"))
+        self.assertEqual(context["response"], self.response)
+
+    def test_of(self):
+        context = ScanContext({"response": self.response})
+        self.assertIs(ScanContext.of(context), context)
+        self.assertIsInstance(ScanContext.of({"response": self.response}), ScanContext)
+
+    def test_html_is_parsed_once_for_csp(self):
+        context = ScanContext({"response": self.response})
+
+        with patch("ready.context.parse_html", wraps=parse_html) as parse:
+            check_csp_should_exist(context, print_output=False)
+            check_frame_ancestors_should_exist(context, print_output=False)
+            self.assertEqual(extract_csp(self.response, context.document()), "default-src 'none'")
+            self.assertIs(get_policy(context), get_policy(context))
+
+        parse.assert_called_once()
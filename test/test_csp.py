@@ -12,7 +12,9 @@ from ready.checks.csp import (
     check_csp_should_not_include_reportto,
     check_csp_upgrade_insecure_requests,
     check_csp_should_only_include_valid_directives,
+    get_policy,
 )
+from ready.csp import parse_csp
 from ready.thttp import Response
 
 SKIP_BS4_TESTS = False
@@ -41,6 +43,55 @@ def response_with_csp(csp):
     return Response(None, "", None, None, None, {"content-security-policy": csp}, None)
 
 
+class ParseContentSecurityPolicyTestCase(TestCase):
+    def test_directives(self):
+        policy = parse_csp(["Default-Src 'none'; script-src 'self' https://cdn.example.com;; script-src 'unsafe-inline'"])
+
+        self.assertEqual(policy.names, ["default-src", "script-src"])
+        self.assertEqual(policy.get("script-src"), {"'self'", "https://cdn.example.com"})
+        self.assertIn("default-src", policy)
+        self.assertNotIn("img-src", policy)
+        self.assertIn("none", policy.tokens)
+
+    def test_fallbacks(self):
+        policy = parse_csp(["default-src 'self' 'unsafe-inline'; style-src 'self'"])
+
+        self.assertTrue(policy.restricts("script-src-elem"))
+        self.assertTrue(policy.restricts("style-src-attr"))
+        self.assertFalse(parse_csp(["img-src 'self'"]).restricts("script-src"))
+        self.assertFalse(parse_csp(["script-src-elem 'self'"]).restricts("script-src"))
+
+    def test_every_policy_is_kept(self):
+        policy = parse_csp(["script-src 'self' 'unsafe-inline', default-src 'self'"])
+        self.assertEqual(len(policy.policies), 2)
+        self.assertEqual(policy.names, ["script-src", "default-src"])
+
+        policy = parse_csp(["script-src 'unsafe-inline'"], ["script-src 'self'"])
+        self.assertEqual(policy.get("script-src"), {"'unsafe-inline'", "'self'"})
+        self.assertEqual([p.delivery for p in policy.policies], ["header", "meta"])
+
+    def test_meta_policies_ignore_frame_ancestors(self):
+        policy = parse_csp([], ["frame-ancestors 'none'; img-src 'self'"])
+        self.assertEqual(policy.names, ["img-src"])
+
+        self.assertFalse(parse_csp([], ["frame-ancestors 'none'"]))
+
+    def test_header_and_meta_policies(self):
+        response = Response(
+            None,
+            """<meta http-equiv="content-security-policy" content="upgrade-insecure-requests">""",
+            None,
+            None,
+            None,
+            {"content-security-policy": "default-src 'none'"},
+            None,
+        )
+
+        policy = get_policy({"response": response})
+        self.assertEqual(policy.names, ["default-src", "upgrade-insecure-requests"])
+        self.assertTrue(check_csp_upgrade_insecure_requests({"response": response}, print_output=False).passed)
+
+
 class ExtractContentSecurityPolicyTestCase(TestCase):
     @skipIf(SKIP_BS4_TESTS, "beautifulsoup is not available")
     def test_extract_csp_meta_tag(self):
@@ -93,6 +144,11 @@ class ContentSecurityPolicyChecksTestCase(TestCase):
         )
         self.assertTrue(result.passed)
 
+        result = check_csp_includes_default_or_script_directive(
+            {"response": response_with_csp("script-src-elem 'self'")}, print_output=False
+        )
+        self.assertTrue(result.passed)
+
         result = check_csp_includes_default_or_script_directive(
             {"response": response_with_csp("upgrade-insecure-requests")}, print_output=False
         )
@@ -141,6 +197,12 @@ class ContentSecurityPolicyChecksTestCase(TestCase):
         )
         self.assertFalse(result.passed)
 
+        # the check has only ever failed policies with 'script-sample'
+        result = check_csp_must_not_include_report_sample(
+            {"response": response_with_csp("script-src 'self' 'report-sample'")}, print_output=False
+        )
+        self.assertTrue(result.passed)
+
     def test_check_csp_must_not_include_reporturi(self):
         result = check_csp_must_not_include_reporturi({"response": response_with_csp("default-src 'none';")}, print_output=False)
         self.assertTrue(result.passed)
@@ -177,6 +239,12 @@ class ContentSecurityPolicyChecksTestCase(TestCase):
         )
         self.assertFalse(result.passed)
 
+        result = check_csp_should_only_include_valid_directives(
+            {"response": response_with_csp("default-src 'none'; upgrade-insecure-requests;")},
+            print_output=False,
+        )
+        self.assertTrue(result.passed)
+
     def test_checks_fail_with_missing_csp(self):
         checks = [
             check_csp_should_exist,
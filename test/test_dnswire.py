@@ -0,0 +1,145 @@
+import asyncio
+import struct
+import threading
+from base64 import urlsafe_b64decode
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import TestCase
+from urllib.parse import parse_qs, urlsplit
+
+from dns_stub import build_response, question
+from ready.dnswire import DNSWireError, decode_message, encode_query, query_id
+from ready.resolver import DoHWireClient, get_client
+
+
+class EncodeQueryTestCase(TestCase):
+    def test_encode_query(self):
+        query = encode_query("example.com", "TXT", query_id=1234)
+
+        self.assertEqual(query_id(query), 1234)
+        self.assertEqual(question(query), ("example.com", "TXT"))
+        self.assertEqual(query[12:25], b"\x07example\x03com\x00")
+
+    def test_encode_query_without_edns(self):
+        query = encode_query("example.com.", "A", query_id=0, edns_payload_size=0)
+        self.assertEqual(len(query), 12 + 13 + 4)
+
+    def test_label_too_long(self):
+        with self.assertRaises(DNSWireError):
+            encode_query("a" * 64 + ".com", "A")
+
+
+class DecodeMessageTestCase(TestCase):
+    def test_decode_answers(self):
+        query = encode_query("example.com", "TXT", query_id=1)
+        answer = decode_message(
+            build_response(
+                query,
+                answers=[
+                    ("TXT", 300, "v=spf1 include:_spf.example.com " + "a" * 300 + " -all"),
+                    ("MX", 60, "10 mx.example.com"),
+                    ("A", 60, "192.0.2.1"),
+                    ("AAAA", 60, "2001:db8::1"),
+                    ("CAA", 60, '0 issue "letsencrypt.org"'),
+                    ("NS", 60, "ns1.example.com"),
+                ],
+            )
+        )
+
+        self.assertEqual(answer["Status"], 0)
+        self.assertEqual(answer["Question"], [{"name": "example.com.", "type": 16}])
+        self.assertEqual(
+            [r["data"] for r in answer["Answer"]],
+            [
+                "v=spf1 include:_spf.example.com " + "a" * 300 + " -all",
+                "10 mx.example.com.",
+                "192.0.2.1",
+                "2001:db8::1",
+                '0 issue "letsencrypt.org"',
+                "ns1.example.com.",
+            ],
+        )
+        self.assertEqual(answer["Answer"][0], dict(answer["Answer"][0], name="example.com.", type=16, TTL=300))
+
+    def test_decode_negative_answer(self):
+        query = encode_query("missing.example.com", "A", query_id=1)
+        answer = decode_message(
+            build_response(query, authority=[("SOA", 900, "ns1.example.com admin.example.com 1 7200 900 1209600 300")], status=3)
+        )
+
+        self.assertEqual(answer["Status"], 3)
+        self.assertNotIn("Answer", answer)
+        self.assertEqual(answer["Authority"][0]["data"], "ns1.example.com. admin.example.com. 1 7200 900 1209600 300")
+
+    def test_decode_truncated_flag(self):
+        query = encode_query("example.com", "TXT", query_id=1)
+        self.assertTrue(decode_message(build_response(query, truncated=True))["TC"])
+
+    def test_malformed_messages(self):
+        query = encode_query("example.com", "A", query_id=1)
+        response = build_response(query, answers=[("A", 60, "192.0.2.1")])
+
+        for message in [b"", response[:20], response[:-2]]:
+            with self.assertRaises(DNSWireError):
+                decode_message(message)
+
+        # an A record with 3 bytes of data
+        with self.assertRaises(DNSWireError):
+            decode_message(response[:-6] + b"\x00\x03\xc0\x00\x02")
+
+        # compression pointer to itself
+        with self.assertRaises(DNSWireError):
+            decode_message(struct.pack("!HHHHHH", 1, 0, 1, 0, 0, 0) + b"\xc0\x0c\x00\x01\x00\x01")
+
+
+class DoHHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        query = parse_qs(urlsplit(self.path).query)["dns"][0]
+        query = urlsafe_b64decode(query + "=" * (-len(query) % 4))
+        name, record_type = question(query)
+
+        if self.headers.get("accept") != "application/dns-message" or query_id(query) != 0:
+            self.send_response(400)
+            self.end_headers()
+            return
+
+        if name == "example.com":
+            body = build_response(query, answers=[("TXT", 300, "v=spf1 -all")])
+        else:
+            body = build_response(
+                query, authority=[("SOA", 900, "ns1.example.com admin.example.com 1 7200 900 1209600 300")], status=3
+            )
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/dns-message")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class DoHWireClientTestCase(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), DoHHandler)
+        cls.url = f"http://127.0.0.1:{cls.server.server_address[1]}/dns-query"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def test_query(self):
+        client = DoHWireClient(self.url)
+
+        response = client.query("example.com", "TXT")
+        self.assertEqual(response.json["Answer"][0]["data"], "v=spf1 -all")
+
+        response = asyncio.run(client.async_query("missing.example.com", "A"))
+        self.assertEqual(response.json["Status"], 3)
+
+    def test_get_client(self):
+        self.assertIsInstance(get_client(self.url, wire_format=True), DoHWireClient)
+        self.assertIsNot(get_client(self.url, wire_format=True), get_client(self.url))
@@ -0,0 +1,82 @@
+from unittest import TestCase
+
+from ready.document import available_backends, parse_html
+
+HTML = """<!DOCTYPE html>
+<html lang="en" class=no-js>
+<head>
+  <meta charset="utf-8">
+  <meta http-equiv="Content-Security-Policy" content="default-src 'none'">
+  <title>Example &amp; co</title>
+  <link rel="icon" href="/favicon.ico">
+  <link rel="alternate" type="application/rss+xml" href="/feed.xml?a=1&amp;b=2">
+  <script src="https://cdn.example.com/app.js" integrity="sha384-abc" crossorigin></script>
+  <script>if (a && b) { document.write("&copy;"); }</script>
+</head>
+<body>&nbsp;&#169;&#x27;</body>
+</html>
+"""
+
+
+def view(document):
+    return {k: v for k, v in document.__dict__.items() if k != "backend"}
+
+
+class ParseHTMLTestCase(TestCase):
+    def test_parse_html(self):
+        document = parse_html(HTML, "stdlib")
+
+        self.assertTrue(document.starts_with_doctype)
+        self.assertEqual(document.html_tag, '<html lang="en" class=no-js>')
+        self.assertEqual(document.html_attrs, {"lang": "en", "class": "no-js"})
+        self.assertEqual(document.meta[1], {"http-equiv": "Content-Security-Policy", "content": "default-src 'none'"})
+        self.assertTrue(document.has_title)
+        self.assertEqual([link["rel"] for link in document.links], ["icon", "alternate"])
+        self.assertEqual(document.links[1]["href"], "/feed.xml?a=1&b=2")
+        self.assertEqual(
+            document.scripts, [{"src": "https://cdn.example.com/app.js", "integrity": "sha384-abc", "crossorigin": ""}, {}]
+        )
+
+        # entities in script contents aren't entities
+        self.assertEqual(document.entities, ["amp", "amp", "nbsp", "#169", "#x27"])
+
+    def test_backends_produce_the_same_document(self):
+        documents = [
+            HTML,
+            "",
+            "<p>no html tag &copy;</p>",
+            "<html lang='en'><meta charset=utf-8 <title>unclosed",
+            '<?xml version="1.0" encoding="utf-8"?><html xmlns="http://www.w3.org/1999/xhtml"><title>x</title></html>',
+            "<p>&amp;<!-- &copy; <html lang=commented> --> &copy;</p>",
+            "<svg><html lang=x></svg>",
+            "<html><body><html lang=late>",
+            "<script>var s = '<html lang=script>';</script><html lang=en>",
+            "<p>Q&A &nbsp x &#169 y</p>",
+            '<script defer src=a.js></script><script DEFER="defer" async src=b.js></script>',
+        ]
+
+        for backend in available_backends():
+            self.assertEqual(parse_html("", backend).backend, backend)
+
+            for html in documents:
+                with self.subTest(backend=backend, html=html):
+                    self.assertEqual(view(parse_html(html, backend)), view(parse_html(html, "stdlib")))
+
+    def test_doctype_must_come_first(self):
+        self.assertTrue(parse_html("  \n<!doctype html><title>x</title>").starts_with_doctype)
+        self.assertFalse(parse_html("<!-- hi --><!doctype html>").starts_with_doctype)
+        self.assertFalse(parse_html("text<!doctype html>").starts_with_doctype)
+        self.assertFalse(parse_html('<!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 Strict//EN">').starts_with_doctype)
+
+    def test_empty_and_malformed_documents(self):
+        document = parse_html("", "stdlib")
+        self.assertIsNone(document.html_tag)
+        self.assertEqual(document.meta, [])
+
+        document = parse_html("<html lang='en'><meta charset=utf-8 <title>unclosed", "stdlib")
+        self.assertEqual(document.html_attrs, {"lang": "en"})
+
+    def test_unterminated_references_are_not_entities(self):
+        self.assertEqual(parse_html("<p>Q&A and AT&T</p>", "stdlib").entities, [])
+        self.assertEqual(parse_html("&#169 x &nbsp y", "stdlib").entities, [])
+        self.assertEqual(parse_html("&nbsp y\n<b>&copy;</b> &#169;", "stdlib").entities, ["copy", "#169"])
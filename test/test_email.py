@@ -0,0 +1,143 @@
+import time
+from http.client import HTTPException
+from unittest import TestCase
+from unittest.mock import patch
+
+from ready.checks.email import _spf_lookup, _spf_lookup_count, _spf_lookup_tree, check_spf_uses_less_than_10_requests
+from ready.resolver import DNSClient
+from ready.thttp import Response
+
+
+def txt_response(*records):
+    return Response(
+        None, "", {"Status": 0, "Answer": [{"type": 16, "TTL": 300, "data": r} for r in records]}, 200, None, {}, None
+    )
+
+
+class SPFClient(DNSClient):
+    def __init__(self, records, delay=0):
+        super().__init__()
+        self.records = records
+        self.delay = delay
+        self.lookups = []
+
+    def lookup(self, name, record_type):
+        self.lookups.append(name)
+        time.sleep(self.delay)
+        return txt_response(*self.records.get(name, []))
+
+    def query(self, name, record_type):
+        return self.lookup(name, record_type)  # skip the cache so every lookup is counted
+
+
+RECORDS = {
+    "_spf.example.com": ["v=spf1 include:_spf.google.com include:mail.example.net -all"],
+    "mail.example.net": ["v=spf1 include:_spf.google.com redirect=_spf.example.org"],
+    "_spf.google.com": ["v=spf1 include:_netblocks.google.com ~all"],
+    "_netblocks.google.com": ["v=spf1 ip4:192.0.2.0/24 ~all"],
+    "_spf.example.org": ["v=spf1 ip4:198.51.100.0/24 -all"],
+}
+
+
+class SPFTestCase(TestCase):
+    def test_lookup_tree(self):
+        client = SPFClient(RECORDS)
+        tree = _spf_lookup_tree(["v=spf1 include:_spf.example.com include:missing.example.com -all"], dns_resolver=client)
+
+        self.assertEqual(
+            {d: entry["depth"] for d, entry in tree.items()},
+            {
+                "_spf.example.com": 1,
+                "missing.example.com": 1,
+                "_spf.google.com": 2,
+                "mail.example.net": 2,
+                "_netblocks.google.com": 3,
+                "_spf.example.org": 3,
+            },
+        )
+        self.assertEqual(tree["mail.example.net"]["includes"], ["_spf.google.com", "_spf.example.org"])
+        self.assertEqual(tree["missing.example.com"]["records"], [])
+
+        # _spf.google.com is included twice but only looked up once
+        self.assertEqual(sorted(client.lookups), sorted(tree))
+
+    def test_levels_are_looked_up_concurrently(self):
+        records = {f"level1-{i}.example.com": [f"v=spf1 include:level2-{i}.example.com -all"] for i in range(5)}
+        client = SPFClient(records, delay=0.2)
+
+        started = time.monotonic()
+        tree = _spf_lookup_tree(["v=spf1 " + " ".join(f"include:{d}" for d in records) + " -all"], dns_resolver=client)
+
+        self.assertEqual(len(tree), 10)
+        self.assertLess(time.monotonic() - started, 1)
+
+    def test_include_loops_are_followed_once(self):
+        client = SPFClient(
+            {"a.example.com": ["v=spf1 include:b.example.com"], "b.example.com": ["v=spf1 include:a.example.com"]}
+        )
+        self.assertEqual(
+            list(_spf_lookup_tree(["v=spf1 include:a.example.com"], dns_resolver=client)), ["a.example.com", "b.example.com"]
+        )
+
+    def test_shared_includes_are_counted_every_time(self):
+        records = {"a.example.com": ["v=spf1 include:shared.example.com"], "shared.example.com": ["v=spf1 -all"]}
+        records.update({f"{i}.example.com": ["v=spf1 include:a.example.com"] for i in range(4)})
+        root = ["v=spf1 " + " ".join(f"include:{i}.example.com" for i in range(4)) + " -all"]
+
+        tree = _spf_lookup_tree(root, dns_resolver=SPFClient(records))
+        self.assertEqual(len(tree), 6)
+        self.assertEqual(_spf_lookup_count(root, tree), 12)
+
+        # loops are counted once round
+        loop = {"a.example.com": ["v=spf1 include:b.example.com"], "b.example.com": ["v=spf1 include:a.example.com"]}
+        tree = _spf_lookup_tree(["v=spf1 include:a.example.com"], dns_resolver=SPFClient(loop))
+        self.assertEqual(_spf_lookup_count(["v=spf1 include:a.example.com"], tree), 3)
+
+    def test_every_lookup_term_is_counted(self):
+        records = {"a.example.com": ["v=spf1 a mx:mail.example.com ip4:192.0.2.1 -all"]}
+        root = ['"v=spf1 a/24 -mx ?ptr exists:%{i}.example.com include:a.example.com redirect=b.example.com exp=c"']
+
+        tree = _spf_lookup_tree(root, dns_resolver=SPFClient(records))
+        # 6 terms in the root record, and a and mx in a.example.com
+        self.assertEqual(_spf_lookup_count(root, tree), 8)
+
+    def test_lookups_stop_at_the_deadline(self):
+        records = {f"{i}.example.com": [f"v=spf1 include:next-{i}.example.com"] for i in range(3)}
+        client = SPFClient(records, delay=0.3)
+
+        # one lookup at a time, so only the first one finishes in time
+        with patch("ready.checks.email.SPF_TIMEOUT", 0.4), patch("ready.checks.email.SPF_WORKERS", 1):
+            tree = _spf_lookup_tree(["v=spf1 " + " ".join(f"include:{d}" for d in records)], dns_resolver=client)
+
+        self.assertEqual(list(tree), list(records))
+        self.assertEqual(tree["0.example.com"]["includes"], ["next-0.example.com"])
+
+        # the lookup still queued was cancelled, and the next level was never looked up
+        time.sleep(0.5)
+        self.assertEqual(client.lookups, ["0.example.com", "1.example.com"])
+
+    def test_failed_lookups_have_no_record(self):
+        client = SPFClient({})
+
+        def lookup(name, record_type):
+            raise HTTPException("bad response")
+
+        client.lookup = lookup
+        self.assertEqual(_spf_lookup(client, "example.com"), [])
+
+    def test_check_spf_uses_less_than_10_requests(self):
+        client = SPFClient(RECORDS)
+        responses = {"dns_txt_response": txt_response("v=spf1 include:_spf.example.com -all")}
+
+        # running the check twice shouldn't share any state between them
+        for _ in range(2):
+            result = check_spf_uses_less_than_10_requests(responses, dns_resolver=client, print_output=False)
+            self.assertTrue(result.passed)
+            # _spf.google.com (and its include) is counted each time it's included
+            self.assertIn("(7)", result.message)
+
+        client = SPFClient({f"{i}.example.com": [f"v=spf1 include:{i + 1}.example.com"] for i in range(20)})
+        responses = {"dns_txt_response": txt_response("v=spf1 include:0.example.com -all")}
+
+        result = check_spf_uses_less_than_10_requests(responses, dns_resolver=client, print_output=False)
+        self.assertFalse(result.passed)
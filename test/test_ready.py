@@ -0,0 +1,412 @@
+import asyncio
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+from unittest import TestCase, skipIf
+from unittest.mock import patch
+from urllib.error import URLError
+
+from ready import VERSION, scheduler
+from ready.catalogue import CATALOGUE
+from ready.checks import build_catalogue, requires
+from ready.ready import (
+    CHECKS,
+    FUZZ_CHECKS,
+    HTML_CHECKS,
+    deferred_fetches,
+    fetch_responses,
+    is_bot_wall,
+    page_only_fetches,
+    read_domains,
+    ready,
+    ready_many,
+    ready_sharded,
+    required_fetches,
+    run_checks,
+    scan_fetches,
+    select_checks,
+)
+from ready.resolver import DNSClient
+from ready.result import result
+from ready.thttp import Response
+
+
+class FetchResponsesTestCase(TestCase):
+    def test_fetch_responses_keeps_keys(self):
+        mocked_response = Response(None, b"", None, 200, "https://ready.invalid", {}, None)
+
+        with patch("ready.ready.request", return_value=mocked_response):
+            responses = fetch_responses(
+                {
+                    "response": ("https://ready.invalid", "response", {"timeout": 3}),
+                    "dns_ns_response": ("https://dns.invalid?name=ready.invalid&type=NS", "dns_ns_response", {}),
+                }
+            )
+
+        self.assertEqual(list(responses.keys()), ["response", "dns_ns_response"])
+        self.assertEqual(responses["response"].status, 200)
+
+    def test_fetch_responses_request_filter(self):
+        mocked_response = Response(None, b"", None, 200, "https://ready.invalid", {}, None)
+
+        with patch("ready.ready.request", return_value=mocked_response) as mocked_request:
+            responses = fetch_responses(
+                {
+                    "response": ("https://ready.invalid", "response", {}),
+                    "dns_ns_response": ("https://dns.invalid?name=ready.invalid&type=NS", "dns_ns_response", {}),
+                },
+                request_filter="dns",
+            )
+
+        self.assertIsNone(responses["response"])
+        self.assertEqual(responses["dns_ns_response"].status, 200)
+        mocked_request.assert_called_once()
+
+    def test_failed_calls_are_none(self):
+        def refused(name, record_type):
+            raise ConnectionRefusedError()
+
+        with patch("sys.stdout", new_callable=io.StringIO) as stdout:
+            responses = fetch_responses({"dns_ns_response": (refused, "dns_ns_response", {"name": "a", "record_type": "NS"})})
+
+        self.assertEqual(responses, {"dns_ns_response": None})
+        self.assertEqual(stdout.getvalue(), "")
+
+
+class CheckRegistryTestCase(TestCase):
+    def test_catalogue_is_up_to_date(self):
+        self.assertEqual(CATALOGUE, build_catalogue(), "Regenerate ready/catalogue.py with `python -m ready.checks`")
+
+    def test_registered_checks_are_in_the_catalogue(self):
+        names = [name for _, name, _, _ in CATALOGUE]
+        for check in CHECKS + HTML_CHECKS + FUZZ_CHECKS:
+            self.assertIn(check, names)
+
+    def test_modules_are_imported_when_their_checks_are_selected(self):
+        code = (
+            "import sys; import ready.cli; print('ready.ready' in sys.modules); "
+            "from ready.ready import select_checks; select_checks(check_filter='csp'); "
+            "print(sorted(m for m in sys.modules if m.startswith('ready.checks.')))"
+        )
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+
+        self.assertEqual(output.splitlines(), ["False", "['ready.checks.csp']"])
+
+    def test_module_can_be_run(self):
+        output = subprocess.run(
+            [sys.executable, "-m", "ready.ready", "--version"], capture_output=True, text=True, check=True
+        ).stdout
+
+        self.assertEqual(output, f"ready {VERSION}\n")
+
+
+class RequiredFetchesTestCase(TestCase):
+    def setUp(self):
+        self.fetches = scan_fetches("example.com", "example.com", "example.com", lambda name, record_type: None)
+
+    def test_checks_declare_their_inputs(self):
+        for check in select_checks(is_html=True, fuzz=True):
+            self.assertTrue(hasattr(check, "requires"), check.__name__)
+            for key in check.requires + check.optional:
+                self.assertIn(key.removesuffix("_fld"), self.fetches, check.__name__)
+
+    def test_async_scans_make_tls_handshakes_on_the_event_loop(self):
+        fetches = scan_fetches("example.com", "example.com", "example.com", None, asynchronous=True)
+
+        self.assertTrue(asyncio.iscoroutinefunction(fetches["tls_probe"][0]))
+        self.assertTrue(asyncio.iscoroutinefunction(fetches["tls_capabilities"][0]))
+        self.assertFalse(asyncio.iscoroutinefunction(self.fetches["tls_probe"][0]))
+
+    def test_check_filter_only_fetches_what_is_needed(self):
+        self.assertEqual(list(required_fetches(self.fetches, select_checks(check_filter="csp"))), ["response"])
+        self.assertEqual(
+            sorted(required_fetches(self.fetches, select_checks(check_filter="caa"))), ["dns_caa_response", "response"]
+        )
+        self.assertEqual(
+            sorted(required_fetches(self.fetches, select_checks(check_filter="ssl_connection"))),
+            ["response", "tls_capabilities"],
+        )
+        self.assertEqual(set(required_fetches(self.fetches, select_checks())), set(self.fetches) - {"dns_a_response"})
+
+    def test_request_filter(self):
+        fetches = required_fetches(self.fetches, select_checks(), request_filter="dns_txt")
+        self.assertEqual(sorted(fetches), ["dns_txt_response", "response"])
+
+    def test_undeclared_checks_get_everything(self):
+        def check_without_requires(responses, **kwargs):
+            pass
+
+        self.assertEqual(required_fetches(self.fetches, [check_without_requires]), self.fetches)
+
+    def test_checks_with_missing_inputs_are_skipped(self):
+        response = Response(
+            None,
+            b"",
+            None,
+            200,
+            "https://example.com",
+            {"content-type": "text/plain", "content-security-policy": "default-src 'none'"},
+            None,
+        )
+        results = run_checks("example.com", "example.com", {"response": response}, hide_output=True)
+
+        self.assertTrue(results)
+        self.assertIn("http_content_type", [r.check for r in results])
+        self.assertNotIn("ssl_dns_caa", [r.check for r in results])
+
+    def test_dns_only_request_filter(self):
+        class FakeDNSClient(DNSClient):
+            def lookup(self, name, record_type):
+                return Response(None, b"", {"Status": 0, "Answer": []}, 200, "https://dns.invalid", {}, None)
+
+        with patch("ready.ready.request") as mocked_request:
+            results = ready("example.com", request_filter="dns", hide_output=True, dns_resolver=FakeDNSClient())
+
+        # the page response was skipped, so only the DNS checks ran
+        mocked_request.assert_not_called()
+        self.assertTrue(results)
+        self.assertIn("email_spf", [r.check for r in results])
+        self.assertFalse([r.check for r in results if r.check.startswith(("bad_response", "html", "http", "csp"))])
+
+
+def slow_check(name, delay):
+    @requires("response")
+    def check(responses, **kwargs):
+        time.sleep(delay)
+        print(f"checking {name}")
+        return result(True, f"{name} passed", name, colour=False, **kwargs)
+
+    check.__name__ = f"check_{name}"
+    return check
+
+
+class ParallelChecksTestCase(TestCase):
+    def test_results_and_output_are_in_check_order(self):
+        checks = [slow_check("first", 0.3), slow_check("second", 0.1), slow_check("third", 0.2)]
+        response = Response(None, b"", None, 200, "https://example.com", {"content-type": "text/plain"}, None)
+        output = io.StringIO()
+
+        with patch("ready.ready.CHECKS", checks), contextlib.redirect_stdout(output):
+            started = time.monotonic()
+            results = run_checks("example.com", "example.com", {"response": response}, jobs=3)
+            elapsed = time.monotonic() - started
+            self.assertIs(sys.stdout, output)
+
+        self.assertLess(elapsed, 0.5)
+        self.assertEqual([r.check for r in results], ["first", "second", "third"])
+        self.assertEqual(
+            output.getvalue().splitlines(),
+            [
+                "checking first",
+                "[ OK ] first passed",
+                "checking second",
+                "[ OK ] second passed",
+                "checking third",
+                "[ OK ] third passed",
+            ],
+        )
+
+
+CLOUDFLARE_PAGE = (
+    b'<!DOCTYPE html><html><head><title>Just a moment...</title></head><body><div id="cf-content"></div></body></html>'
+)
+
+
+class BotWallTestCase(TestCase):
+    def setUp(self):
+        self.response = Response(None, CLOUDFLARE_PAGE, None, 403, "https://example.com", {"content-type": "text/html"}, None)
+
+    def test_is_bot_wall(self):
+        self.assertTrue(is_bot_wall({"response": self.response}))
+        self.assertFalse(is_bot_wall({"response": self.response._replace(content=b"<!DOCTYPE html><html></html>")}))
+        self.assertFalse(is_bot_wall({"response": None}))
+
+    def test_checks_that_read_the_page_are_skipped(self):
+        @requires("custom_response")
+        def check_nameservers(responses, **kwargs):
+            return result(True, "nameservers", "nameservers", **kwargs)
+
+        with patch("ready.ready.CHECKS", CHECKS + [check_nameservers]):
+            results = run_checks(
+                "example.com", "example.com", {"response": self.response, "custom_response": None}, hide_output=True
+            )
+
+        self.assertEqual([r.check for r in results], ["bad_kasada", "bad_cloudflare", "nameservers"])
+        self.assertFalse(results[1].passed)
+        # the skipped checks are listed by the ids of their results
+        self.assertIn("html_doctype", results.inconclusive)
+        self.assertIn("ssl_hsts", results.inconclusive)
+        self.assertNotIn("check_html_start_with_doctype", results.inconclusive)
+
+    def test_bot_wall_is_worked_out_once(self):
+        with patch("ready.ready.request", return_value=self.response), patch(
+            "ready.ready.is_bot_wall", wraps=is_bot_wall
+        ) as mocked_is_bot_wall:
+            results = ready("example.com", check_filter="html", hide_output=True)
+
+        mocked_is_bot_wall.assert_called_once()
+        self.assertIn("html_doctype", results.inconclusive)
+
+    def test_page_only_fetches_are_not_made(self):
+        fetches = {
+            "response": ("https://example.com", "response", {}),
+            "response_fld": ("https://fld.example.com", "response_fld", {}),
+            "dns_ns_response": ("https://dns.invalid", "dns_ns_response", {}),
+        }
+        checks = select_checks(check_filter="hsts") + select_checks(check_filter="nameservers")
+        self.assertEqual(page_only_fetches(fetches, checks), {"response_fld"})
+        deferred, proceed = deferred_fetches(fetches, checks)
+        self.assertEqual(deferred, {"response_fld", "dns_ns_response"})
+
+        with patch("ready.ready.request", return_value=self.response) as mocked_request:
+            responses = fetch_responses(fetches, deferred=deferred, proceed=proceed)
+
+        self.assertEqual(list(responses), ["response", "dns_ns_response"])
+        self.assertEqual(mocked_request.call_count, 2)
+
+        with patch("ready.ready.request", return_value=self.response):
+            responses = fetch_responses(fetches, deferred=deferred)
+
+        self.assertEqual(list(responses), list(fetches))
+
+    def test_nothing_else_is_fetched_without_a_response(self):
+        fetches = {
+            "http_response": ("http://example.com", "http_response", {}),
+            "response": ("https://example.com", "response", {}),
+            "dns_ns_response": ("https://dns.invalid", "dns_ns_response", {}),
+        }
+        deferred, proceed = deferred_fetches(fetches, select_checks())
+
+        with patch("ready.ready.request", side_effect=URLError("refused")) as mocked_request:
+            responses = fetch_responses(fetches, deferred=deferred, proceed=proceed)
+
+        self.assertEqual(responses, {"http_response": None, "response": None})
+        self.assertEqual(mocked_request.call_count, 2)
+
+        # with a request filter the scan carries on, so the filtered fetches are still made
+        deferred, proceed = deferred_fetches(fetches, select_checks(), request_filter="dns")
+        with patch("ready.ready.request", return_value=self.response) as mocked_request:
+            responses = fetch_responses(fetches, "dns", deferred=deferred, proceed=proceed)
+
+        self.assertEqual(list(responses), list(fetches))
+        mocked_request.assert_called_once()
+
+
+class BatchScanTestCase(TestCase):
+    def setUp(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def fake_async_ready(self, domain, **kwargs):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01 if domain.startswith("slow") else 0)
+        self.in_flight -= 1
+
+        if domain == "broken.example.com":
+            raise ValueError("broken")
+        if domain == "down.example.com":
+            return None
+        return [result(True, f"{domain} passed", "status", print_output=False)]
+
+    def test_read_domains(self):
+        lines = ["example.com\n", "\n", "# comment\n", "  example.org  # trailing\n"]
+        self.assertEqual(list(read_domains(lines)), ["example.com", "example.org"])
+
+    def test_lines_are_written_as_scans_finish(self):
+        output = io.StringIO()
+
+        with patch("ready.ready.async_ready", self.fake_async_ready):
+            scanned = ready_many(
+                ["slow.example.com", "fast.example.com", "down.example.com", "broken.example.com"], output, workers=2
+            )
+
+        reports = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual(scanned, 4)
+        self.assertEqual([r["domain"] for r in reports][0], "fast.example.com")
+        self.assertEqual(
+            {r["domain"] for r in reports}, {"slow.example.com", "fast.example.com", "down.example.com", "broken.example.com"}
+        )
+
+        by_domain = {r["domain"]: r for r in reports}
+        self.assertEqual(set(by_domain["slow.example.com"]), {"domain", "score", "checks", "inconclusive", "when", "version"})
+        self.assertEqual(by_domain["slow.example.com"]["checks"]["status"]["passed"], True)
+        self.assertEqual(by_domain["down.example.com"]["error"], "No response from https://down.example.com")
+        self.assertEqual(by_domain["broken.example.com"]["error"], "ValueError: broken")
+
+    def test_input_is_read_as_workers_become_free(self):
+        read = []
+
+        def domains():
+            for i in range(50):
+                read.append(i)
+                # a domain is only read when a worker is free to scan it
+                self.assertLessEqual(len(read) - output.getvalue().count("\n"), 3)
+                yield f"slow{i}.example.com"
+
+        output = io.StringIO()
+        with patch("ready.ready.async_ready", self.fake_async_ready):
+            ready_many(domains(), output, workers=3)
+
+        self.assertEqual(len(read), 50)
+        self.assertEqual(self.max_in_flight, 3)
+
+
+async def fake_sharded_async_ready(domain, dns_resolver=None, **kwargs):
+    # later domains finish first, so the output is only in order if the parent puts it back in order
+    await asyncio.sleep(0.01 * (int(domain.split(".")[0]) % 4))
+    return [result(True, f"{os.getpid()} {dns_resolver}", "status", print_output=False)]
+
+
+def dns_resolver_factory():
+    return f"resolver for {os.getpid()}"
+
+
+async def fake_scheduled_async_ready(domain, **kwargs):
+    async with scheduler.slot(("host", domain)):
+        return [result(True, "scheduled", "status", print_output=False)]
+
+
+@skipIf(multiprocessing.get_start_method() != "fork", "the patched scan is only inherited by forked processes")
+class ShardedScanTestCase(TestCase):
+    def test_lines_are_in_input_order(self):
+        output = io.StringIO()
+        domains = (f"{i}.example.com" for i in range(40))
+
+        with patch("ready.ready.async_ready", fake_sharded_async_ready):
+            scanned = ready_sharded(
+                domains, output, processes=2, workers=4, chunk_size=5, dns_resolver_factory=dns_resolver_factory
+            )
+
+        reports = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual(scanned, 40)
+        self.assertEqual([r["domain"] for r in reports], [f"{i}.example.com" for i in range(40)])
+
+        # each process made its own DNS client, and none of them is this process
+        messages = {r["checks"]["status"]["message"] for r in reports}
+        pids = {message.split()[0] for message in messages}
+        self.assertNotIn(str(os.getpid()), pids)
+        self.assertTrue(all(message.endswith(f"resolver for {message.split()[0]}") for message in messages))
+
+    def test_scheduler_stats_are_collected_from_the_processes(self):
+        stats = []
+
+        with patch("ready.ready.async_ready", fake_scheduled_async_ready):
+            ready_sharded(
+                (f"{i}.example.com" for i in range(20)),
+                io.StringIO(),
+                processes=2,
+                chunk_size=3,
+                scheduler_options={"max_concurrency": 2},
+                scheduler_stats=stats.append,
+            )
+
+        self.assertEqual(len(stats), 1)
+        self.assertEqual(stats[0]["requests"], 20)
+        self.assertEqual(stats[0]["kinds"]["host"]["requests"], 20)
+        self.assertEqual(stats[0]["in_flight"], 0)
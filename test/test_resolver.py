@@ -0,0 +1,397 @@
+import asyncio
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+from unittest.mock import patch
+from urllib.error import URLError
+
+from dns_stub import StubNameServer
+from ready.resolver import DNSClient, DoHClient, HedgedDNSClient, MemoryCache, SQLiteCache, UDPClient, answer_ttl, get_client
+from ready.thttp import Response
+
+SOA = {"name": "example.com.", "type": 6, "TTL": 900, "data": "ns1.example.com. admin.example.com. 1 7200 900 1209600 300"}
+
+
+def dns_response(answer):
+    return Response(None, b"", answer, 200, None, {}, None)
+
+
+class CountingClient(DNSClient):
+    def __init__(self, answer):
+        super().__init__()
+        self.answer = answer
+        self.lookups = 0
+
+    def lookup(self, name, record_type, timeout=None):
+        self.lookups += 1
+        return dns_response(self.answer)
+
+
+class AnswerTTLTestCase(TestCase):
+    def test_positive_answer_uses_lowest_ttl(self):
+        answer = {"Status": 0, "Answer": [{"type": 16, "TTL": 300, "data": "a"}, {"type": 16, "TTL": 60, "data": "b"}]}
+        self.assertEqual(answer_ttl(answer), 60)
+
+    def test_negative_answer_uses_soa_minimum(self):
+        self.assertEqual(answer_ttl({"Status": 3, "Authority": [SOA]}), 300)
+        self.assertEqual(answer_ttl({"Status": 0, "Authority": [dict(SOA, TTL=30)]}), 30)
+
+    def test_uncacheable_answers(self):
+        self.assertEqual(answer_ttl({"Status": 2}), 0)
+        self.assertEqual(answer_ttl({"Status": 3}), 0)
+        self.assertEqual(answer_ttl(None), 0)
+
+
+class DNSClientTestCase(TestCase):
+    def test_answers_are_cached(self):
+        client = CountingClient({"Status": 0, "Answer": [{"type": 1, "TTL": 300, "data": "127.0.0.1"}]})
+
+        client.query("example.com", "A")
+        client.query("EXAMPLE.com.", "a")
+        self.assertEqual(client.lookups, 1)
+
+        client.query("example.com", "AAAA")
+        self.assertEqual(client.lookups, 2)
+
+    def test_negative_answers_are_cached(self):
+        client = CountingClient({"Status": 3, "Authority": [SOA]})
+
+        client.query("missing.example.com", "TXT")
+        asyncio.run(client.async_query("missing.example.com", "TXT"))
+        self.assertEqual(client.lookups, 1)
+
+    def test_failures_are_not_cached(self):
+        client = CountingClient({"Status": 2})
+
+        client.query("example.com", "TXT")
+        client.query("example.com", "TXT")
+        self.assertEqual(client.lookups, 2)
+
+    def test_memory_cache_expiry(self):
+        cache = MemoryCache()
+        cache.set("key", "value", 0)
+        self.assertIsNone(cache.get("key"))
+
+        cache = MemoryCache(max_entries=1)
+        cache.set("a", "value", 60)
+        cache.set("b", "value", 60)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get("b"), "value")
+
+    def test_doh_client_parses_dns_json(self):
+        response = Response(None, b'{"Status": 0}', None, 200, None, {"content-type": "application/dns-json"}, None)
+
+        with patch("ready.resolver.request", return_value=response) as mocked_request:
+            client = DoHClient("https://dns.invalid/dns-query")
+            self.assertEqual(client.query("example.com", "NS").json, {"Status": 0})
+            mocked_request.assert_called_with(
+                "https://dns.invalid/dns-query?name=example.com&type=NS",
+                timeout=None,
+                rate_key=("resolver", "https://dns.invalid/dns-query"),
+            )
+
+    def test_get_client_is_shared(self):
+        self.assertIs(get_client("https://dns.invalid/resolve"), get_client("https://dns.invalid/resolve"))
+
+        client = CountingClient({})
+        self.assertIs(get_client(client), client)
+
+
+class UDPClientTestCase(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = StubNameServer(
+            {
+                ("example.com", "A"): [("A", 300, "192.0.2.1")],
+                ("example.com", "TXT"): [("TXT", 300, "v=spf1 " + "include:_spf.example.com " * 40 + "-all")],
+                ("slow.example.com", "A"): [("A", 300, "192.0.2.2")],
+            },
+            truncate={"example.com"},
+            delays={"slow.example.com": 0.3},
+            drop={"drop.example.com"},
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.close()
+
+    def setUp(self):
+        self.client = UDPClient("127.0.0.1", self.server.port, timeout=2)
+
+    def tearDown(self):
+        self.client.close()
+
+    def test_truncated_answers_are_retried_over_tcp(self):
+        tcp_queries = self.server.tcp_queries
+        response = self.client.query("example.com", "TXT")
+
+        self.assertEqual(self.server.tcp_queries, tcp_queries + 1)
+        self.assertEqual(response.json["Answer"][0]["data"], "v=spf1 " + "include:_spf.example.com " * 40 + "-all")
+        self.assertEqual(response.json["Answer"][0]["type"], 16)
+
+    def test_negative_answer(self):
+        response = asyncio.run(self.client.async_query("missing.example.com", "A"))
+        self.assertEqual(response.json["Status"], 3)
+        self.assertEqual(answer_ttl(response.json), 300)
+
+    def test_pipelined_queries_are_matched_by_id(self):
+        self.server.truncate = set()
+        try:
+            with ThreadPoolExecutor(max_workers=10) as executor:
+                names = ["slow.example.com", "example.com"] * 5
+                results = list(executor.map(lambda name: self.client.lookup(name, "A"), names))
+        finally:
+            self.server.truncate = {"example.com"}
+
+        self.assertEqual([r.json["Answer"][0]["data"] for r in results], ["192.0.2.2", "192.0.2.1"] * 5)
+
+    def test_async_queries(self):
+        async def lookups():
+            return await asyncio.gather(
+                *[self.client.async_lookup(name, "A") for name in ["slow.example.com", "missing.example.com"]]
+            )
+
+        slow, missing = asyncio.run(lookups())
+        self.assertEqual(slow.json["Answer"][0]["data"], "192.0.2.2")
+        self.assertEqual(missing.json["Status"], 3)
+
+    def test_async_lookups_dont_block_the_loop(self):
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        async def lookups():
+            ticker = asyncio.ensure_future(tick())
+            try:
+                return await asyncio.gather(
+                    self.client.async_lookup("slow.example.com", "A"), self.client.async_query("example.com", "TXT")
+                )
+            finally:
+                ticker.cancel()
+
+        tcp_queries = self.server.tcp_queries
+        slow, txt = asyncio.run(lookups())
+
+        self.assertEqual(slow.json["Answer"][0]["data"], "192.0.2.2")
+        self.assertEqual(txt.json["Answer"][0]["type"], 16)
+        self.assertEqual(self.server.tcp_queries, tcp_queries + 1)
+        # the loop kept running while the slow answer was awaited, and the blocking socket wasn't opened
+        self.assertGreater(ticks, 10)
+        self.assertIsNone(self.client._sock)
+
+    def test_async_timeout(self):
+        client = UDPClient("127.0.0.1", self.server.port, timeout=0.1, retries=1)
+        udp_queries = self.server.udp_queries
+
+        with self.assertRaises(TimeoutError):
+            asyncio.run(client.async_lookup("drop.example.com", "A"))
+
+        self.assertEqual(self.server.udp_queries, udp_queries + 2)
+
+    def test_timeout(self):
+        client = UDPClient("127.0.0.1", self.server.port, timeout=0.1, retries=1)
+        udp_queries = self.server.udp_queries
+
+        with self.assertRaises(TimeoutError):
+            client.query("drop.example.com", "A")
+
+        self.assertEqual(self.server.udp_queries, udp_queries + 2)
+        client.close()
+
+    def test_get_client(self):
+        client = get_client(f"udp://127.0.0.1:{self.server.port}")
+        self.assertIsInstance(client, UDPClient)
+        self.assertEqual((client.host, client.port), ("127.0.0.1", self.server.port))
+        self.assertEqual(get_client("udp://[::1]").port, 53)
+
+
+class SlowClient(DNSClient):
+    def __init__(self, resolver, delay, answer=None, error=None):
+        super().__init__()
+        self.resolver = resolver
+        self.delay = delay
+        self.answer = answer if answer is not None else {"Status": 0, "Answer": [{"type": 1, "TTL": 300, "data": resolver}]}
+        self.error = error
+        self.lookups = 0
+        self.timeouts = []
+
+    def lookup(self, name, record_type, timeout=None):
+        self.lookups += 1
+        self.timeouts.append(timeout)
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return dns_response(self.answer)
+
+    async def async_lookup(self, name, record_type, timeout=None):
+        self.lookups += 1
+        self.timeouts.append(timeout)
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return dns_response(self.answer)
+
+
+class HedgedDNSClientTestCase(TestCase):
+    def test_fast_primary_is_not_hedged(self):
+        primary, secondary = SlowClient("primary", 0), SlowClient("secondary", 0)
+        client = HedgedDNSClient([primary, secondary], delay=0.2)
+
+        self.assertEqual(client.lookup("example.com", "A").json["Answer"][0]["data"], "primary")
+        self.assertEqual(secondary.lookups, 0)
+
+    def test_slow_primary_is_hedged_and_ranked_last(self):
+        primary, secondary = SlowClient("primary", 0.5), SlowClient("secondary", 0)
+        client = HedgedDNSClient([primary, secondary], delay=0.05)
+
+        started = time.monotonic()
+        self.assertEqual(client.lookup("example.com", "A").json["Answer"][0]["data"], "secondary")
+        self.assertLess(time.monotonic() - started, 0.4)
+
+        time.sleep(0.5)  # let the primary finish so its latency is recorded
+        self.assertEqual(client.ranked(), [secondary, primary])
+        self.assertEqual([s["wins"] for s in client.stats()], [0, 1])
+
+    def test_failures_are_hedged_immediately(self):
+        primary = SlowClient("primary", 0, error=URLError("rate limited"))
+        servfail = SlowClient("servfail", 0, answer={"Status": 2})
+        secondary = SlowClient("secondary", 0)
+        client = HedgedDNSClient([primary, servfail, secondary], delay=5)
+
+        started = time.monotonic()
+        self.assertEqual(client.lookup("example.com", "A").json["Answer"][0]["data"], "secondary")
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual([s["failures"] for s in client.stats()], [1, 1, 0])
+
+    def test_all_resolvers_failing(self):
+        client = HedgedDNSClient([SlowClient("a", 0, answer={"Status": 2}), SlowClient("b", 0, error=URLError("down"))])
+        self.assertEqual(client.lookup("example.com", "A").json, {"Status": 2})
+
+        client = HedgedDNSClient([SlowClient("a", 0, error=URLError("down"))])
+        with self.assertRaises(URLError):
+            client.lookup("example.com", "A")
+
+        client = HedgedDNSClient([SlowClient("a", 1)], timeout=0.1)
+        with self.assertRaises(TimeoutError):
+            client.lookup("example.com", "A")
+
+    def test_lost_lookups_do_not_hold_up_exit(self):
+        primary, secondary = SlowClient("primary", 0.2), SlowClient("secondary", 0)
+        client = HedgedDNSClient([primary, secondary], delay=0.01)
+        threads = []
+        primary.lookup = lambda *args, **kwargs: threads.append(threading.current_thread()) or time.sleep(0.2)
+
+        self.assertEqual(client.lookup("example.com", "A").json["Answer"][0]["data"], "secondary")
+        self.assertTrue(threads[0].daemon)
+
+    def test_lookups_are_given_until_the_deadline(self):
+        primary, secondary = SlowClient("primary", 0.1), SlowClient("secondary", 0)
+        client = HedgedDNSClient([primary, secondary], delay=0.05, timeout=3.0)
+        client.lookup("example.com", "A")
+
+        # a query that loses the race gives up when the hedged lookup would have
+        self.assertLessEqual(primary.timeouts[0], 3.0)
+        self.assertLess(secondary.timeouts[0], primary.timeouts[0])
+
+        # the clients are shared with other scans, so their own timeouts are left alone
+        doh = DoHClient("https://dns.invalid/dns-query")
+        HedgedDNSClient([doh], timeout=3.0)
+        self.assertIsNone(doh.timeout)
+        self.assertEqual(doh._timeout(3.0), 3.0)
+        self.assertEqual(DoHClient("https://dns.invalid/dns-query", timeout=1.0)._timeout(3.0), 1.0)
+
+    def test_async_lookup(self):
+        primary, secondary = SlowClient("primary", 0.5), SlowClient("secondary", 0)
+        client = HedgedDNSClient([primary, secondary], delay=0.05)
+
+        async def lookup():
+            response = await client.async_query("example.com", "A")
+            self.assertEqual(client.stats()[0]["queries"], 0)
+            await asyncio.sleep(0.6)  # let the primary finish so its latency is recorded
+            return response
+
+        response = asyncio.run(lookup())
+        self.assertEqual(response.json["Answer"][0]["data"], "secondary")
+        self.assertEqual(client.ranked(), [secondary, primary])
+        self.assertGreaterEqual(client.stats()[0]["latency"], 0.5)
+
+    def test_cancelled_lookups_are_not_recorded(self):
+        primary, secondary = SlowClient("primary", 0.5), SlowClient("secondary", 0)
+        client = HedgedDNSClient([primary, secondary], delay=0.05)
+
+        # the loop is closed before the primary answers, which cancels it
+        asyncio.run(client.async_query("example.com", "A"))
+        self.assertEqual([s["queries"] for s in client.stats()], [0, 1])
+
+
+class SQLiteCacheTestCase(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "dns.sqlite3")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_answers_are_shared_between_caches(self):
+        answer = {"Status": 0, "Answer": [{"type": 1, "TTL": 300, "data": "127.0.0.1"}]}
+        first, second = SQLiteCache(self.path), SQLiteCache(self.path)
+
+        client = CountingClient(answer)
+        client.cache = first
+        client.query("example.com", "A")
+
+        client = CountingClient(answer)
+        client.cache = second
+        self.assertEqual(client.query("Example.com.", "A").json, answer)
+        self.assertEqual(client.lookups, 0)
+
+        first.close()
+        second.close()
+
+    def test_expiry(self):
+        cache = SQLiteCache(self.path)
+        cache.set(("example.com", "A"), dns_response({"Status": 0}), 0)
+        self.assertIsNone(cache.get(("example.com", "A")))
+
+        cache.set(("example.com", "A"), dns_response({"Status": 0}), 60)
+        self.assertEqual(cache.get(("example.com", "A")).json, {"Status": 0})
+        cache.close()
+
+    def test_concurrent_writers(self):
+        def write(i):
+            cache = SQLiteCache(self.path)
+            for j in range(50):
+                cache.set((f"{i}-{j}.example.com", "A"), dns_response({"Status": 0, "i": i}), 60)
+            cache.close()
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(write, range(4)))
+
+        cache = SQLiteCache(self.path)
+        self.assertEqual(cache.get(("3-49.example.com", "A")).json, {"Status": 0, "i": 3})
+        cache.close()
+
+    def test_broken_cache_is_a_miss(self):
+        cache = SQLiteCache(self.path)
+        cache.close()
+
+        with open(self.path, "wb") as f:
+            f.write(b"not a database" * 100)
+
+        self.assertIsNone(cache.get(("example.com", "A")))
+        cache.set(("example.com", "A"), dns_response({"Status": 0}), 60)
+
+    def test_get_client_with_cache(self):
+        cache = SQLiteCache(self.path)
+        client = get_client("https://dns.invalid/cached", cache=cache)
+
+        self.assertIs(client.cache, cache)
+        self.assertIsNot(client, get_client("https://dns.invalid/cached"))
+        cache.close()
@@ -0,0 +1,138 @@
+import asyncio
+import threading
+import time
+from unittest import TestCase
+
+from ready import scheduler
+from ready.scheduler import Scheduler, TokenBucket
+
+
+class TokenBucketTestCase(TestCase):
+    def test_burst_then_rate(self):
+        bucket = TokenBucket(rate=10, burst=2)
+
+        self.assertEqual(bucket.reserve(), 0)
+        self.assertEqual(bucket.reserve(), 0)
+        # later reservations queue up behind each other
+        self.assertAlmostEqual(bucket.reserve(), 0.1, delta=0.01)
+        self.assertAlmostEqual(bucket.reserve(), 0.2, delta=0.01)
+
+
+class SchedulerTestCase(TestCase):
+    def test_rate_is_per_host(self):
+        limits = Scheduler(host_rate=20, burst=1)
+        started = time.monotonic()
+
+        for _ in range(3):
+            with limits.slot(("host", "a.example.com")):
+                pass
+        with limits.slot(("host", "b.example.com")):
+            pass
+
+        # the second and third requests to a.example.com wait 50ms each, b.example.com doesn't wait
+        self.assertGreaterEqual(time.monotonic() - started, 0.09)
+        stats = limits.stats()
+        self.assertEqual(stats["requests"], 4)
+        self.assertEqual(stats["waiting"], 0)
+        self.assertGreaterEqual(stats["wait_seconds_max"], 0.04)
+        self.assertEqual(stats["kinds"]["host"]["requests"], 4)
+
+    def test_resolvers_have_their_own_rate(self):
+        limits = Scheduler(host_rate=1, resolver_rate=None)
+        started = time.monotonic()
+
+        for _ in range(5):
+            with limits.slot(("resolver", "https://dns.google/resolve")):
+                pass
+
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertEqual(limits.stats()["kinds"]["resolver"]["requests"], 5)
+
+    def test_concurrency_cap_queues_requests(self):
+        limits = Scheduler(max_concurrency=2)
+        in_flight = []
+        most = 0
+        lock = threading.Lock()
+
+        def make_request(i):
+            nonlocal most
+            with limits.slot(("host", f"{i}.example.com")):
+                with lock:
+                    in_flight.append(i)
+                    most = max(most, len(in_flight))
+                time.sleep(0.02)
+                with lock:
+                    in_flight.remove(i)
+
+        threads = [threading.Thread(target=make_request, args=(i,)) for i in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = limits.stats()
+        self.assertEqual(most, 2)
+        self.assertEqual(stats["requests"], 6)
+        self.assertGreater(stats["max_waiting"], 2)
+        self.assertEqual(stats["in_flight"], 0)
+
+    def test_async_concurrency_cap_and_cancellation(self):
+        limits = Scheduler(max_concurrency=1)
+
+        async def make_request(delay):
+            async with limits.slot(("host", "example.com")):
+                await asyncio.sleep(delay)
+
+        async def run():
+            first = asyncio.ensure_future(make_request(0.05))
+            await asyncio.sleep(0)
+            waiting = asyncio.ensure_future(make_request(0))
+            await asyncio.sleep(0.01)
+            waiting.cancel()
+            await asyncio.gather(first, make_request(0), return_exceptions=True)
+
+        asyncio.run(run())
+
+        # the cancelled request gave up its place in the queue, and the slot was released
+        stats = limits.stats()
+        self.assertEqual(stats["in_flight"], 0)
+        self.assertEqual(stats["waiting"], 0)
+        self.assertEqual(stats["requests"], 3)
+
+    def test_released_on_error(self):
+        limits = Scheduler(max_concurrency=1)
+
+        with self.assertRaises(OSError):
+            with limits.slot(("host", "example.com")):
+                raise OSError()
+
+        self.assertEqual(limits.stats()["in_flight"], 0)
+
+
+class ConfigureTestCase(TestCase):
+    def tearDown(self):
+        scheduler.configure()
+
+    def test_unconfigured_requests_are_not_scheduled(self):
+        self.assertIsNone(scheduler.configure())
+
+        with scheduler.slot(("host", "example.com")):
+            pass
+
+    def test_merge_stats(self):
+        first, second = Scheduler(host_rate=100), Scheduler(resolver_rate=100)
+        for _ in range(2):
+            with first.slot(("host", "example.com")):
+                pass
+        with second.slot(("resolver", "https://dns.google/resolve")):
+            pass
+
+        merged = scheduler.merge_stats([first.stats(), second.stats()])
+        self.assertEqual(merged["requests"], 3)
+        self.assertEqual(merged["kinds"]["host"]["requests"], 2)
+        self.assertEqual(merged["kinds"]["resolver"]["requests"], 1)
+        self.assertEqual(merged["wait_seconds_max"], max(first.stats()["wait_seconds_max"], second.stats()["wait_seconds_max"]))
+        self.assertEqual(scheduler.merge_stats([])["requests"], 0)
+
+    def test_host_key(self):
+        self.assertEqual(scheduler.host_key("https://Example.com:8443/path"), ("host", "example.com"))
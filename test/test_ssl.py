@@ -0,0 +1,113 @@
+import ssl
+from datetime import date, timedelta
+from unittest import TestCase
+from unittest.mock import patch
+
+from ready.checks.ssl import (
+    check_ssl_certificate_should_be_trusted,
+    check_ssl_connection_fails_with_tls_1_0,
+    check_ssl_connection_fails_with_tls_1_1,
+    check_ssl_connection_succeeds_with_tls_1_3,
+    check_ssl_expiry_should_be_greater_than_five_days,
+    check_ssl_expiry_should_be_less_than_one_year,
+    connect_with_specific_protocol,
+)
+from ready.tls import TLSProbe, get_context
+
+
+def tls_probe(days_until_expiry, trusted=True):
+    not_after = (date.today() + timedelta(days=days_until_expiry)).strftime("%b %d 12:00:00 %Y GMT")
+    return TLSProbe("ready.invalid", {"notAfter": not_after}, b"", "TLSv1.3", None, trusted, None)
+
+
+def tls_capabilities(*supported):
+    return {
+        version: {"supported": version in supported, "ciphers": ["TLS_AES_256_GCM_SHA384"] if version in supported else []}
+        for version in ["TLSv1", "TLSv1.1", "TLSv1.2", "TLSv1.3"]
+    }
+
+
+class SSLChecksTestCase(TestCase):
+    def test_check_ssl_certificate_should_be_trusted(self):
+        result = check_ssl_certificate_should_be_trusted(
+            {"tls_probe": tls_probe(90)}, domain_with_no_path="ready.invalid", print_output=False
+        )
+        self.assertTrue(result.passed)
+
+        result = check_ssl_certificate_should_be_trusted(
+            {"tls_probe": tls_probe(90, trusted=False)}, domain_with_no_path="ready.invalid", print_output=False
+        )
+        self.assertFalse(result.passed)
+
+    def test_check_ssl_expiry_should_be_less_than_one_year(self):
+        result = check_ssl_expiry_should_be_less_than_one_year(
+            {"tls_probe": tls_probe(90)}, domain_with_no_path="ready.invalid", print_output=False
+        )
+        self.assertTrue(result.passed)
+
+        result = check_ssl_expiry_should_be_less_than_one_year(
+            {"tls_probe": tls_probe(500)}, domain_with_no_path="ready.invalid", print_output=False
+        )
+        self.assertFalse(result.passed)
+
+    def test_check_ssl_expiry_should_be_greater_than_five_days(self):
+        result = check_ssl_expiry_should_be_greater_than_five_days(
+            {"tls_probe": tls_probe(90)}, domain_with_no_path="ready.invalid", print_output=False
+        )
+        self.assertTrue(result.passed)
+
+        result = check_ssl_expiry_should_be_greater_than_five_days(
+            {"tls_probe": tls_probe(2)}, domain_with_no_path="ready.invalid", print_output=False
+        )
+        self.assertFalse(result.passed)
+
+        result = check_ssl_expiry_should_be_greater_than_five_days(
+            {"tls_probe": tls_probe(90)._replace(cert=None, trusted=False)},
+            domain_with_no_path="ready.invalid",
+            print_output=False,
+        )
+        self.assertFalse(result.passed)
+
+    def test_check_ssl_connection_fails_with_tls_1_0(self):
+        result = check_ssl_connection_fails_with_tls_1_0(
+            {"tls_capabilities": tls_capabilities("TLSv1.2")}, domain_with_no_path="ready.invalid", print_output=False
+        )
+        self.assertTrue(result.passed)
+
+        result = check_ssl_connection_fails_with_tls_1_0(
+            {"tls_capabilities": tls_capabilities("TLSv1", "TLSv1.2")}, domain_with_no_path="ready.invalid", print_output=False
+        )
+        self.assertFalse(result.passed)
+
+    def test_check_ssl_connection_fails_with_tls_1_1(self):
+        result = check_ssl_connection_fails_with_tls_1_1(
+            {"tls_capabilities": tls_capabilities("TLSv1.2")}, domain_with_no_path="ready.invalid", print_output=False
+        )
+        self.assertTrue(result.passed)
+
+        result = check_ssl_connection_fails_with_tls_1_1(
+            {"tls_capabilities": tls_capabilities("TLSv1.1")}, domain_with_no_path="ready.invalid", print_output=False
+        )
+        self.assertFalse(result.passed)
+
+    def test_check_ssl_connection_succeeds_with_tls_1_3(self):
+        result = check_ssl_connection_succeeds_with_tls_1_3(
+            {"tls_capabilities": tls_capabilities("TLSv1.3")}, domain_with_no_path="ready.invalid", print_output=False
+        )
+        self.assertTrue(result.passed)
+
+        result = check_ssl_connection_succeeds_with_tls_1_3(
+            {"tls_capabilities": tls_capabilities("TLSv1.2")}, domain_with_no_path="ready.invalid", print_output=False
+        )
+        self.assertFalse(result.passed)
+
+    def test_connect_with_specific_protocol(self):
+        with patch("ready.checks.ssl.negotiate", return_value=None) as negotiate:
+            self.assertFalse(connect_with_specific_protocol("ready.invalid", ssl.PROTOCOL_TLSv1_1))
+            self.assertFalse(connect_with_specific_protocol("ready.invalid", ssl.TLSVersion.TLSv1))
+
+        protocols = [call.kwargs["protocol"] for call in negotiate.call_args_list]
+        self.assertEqual(protocols, [ssl.TLSVersion.TLSv1_1, ssl.TLSVersion.TLSv1])
+        # the mapped versions make contexts, where PROTOCOL_* constants raised ValueError
+        for protocol in protocols:
+            self.assertEqual(get_context(False, protocol).maximum_version, protocol)
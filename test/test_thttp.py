@@ -0,0 +1,82 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import TestCase
+
+from ready import scheduler
+from ready.thttp import ConnectionPool, request
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    connections = set()
+
+    def do_GET(self):
+        self.connections.add(self.client_address)
+
+        body = b"ok"
+        self.send_response(200 if self.path != "/redirect" else 302)
+        if self.path == "/redirect":
+            self.send_header("Location", "/")
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeConnection:
+    def close(self):
+        pass
+
+
+class ConnectionPoolTestCase(TestCase):
+    def setUp(self):
+        KeepAliveHandler.connections = set()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_should_reuse_connection(self):
+        pool = ConnectionPool()
+
+        for path in ["/", "/robots.txt", "/redirect"]:
+            response = request(self.url + path, pool=pool)
+            self.assertEqual(response.status, 200)
+            self.assertEqual(response.content, b"ok")
+
+        self.assertEqual(len(KeepAliveHandler.connections), 1)
+        pool.close()
+
+    def test_each_hop_is_scheduled(self):
+        limits = scheduler.configure(host_rate=100)
+        try:
+            request(self.url + "/redirect")
+        finally:
+            scheduler.configure()
+
+        self.assertEqual(limits.stats()["kinds"]["host"]["requests"], 2)
+
+    def test_should_not_reuse_expired_connection(self):
+        pool = ConnectionPool(idle_timeout=0)
+
+        request(self.url, pool=pool)
+        request(self.url, pool=pool)
+
+        self.assertEqual(len(KeepAliveHandler.connections), 2)
+        pool.close()
+
+    def test_should_limit_idle_connections_per_host(self):
+        pool = ConnectionPool(max_per_host=1)
+        conns = [FakeConnection(), FakeConnection()]
+
+        pool.put("host", conns[0])
+        pool.put("host", conns[1])
+
+        self.assertIs(pool.get("host"), conns[0])
+        self.assertIsNone(pool.get("host"))
@@ -0,0 +1,159 @@
+import asyncio
+import os
+import socket
+import ssl
+import threading
+from unittest import TestCase
+
+from ready.tls import async_probe, async_scan, get_context, probe, save_session, scan, wrap_socket
+
+CERTFILE = os.path.join(os.path.dirname(__file__), "certs", "localhost.pem")
+
+
+class TLSServer:
+    def __init__(self, maximum_version=None, ciphers=None):
+        self.context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        self.context.load_cert_chain(CERTFILE)
+
+        if maximum_version:
+            self.context.maximum_version = maximum_version
+        if ciphers:
+            self.context.set_ciphers(ciphers)
+
+        self.sock = socket.create_server(("127.0.0.1", 0))
+        self.port = self.sock.getsockname()[1]
+        threading.Thread(target=self.serve, daemon=True).start()
+
+    def serve(self):
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+
+            threading.Thread(target=self.handle, args=(conn,), daemon=True).start()
+
+    def handle(self, conn):
+        try:
+            with self.context.wrap_socket(conn, server_side=True) as ssl_conn:
+                ssl_conn.sendall(b"ok")
+        except OSError:
+            pass
+
+    def close(self):
+        self.sock.close()
+
+
+class ContextRegistryTestCase(TestCase):
+    def test_contexts_are_shared(self):
+        self.assertIs(get_context(), get_context())
+        self.assertIs(get_context(verify=False), get_context(verify=False))
+        self.assertIsNot(get_context(), get_context(verify=False))
+
+    def test_contexts_are_shared_however_they_are_requested(self):
+        self.assertIs(get_context(), get_context(True))
+        self.assertIs(get_context(), get_context(verify=True))
+        self.assertIs(get_context(False), get_context(verify=False))
+        self.assertIs(
+            get_context(False, ssl.TLSVersion.TLSv1_2, ciphers="AES256-SHA"),
+            get_context(verify=False, protocol=ssl.TLSVersion.TLSv1_2, ciphers="AES256-SHA"),
+        )
+        self.assertIs(get_context(alpn_protocols=["h2"]), get_context(True, None, ("h2",)))
+
+    def test_context_settings(self):
+        self.assertEqual(get_context(verify=False).verify_mode, ssl.CERT_NONE)
+        self.assertEqual(get_context().verify_mode, ssl.CERT_REQUIRED)
+
+        ctx = get_context(verify=False, protocol=ssl.TLSVersion.TLSv1_2)
+        self.assertEqual(ctx.minimum_version, ssl.TLSVersion.TLSv1_2)
+        self.assertEqual(ctx.maximum_version, ssl.TLSVersion.TLSv1_2)
+
+
+class SessionResumptionTestCase(TestCase):
+    def setUp(self):
+        self.server = TLSServer()
+
+    def tearDown(self):
+        self.server.close()
+
+    def connect(self, context):
+        sock = socket.create_connection(("127.0.0.1", self.server.port), timeout=5)
+        with wrap_socket(sock, "localhost", self.server.port, context) as ssl_sock:
+            ssl_sock.recv(2)
+            save_session("localhost", self.server.port, context, ssl_sock)
+            return ssl_sock.session_reused
+
+    def test_session_is_resumed(self):
+        context = get_context(verify=False)
+
+        self.assertFalse(self.connect(context))
+        self.assertTrue(self.connect(context))
+
+
+class ProbeTestCase(TestCase):
+    def setUp(self):
+        self.server = TLSServer()
+
+    def tearDown(self):
+        self.server.close()
+
+    def test_probe_untrusted_certificate(self):
+        tls_probe = probe("localhost", self.server.port)
+
+        self.assertFalse(tls_probe.trusted)
+        self.assertIn("self-signed", tls_probe.error)
+        self.assertIsNone(tls_probe.cert)
+        self.assertTrue(tls_probe.cert_der)
+        self.assertTrue(tls_probe.version.startswith("TLSv1"))
+        self.assertTrue(tls_probe.cipher)
+
+    def test_async_probe(self):
+        tls_probe = asyncio.run(async_probe("localhost", self.server.port))
+
+        self.assertEqual(tls_probe._replace(cipher=None), probe("localhost", self.server.port)._replace(cipher=None))
+        self.assertIn("self-signed", tls_probe.error)
+        self.assertTrue(tls_probe.cert_der)
+
+    def test_probe_connection_failure(self):
+        self.server.close()
+        tls_probe = probe("localhost", self.server.port, timeout=1)
+
+        self.assertFalse(tls_probe.trusted)
+        self.assertIsNone(tls_probe.cert_der)
+        self.assertTrue(tls_probe.error)
+
+        tls_probe = asyncio.run(async_probe("localhost", self.server.port, timeout=1))
+        self.assertIsNone(tls_probe.cert_der)
+        self.assertTrue(tls_probe.error)
+
+
+class ScanTestCase(TestCase):
+    def test_scan_versions(self):
+        server = TLSServer()
+        capabilities = scan("localhost", server.port, timeout=2)
+        server.close()
+
+        self.assertEqual(list(capabilities.keys()), ["TLSv1", "TLSv1.1", "TLSv1.2", "TLSv1.3"])
+        self.assertFalse(capabilities["TLSv1"]["supported"])
+        self.assertFalse(capabilities["TLSv1.1"]["supported"])
+        self.assertTrue(capabilities["TLSv1.2"]["supported"])
+        self.assertTrue(capabilities["TLSv1.3"]["supported"])
+        self.assertEqual(len(capabilities["TLSv1.2"]["ciphers"]), 1)
+
+    def test_scan_enumerates_ciphers(self):
+        server = TLSServer(maximum_version=ssl.TLSVersion.TLSv1_2, ciphers="ECDHE-RSA-AES128-GCM-SHA256:AES256-SHA")
+        capabilities = scan("localhost", server.port, versions=["TLSv1.2", "TLSv1.3"], enumerate_ciphers=True, timeout=2)
+        server.close()
+
+        self.assertEqual(sorted(capabilities["TLSv1.2"]["ciphers"]), ["AES256-SHA", "ECDHE-RSA-AES128-GCM-SHA256"])
+        self.assertEqual(capabilities["TLSv1.3"], {"supported": False, "ciphers": []})
+
+    def test_async_scan(self):
+        server = TLSServer(maximum_version=ssl.TLSVersion.TLSv1_2, ciphers="ECDHE-RSA-AES128-GCM-SHA256:AES256-SHA")
+        capabilities = asyncio.run(
+            async_scan("localhost", server.port, versions=["TLSv1.2", "TLSv1.3"], enumerate_ciphers=True, timeout=2)
+        )
+        server.close()
+
+        self.assertEqual(sorted(capabilities["TLSv1.2"]["ciphers"]), ["AES256-SHA", "ECDHE-RSA-AES128-GCM-SHA256"])
+        self.assertEqual(capabilities["TLSv1.3"], {"supported": False, "ciphers": []})
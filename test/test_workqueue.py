@@ -0,0 +1,104 @@
+import io
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+from unittest import TestCase
+
+from ready.workqueue import WorkQueue, coordinate, work
+
+
+def fake_scan(domain):
+    time.sleep(0.01)
+    return {"domain": domain, "worker": os.getpid()}
+
+
+def run_worker(path, crash=False):
+    queue = WorkQueue(path)
+
+    if crash:
+        # take a job and die without completing it
+        queue.lease("crashed", duration=0.2)
+        os._exit(1)
+
+    work(queue, fake_scan, poll_interval=0.05)
+
+
+class WorkQueueTestCase(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "queue.db")
+        self.queue = WorkQueue(self.path)
+
+    def tearDown(self):
+        self.queue.close()
+        self.directory.cleanup()
+
+    def test_lease_and_complete(self):
+        self.assertEqual(self.queue.add(["a.example.com", "b.example.com", "a.example.com"]), 2)
+        self.assertEqual(self.queue.add(["a.example.com"]), 0)
+
+        job_id, domain = self.queue.lease("worker")
+        self.assertEqual(domain, "a.example.com")
+        self.assertEqual(self.queue.lease("other")[1], "b.example.com")
+        self.assertIsNone(self.queue.lease("third"))
+        self.assertFalse(self.queue.finished())
+
+        self.queue.complete(job_id, {"domain": domain})
+        self.assertEqual(self.queue.collect(), [{"domain": "a.example.com"}])
+        self.assertEqual(self.queue.collect(), [])
+        self.assertEqual(self.queue.counts(), {"done": 1, "leased": 1})
+
+    def test_expired_leases_are_requeued_then_failed(self):
+        self.queue.add(["a.example.com"])
+
+        self.queue.lease("crashed", duration=-1)
+        self.assertEqual(self.queue.requeue_expired(max_attempts=2), 1)
+        self.assertEqual(self.queue.counts(), {"pending": 1})
+
+        self.queue.lease("crashed again", duration=-1)
+        self.queue.requeue_expired(max_attempts=2)
+        self.assertTrue(self.queue.finished())
+        self.assertEqual(self.queue.collect(), [{"domain": "a.example.com", "error": "The lease expired 2 times"}])
+
+    def test_late_report_for_failed_job_is_collected(self):
+        self.queue.add(["a.example.com"])
+        job_id, _ = self.queue.lease("slow", duration=-1)
+        self.queue.requeue_expired(max_attempts=1)
+        self.assertEqual(self.queue.collect(), [{"domain": "a.example.com", "error": "The lease expired 1 times"}])
+
+        self.queue.complete(job_id, {"domain": "a.example.com", "score": 100})
+        self.assertEqual(self.queue.collect(), [{"domain": "a.example.com", "score": 100}])
+        self.assertEqual(self.queue.counts(), {"done": 1})
+
+    def test_queue_is_durable(self):
+        self.queue.add(["a.example.com", "b.example.com"])
+        self.queue.complete(self.queue.lease("worker")[0], {"domain": "a.example.com"})
+        self.queue.close()
+
+        self.queue = WorkQueue(self.path)
+        self.assertEqual(self.queue.counts(), {"done": 1, "pending": 1})
+        self.assertEqual(self.queue.lease("worker")[1], "b.example.com")
+
+    def test_coordinator_with_several_worker_processes(self):
+        domains = [f"{i}.example.com" for i in range(30)]
+        self.queue.add(domains)
+
+        context = multiprocessing.get_context("spawn")
+        workers = [context.Process(target=run_worker, args=(self.path, i == 0)) for i in range(4)]
+        for worker in workers:
+            worker.start()
+
+        output = io.StringIO()
+        written = coordinate(self.queue, output, poll_interval=0.05)
+
+        for worker in workers:
+            worker.join(10)
+
+        reports = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual(written, 30)
+        self.assertEqual(sorted(r["domain"] for r in reports), sorted(domains))
+        self.assertGreater(len({r["worker"] for r in reports}), 1)
+        self.assertEqual(workers[0].exitcode, 1)
+        self.assertEqual([w.exitcode for w in workers[1:]], [0, 0, 0])